@@ -5,8 +5,22 @@
 
 // Set to the number of LEDs in your LED strip
 #define NUM_LEDS 284
-// Maximum number of packets to hold in the buffer. Don't change this.
-#define BUFFER_LEN 1024
+// Maximum size of one UDP packet. The chunked protocol sends packets of up to 1472 bytes. Don't change this.
+#define BUFFER_LEN 1472
+// Bytes per LED in a frame.
+#define CHANNELS 3
+// Header of the chunked UDP protocol, see server/libs/outputs/udp_frame_protocol.py
+#define HEADER_LEN 16
+#define PROTOCOL_VERSION 1
+#define MAX_PAYLOAD_LEN (BUFFER_LEN - HEADER_LEN)
+// Chunks up to this many frames behind the current frame are late. Older sequences mean, that the server restarted.
+#define MAX_LATE_FRAMES 64
+// Flags of the compressed frames, see UDPFrameEncoder in server/libs/outputs/udp_frame_protocol.py
+#define FLAG_KEYFRAME 0x01
+#define FLAG_DELTA 0x02
+#define FLAG_RUN_LENGTH 0x04
+#define KNOWN_FLAGS (FLAG_KEYFRAME | FLAG_DELTA | FLAG_RUN_LENGTH)
+#define KEYFRAME_ID_LEN 4
 // Toggles FPS output (1 = print FPS over serial, 0 = disable output)
 #define PRINT_FPS 1
 
@@ -17,7 +31,25 @@ const uint8_t PixelPin = 3;  // make sure to set this to the correct pin, ignore
 const char* ssid     = "xxx";
 const char* password = "xxx";
 unsigned int localPort = 7777;
-char packetBuffer[BUFFER_LEN];
+uint8_t packetBuffer[BUFFER_LEN];
+
+// The frame, which is collected from the chunks. A compressed frame starts with the keyframe id.
+uint8_t frameBuffer[KEYFRAME_ID_LEN + NUM_LEDS * CHANNELS];
+uint32_t frameLength = 0;
+uint32_t frameSequence = 0;
+uint8_t frameFlags = 0;
+bool frameStarted = false;
+bool frameComplete = false;
+uint8_t frameChunkCount = 0;
+uint16_t receivedChunkCount = 0;
+uint8_t receivedChunks[32];
+
+// The last keyframe of the compressed frames and the decoded delta frame.
+uint8_t keyframeBuffer[NUM_LEDS * CHANNELS];
+uint32_t keyframeLength = 0;
+uint32_t keyframeId = 0;
+bool keyframeValid = false;
+uint8_t deltaBuffer[NUM_LEDS * CHANNELS];
 
 // LED strip
 NeoPixelBus<NeoGrbFeature, Neo800KbpsMethod> ledstrip(NUM_LEDS, PixelPin);
@@ -134,13 +166,15 @@ void loop() {
     // If packets have been received, interpret the command
     if (packetSize) {
         int len = port.read(packetBuffer, BUFFER_LEN);
-        int n = 0;
-        for(int i = 0; i < len; i+=3) {
-            RgbColor pixel((uint8_t)packetBuffer[i], (uint8_t)packetBuffer[i+1], (uint8_t)packetBuffer[i+2]);
-            ledstrip.SetPixelColor(n, pixel);
-            n++;
+        if (isChunk(packetBuffer, len)) {
+            // Chunked protocol: Show the frame, once all of its chunks arrived.
+            if (receiveChunk(packetBuffer, len)) {
+                showChunkedFrame();
+            }
+        } else {
+            // Raw protocol: The packet contains the whole frame.
+            showFrame(packetBuffer, len);
         }
-        ledstrip.Show();
         #if PRINT_FPS
             fpsCounter++;
             Serial.print("/");//Monitors connection(shows jumps/jitters in packets)
@@ -155,6 +189,142 @@ void loop() {
     #endif
 }
 
+// A raw frame can start with "ML" too, so the whole header is checked, see UDPFramePacker.is_chunk().
+bool isChunk(uint8_t* packet, int len) {
+    if (len < HEADER_LEN || packet[0] != 'M' || packet[1] != 'L' || packet[2] != PROTOCOL_VERSION || (packet[3] & ~KNOWN_FLAGS)) {
+        return false;
+    }
+
+    uint32_t offset = ((uint32_t)packet[8] << 24) | ((uint32_t)packet[9] << 16) | ((uint32_t)packet[10] << 8) | packet[11];
+    uint16_t length = ((uint16_t)packet[12] << 8) | packet[13];
+    uint8_t chunkIndex = packet[14];
+    uint8_t chunkCount = packet[15];
+    if (HEADER_LEN + length != len || chunkIndex >= chunkCount) {
+        return false;
+    }
+
+    // All chunks except the last one have the same length. The last one can be shorter.
+    if (chunkIndex < chunkCount - 1) {
+        return length > 0 && offset == (uint32_t)chunkIndex * length;
+    }
+    return offset >= (uint32_t)chunkIndex * length && offset <= (uint32_t)chunkIndex * MAX_PAYLOAD_LEN;
+}
+
+bool receiveChunk(uint8_t* packet, int len) {
+    uint32_t sequence = ((uint32_t)packet[4] << 24) | ((uint32_t)packet[5] << 16) | ((uint32_t)packet[6] << 8) | packet[7];
+    uint32_t offset = ((uint32_t)packet[8] << 24) | ((uint32_t)packet[9] << 16) | ((uint32_t)packet[10] << 8) | packet[11];
+    uint16_t length = ((uint16_t)packet[12] << 8) | packet[13];
+    uint8_t chunkIndex = packet[14];
+    uint8_t chunkCount = packet[15];
+
+    if (!frameStarted || sequence != frameSequence) {
+        // Ignore the chunks of older frames. The sequence wraps around, so compare the difference.
+        if (frameStarted && frameSequence - sequence <= MAX_LATE_FRAMES) {
+            return false;
+        }
+        // A newer frame drops the incomplete one.
+        frameStarted = true;
+        frameComplete = false;
+        frameSequence = sequence;
+        frameFlags = packet[3];
+        frameChunkCount = chunkCount;
+        frameLength = 0;
+        receivedChunkCount = 0;
+        memset(receivedChunks, 0, sizeof(receivedChunks));
+    } else if (frameComplete || (receivedChunks[chunkIndex / 8] & (1 << (chunkIndex % 8)))) {
+        return false;
+    }
+
+    // LEDs beyond NUM_LEDS are ignored.
+    if (offset < sizeof(frameBuffer)) {
+        uint32_t copyLength = min((uint32_t)length, (uint32_t)sizeof(frameBuffer) - offset);
+        memcpy(frameBuffer + offset, packet + HEADER_LEN, copyLength);
+        frameLength = max(frameLength, offset + copyLength);
+    }
+    receivedChunks[chunkIndex / 8] |= 1 << (chunkIndex % 8);
+    receivedChunkCount++;
+
+    if (receivedChunkCount < frameChunkCount) {
+        return false;
+    }
+    frameComplete = true;
+    return true;
+}
+
+void showChunkedFrame() {
+    if (!(frameFlags & (FLAG_KEYFRAME | FLAG_DELTA))) {
+        showFrame(frameBuffer, frameLength);
+        return;
+    }
+    if (frameLength < KEYFRAME_ID_LEN) {
+        return;
+    }
+
+    uint32_t id = ((uint32_t)frameBuffer[0] << 24) | ((uint32_t)frameBuffer[1] << 16) | ((uint32_t)frameBuffer[2] << 8) | frameBuffer[3];
+    if (frameFlags & FLAG_KEYFRAME) {
+        keyframeLength = decodeLeds(frameBuffer + KEYFRAME_ID_LEN, frameLength - KEYFRAME_ID_LEN, keyframeBuffer);
+        keyframeId = id;
+        keyframeValid = true;
+        showFrame(keyframeBuffer, keyframeLength);
+        return;
+    }
+
+    // A delta frame contains the XOR with its keyframe. Wait for the next keyframe, if it was lost.
+    if (!keyframeValid || id != keyframeId) {
+        return;
+    }
+    uint32_t deltaLength = decodeLeds(frameBuffer + KEYFRAME_ID_LEN, frameLength - KEYFRAME_ID_LEN, deltaBuffer);
+    deltaLength = min(deltaLength, keyframeLength);
+    for (uint32_t i = 0; i < deltaLength; i++) {
+        deltaBuffer[i] ^= keyframeBuffer[i];
+    }
+    showFrame(deltaBuffer, deltaLength);
+}
+
+// Decode the LEDs of a compressed frame into output. Returns the length of the LEDs in bytes.
+uint32_t decodeLeds(uint8_t* data, uint32_t len, uint8_t* output) {
+    uint32_t outputLen = NUM_LEDS * CHANNELS;
+    if (!(frameFlags & FLAG_RUN_LENGTH)) {
+        len = min(len, outputLen);
+        memcpy(output, data, len);
+        return len;
+    }
+
+    // Every run starts with a control byte: 0 - 127 are control + 1 different LEDs,
+    // 128 - 255 is one LED, which is repeated control - 125 times.
+    uint32_t i = 0;
+    uint32_t o = 0;
+    while (i < len && o < outputLen) {
+        uint8_t control = data[i++];
+        if (control < 128) {
+            uint32_t copyLength = min((uint32_t)(control + 1) * CHANNELS, min(len - i, outputLen - o));
+            memcpy(output + o, data + i, copyLength);
+            i += (control + 1) * CHANNELS;
+            o += copyLength;
+        } else {
+            if (i + CHANNELS > len) {
+                break;
+            }
+            for (int repeat = control - 125; repeat > 0 && o + CHANNELS <= outputLen; repeat--) {
+                memcpy(output + o, data + i, CHANNELS);
+                o += CHANNELS;
+            }
+            i += CHANNELS;
+        }
+    }
+    return o;
+}
+
+void showFrame(uint8_t* data, int len) {
+    int n = 0;
+    for(int i = 0; i + CHANNELS <= len && n < NUM_LEDS; i+=CHANNELS) {
+        RgbColor pixel(data[i], data[i + 1], data[i + 2]);
+        ledstrip.SetPixelColor(n, pixel);
+        n++;
+    }
+    ledstrip.Show();
+}
+
 void welcomeLight(){
   Serial.println("Enter welcomeLigth()");
   uint8_t r = 0;
@@ -0,0 +1,92 @@
+# Benchmark File
+# ----------------
+#
+# Headless benchmarks for the performance critical parts of MLSC.
+# They do not need audio hardware or a LED strip.
+#
+# Usage: python3 bench.py [--benchmark dsp] [--benchmark effects] [--benchmark exp_filter] [--benchmark udp_encoding]
+#                         [--frames 1000]
+#                         [--audio-file recording.wav] [--output results.json]
+
+from sys import version_info
+import sys
+
+if version_info < (3, 6):
+    sys.exit("\033[91mError: MLSC requires Python 3.6 or greater.")
+
+from libs.benchmarks.benchmark_dsp import BenchmarkDSP  # pylint: disable=E0611, E0401
+from libs.benchmarks.benchmark_effects import BenchmarkEffects  # pylint: disable=E0611, E0401
+from libs.benchmarks.benchmark_exp_filter import BenchmarkExpFilter  # pylint: disable=E0611, E0401
+from libs.benchmarks.benchmark_udp_encoding import BenchmarkUDPEncoding  # pylint: disable=E0611, E0401
+
+import numpy as np
+import argparse
+import platform
+import json
+
+
+class Bench():
+    """
+    Runs the selected benchmarks and prints the results.
+    """
+    def __init__(self):
+        self._available_benchmarks = {
+            "dsp": BenchmarkDSP,
+            "effects": BenchmarkEffects,
+            "exp_filter": BenchmarkExpFilter,
+            "udp_encoding": BenchmarkUDPEncoding
+        }
+
+    def start(self, args):
+        benchmark_names = args.benchmark or list(self._available_benchmarks.keys())
+
+        results = []
+        for benchmark_name in benchmark_names:
+            benchmark = self._available_benchmarks[benchmark_name](frames=args.frames, audio_file=args.audio_file)
+            benchmark_results = benchmark.run()
+            for result in benchmark_results:
+                result["benchmark"] = benchmark_name
+                self.print_result(result)
+            results.extend(benchmark_results)
+
+        if args.output is not None:
+            output = {
+                "environment": self.get_environment(args),
+                "results": results
+            }
+            with open(args.output, "w") as write_file:
+                json.dump(output, write_file, indent=4, sort_keys=True)
+
+    def get_environment(self, args):
+        """
+        Describe the machine and the settings of the run, so saved results can be compared later.
+        """
+        return {
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "frames": args.frames,
+            "audio_file": args.audio_file
+        }
+
+    def print_result(self, result):
+        parameters = ", ".join(
+            f"{key}={value}" for key, value in sorted(result.items())
+            if key not in ("benchmark", "name", "frames", "frames_per_second", "us_per_frame", "allocated_bytes_per_frame"))
+        print(
+            f'{result["benchmark"]:<12} {result["name"]:<26} {parameters:<40} '
+            f'{result["frames_per_second"]:>12.1f} frames/s {result["us_per_frame"]:>10.1f} us/frame '
+            f'{result["allocated_bytes_per_frame"]:>10.0f} B/frame')
+
+
+if __name__ == "__main__":
+    bench = Bench()
+
+    parser = argparse.ArgumentParser(description="Headless MLSC benchmarks.")
+    parser.add_argument("--benchmark", action="append", choices=sorted(bench._available_benchmarks.keys()),
+                        help="Benchmark to run. Can be used multiple times. Runs all benchmarks if not set.")
+    parser.add_argument("--frames", type=int, default=1000, help="Measured frames per benchmark case.")
+    parser.add_argument("--audio-file", help="16 bit WAV recording for the audio input. A synthetic signal is used if not set.")
+    parser.add_argument("--output", help="Write the results as JSON into this file.")
+    bench.start(parser.parse_args())
@@ -45,7 +45,17 @@ $(document).ready(function () {
     $('#MIN_VOLUME_THRESHOLD_TOOLTIP').attr('data-original-title', 'The minimum volume level of your microphone that has to be reached before the program will recognize the audio signal.<br>It filters background noises and reduces the rate of false triggers.<br><br>Default setting: 0.001');
     $('#N_ROLLING_HISTORY_TOOLTIP').attr('data-original-title', 'The amount of audio snapshots that will be stored for the calculation of the rhythm.<br><br>Default setting: 4');
     $('#FRAMES_PER_BUFFER_TOOLTIP').attr('data-original-title', 'The buffer size of the audio signal.<br>More buffer frames cause lower frame rates, but higher effect quality.<br>Less buffer frames cause high frame rates, but lower effect quality.<br><br>Default setting: 512');
+    $('#AUDIO_REPLAY_SPEED_TOOLTIP').attr('data-original-title', 'The speed of a replayed audio source, e.g. for load tests without a microphone.<br>Select the source with the device ID in the config: "file:[wav file]", "raw:[16 bit PCM file or pipe]" or "stdin".<br>1.0 is real time, 0 replays as fast as possible.<br><br>Default setting: 1.0');
     $('#N_FFT_BINS_TOOLTIP').attr('data-original-title', 'The amount of slices that the audio spectrum will be divided into.<br><br>Default setting: 24');
+    $('#ENGINE_MODE_TOOLTIP').attr('data-original-title', 'How the effects and outputs of the devices are run.<br>Per Device: Two processes for every device.<br>Consolidated: One render process for all devices. Uses less memory on a Raspberry Pi with many devices.<br><br>Default setting: Per Device');
+    $('#RENDER_WORKERS_TOOLTIP').attr('data-original-title', 'The amount of worker threads that render the devices in the consolidated engine mode.<br><br>Default setting: 1');
+    $('#EFFECT_CACHE_SIZE_TOOLTIP').attr('data-original-title', 'The amount of recently used effects that are kept in memory per device.<br>Switching to a cached effect is faster, but every cached effect uses memory.<br><br>Default setting: 4');
+    $('#CONFIG_WRITE_DELAY_TOOLTIP').attr('data-original-title', 'The time in seconds the server waits for more changes before it writes the config file.<br>Fast changes, like moving a slider, are written only once. This reduces the wear of the SD card.<br>Set it to 0 to write every change immediately.<br><br>Default setting: 1.0');
+    $('#RENDER_CLOCK_TOOLTIP').attr('data-original-title', 'When the effects are rendered.<br>FPS Timer: With the FPS of the device.<br>Audio Frames: Exactly once per processed audio frame. Every audio frame is shown and the delay between the audio and the LEDs stays constant.<br><br>Default setting: FPS Timer');
+    $('#RENDER_INTERPOLATION_TOOLTIP').attr('data-original-title', 'The output blends between the frames of the effect and shows them with the FPS of the device.<br>Useful with the Audio Frames clock and a higher FPS than the audio frame rate. Adds the delay of one effect frame.<br>Only used in the Per Device engine mode.<br><br>Default setting: Disabled');
+    $('#OUTPUT_PHASE_LOCK_TOOLTIP').attr('data-original-title', 'The output shows every frame as soon as the effect rendered it, instead of waiting for its own frame deadline.<br>This removes up to one frame of latency between the effect and the LED strip.<br><br>Default setting: Disabled');
+    $('#OUTPUT_KEEP_ALIVE_INTERVAL_TOOLTIP').attr('data-original-title', 'Frames, which did not change, are not sent to the LED strip again.<br>They are only repeated after this time in seconds, e.g. for clients that turn off the LEDs without packets.<br>Set it to 0 to send every frame.<br><br>Default setting: 1.0');
+    $('#MEASURE_WAKEUPS_TOOLTIP').attr('data-original-title', 'Measurement mode. Every process logs how often its main loop woke up per second.<br>An idle system should only wake up a few times per second.<br><br>Default setting: Disabled');
     $('#LOG_LEVEL_CONSOLE_TOOLTIP').attr('data-original-title', 'The logging verbosity level in the console.<br><br>Default setting: info');
     $('#LOG_LEVEL_FILE_TOOLTIP').attr('data-original-title', 'The logging verbosity level in a log file.<br>Enable or disable file logging using the checkbox below.<br><br>Use this only for debugging.<br>File logging for extensive periods of time could cause SD card wear-out.<br><br>Default setting: info');
 
@@ -62,4 +72,5 @@ $(document).ready(function () {
     $('#LED_Invert_TOOLTIP').attr('data-original-title', 'The parameter for inverting the LED signal. It can be useful if you want to use an inverted logic level shifter.<br><br>Default value: Off');
     $('#UDP_Client_IP_TOOLTIP').attr('data-original-title', 'The IP address of the client.');
     $('#UDP_Client_Port_TOOLTIP').attr('data-original-title', 'The port used for the communication between the server and client.<br><br>Default setting: 7777');
+    $('#UDP_Protocol_TOOLTIP').attr('data-original-title', 'The format of the UDP packets.<br>Raw: Every frame is sent as one packet. Supported by all clients, but limited to about 340 RGB LEDs by the ESP client.<br>Chunked: Every frame is split into packets of up to 1472 bytes with a header. The client shows a frame only once all of its packets arrived. Requires the current ESP client.<br>Compressed: Like chunked, but only the changes since the last full frame are sent, and runs of the same color are packed. Sends less data over busy Wi-Fi networks. A full frame is sent at least every second. Requires the current ESP client.<br><br>Default setting: Raw');
 });
@@ -0,0 +1,45 @@
+from time import perf_counter
+import logging
+
+
+class AudioClock():
+    """
+    Render clock for general_settings.render_clock = "audio".
+
+    The effects render exactly once per published audio frame instead of on their own fps timer,
+    so every audio frame is shown and the audio-to-light latency does not depend on how the two rates line up.
+    Without audio frames, for example while the audio process is paused, the frame scheduler takes over until the audio returns.
+    """
+
+    # Fall back to the frame scheduler, if no audio frame arrived within this number of frames.
+    AUDIO_TIMEOUT_FRAMES = 3
+
+    def __init__(self, audio_ring_buffer):
+        self.logger = logging.getLogger(__name__)
+
+        self._audio_ring_buffer = audio_ring_buffer
+        self._last_sequence = self._audio_ring_buffer.sequence
+        self._timed_out = False
+
+    def wait(self, frame_scheduler):
+        """
+        Sleep until the next audio frame is published.
+        The frame scheduler is advanced too, so its statistics stay valid.
+        """
+        if self._timed_out:
+            frame_scheduler.wait()
+
+            sequence = self._audio_ring_buffer.sequence
+            if sequence != self._last_sequence:
+                self._last_sequence = sequence
+                self._timed_out = False
+                self.logger.debug("Audio frames are back. Render once per audio frame.")
+            return
+
+        timeout = self.AUDIO_TIMEOUT_FRAMES / frame_scheduler.fps
+        if self._audio_ring_buffer.wait_for_frame(self._last_sequence, timeout):
+            self._last_sequence = self._audio_ring_buffer.sequence
+            frame_scheduler.advance(perf_counter())
+        else:
+            self._timed_out = True
+            self.logger.debug("No audio frames. Render with the fps timer.")
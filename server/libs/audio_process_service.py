@@ -1,27 +1,41 @@
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
 from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
 from libs.audio_info import AudioInfo  # pylint: disable=E0611, E0401
+from libs.audio_replay import AudioReplay  # pylint: disable=E0611, E0401
 from libs.dsp import DSP  # pylint: disable=E0611, E0401
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
+from libs.wakeup_counter import WakeupCounter  # pylint: disable=E0611, E0401
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
 from libs.queue_wrapper import QueueWrapper
 
 from multiprocessing import Queue
 from queue import Empty
-from time import time
+from time import time, perf_counter
 import numpy as np
 import pyaudio
 import logging
 
 
 class AudioProcessService:
-    def start(self, config_lock, notification_queue_in, notification_queue_out, audio_queue, py_audio):
+    # The audio stream and the DSP are only created again, if one of these settings changed.
+    AUDIO_SETTING_KEYS = ("device_id", "default_sample_rate", "frames_per_buffer", "n_fft_bins",
+                          "n_rolling_history", "min_frequency", "max_frequency", "audio_replay_speed")
+    # A blocking stream waits this long (seconds) for the routine, before it tries again.
+    BLOCKING_PUT_TIMEOUT = 0.1
+
+    def start(self, config_lock, notification_queue_in, notification_queue_out, audio_ring_buffer, py_audio, stats_queue=None):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
         self._notification_queue_in = QueueWrapper(notification_queue_in)
         self._notification_queue_out = QueueWrapper(notification_queue_out)
-        self._audio_queue = QueueWrapper(audio_queue)
+        self._audio_ring_buffer = audio_ring_buffer
+        self._stats_queue = QueueWrapper(stats_queue, count_drops=False) if stats_queue is not None else None
+        self._metrics = MetricsRegistry.instance()
+        self._metrics.process_name = "audio_process_service"
+        self._last_frame_start = None
 
         self.audio_buffer_queue = QueueWrapper(Queue(2))
         self._py_audio = py_audio
@@ -32,19 +46,57 @@ class AudioProcessService:
         while True:
             try:
                 self.audio_service_routine()
-                self._fps_limiter.fps_limiter()
+                # A replayed stream sets the pace itself, it can be faster than the scheduler.
+                if self._skip_routine or not isinstance(self.stream, AudioReplay):
+                    self._frame_scheduler.wait()
+                self._wakeup_counter.count()
+                self._metrics.report(self._stats_queue)
             except KeyboardInterrupt:
                 break
 
-    def init_audio_service(self, show_output=False):
+    def init_audio_service(self, show_output=False, load_config=True):
         try:
             # Initial config load.
-            ConfigService.instance(self._config_lock).load_config()
+            if load_config:
+                ConfigService.instance(self._config_lock).load_config()
             self._config = ConfigService.instance(self._config_lock).config
 
-            # Init FPS Limiter.
-            self._fps_limiter = FPSLimiter(120)
+            # Limit the routine to 120 cycles per second.
+            self._frame_scheduler = FrameScheduler(120)
+            self._wakeup_counter = WakeupCounter("Audio Process Service", self._config["general_settings"]["measure_wakeups"])
             self._skip_routine = False
+
+            self._device_rate = self._config["general_settings"]["default_sample_rate"]
+            self._frames_per_buffer = self._config["general_settings"]["frames_per_buffer"]
+            self.n_fft_bins = self._config["general_settings"]["n_fft_bins"]
+
+            # Init Timer
+            self.start_time_1 = time()
+            self.ten_seconds_counter_1 = time()
+            self.start_time_2 = time()
+            self.ten_seconds_counter_2 = time()
+
+            self._dsp = DSP(self._config)
+            # Detect the beats once for all effects, so every device shows the same beats.
+            self._beat_detector = BeatDetector(self.n_fft_bins)
+
+            self.audio = np.empty((self._frames_per_buffer), dtype="int16")
+
+            # Reinit buffer queue
+            self.audio_buffer_queue = QueueWrapper(Queue(2))
+
+            # Replay recorded audio instead of a microphone.
+            mic_id = self._config["general_settings"]["device_id"]
+            if AudioReplay.is_replay_source(mic_id):
+                self.stream = AudioReplay(
+                    mic_id,
+                    self._device_rate,
+                    self._frames_per_buffer,
+                    self._config["general_settings"]["audio_replay_speed"],
+                    self.put_audio_buffer
+                )
+                return
+
             self._devices = AudioInfo.get_audio_devices(self._py_audio)
 
             self.log_output(show_output, logging.INFO,
@@ -53,7 +105,6 @@ class AudioProcessService:
             # Select the audio device you want to use.
             selected_device_list_index = 0
             try:
-                mic_id = self._config["general_settings"]["device_id"]
                 if mic_id != "no_mic":
                     selected_device_list_index = int(mic_id)
             except Exception as e:
@@ -85,42 +136,12 @@ class AudioProcessService:
                                 "Please change the id of the mic inside the config.")
                 self.selected_device = self._devices[0]
 
-            self._device_rate = self._config["general_settings"]["default_sample_rate"]
-            self._frames_per_buffer = self._config["general_settings"]["frames_per_buffer"]
-            self.n_fft_bins = self._config["general_settings"]["n_fft_bins"]
             self.log_output(show_output, logging.INFO,
                             f"Selected Device: {self.selected_device.to_string()}")
 
-            # Init Timer
-            self.start_time_1 = time()
-            self.ten_seconds_counter_1 = time()
-            self.start_time_2 = time()
-            self.ten_seconds_counter_2 = time()
-
-            self._dsp = DSP(self._config)
-
-            self.audio = np.empty((self._frames_per_buffer), dtype="int16")
-
-            # Reinit buffer queue
-            self.audio_buffer_queue = QueueWrapper(Queue(2))
-
             # callback function to stream audio, another thread.
             def callback(in_data, frame_count, time_info, status):
-                if self._skip_routine:
-                    return (self.audio, pyaudio.paContinue)
-
-                self.audio_buffer_queue.put_none_blocking(in_data)
-
-                self.end_time_1 = time()
-
-                if time() - self.ten_seconds_counter_1 > 10:
-                    self.ten_seconds_counter_1 = time()
-                    time_dif = self.end_time_1 - self.start_time_1
-                    fps = 1 / time_dif
-                    self.logger.info(f"Callback | FPS: {fps:.2f}")
-
-                self.start_time_1 = time()
-
+                self.put_audio_buffer(in_data)
                 return (self.audio, pyaudio.paContinue)
 
             self.log_output(show_output, logging.DEBUG,
@@ -139,6 +160,40 @@ class AudioProcessService:
             self.logger.exception(
                 f"Unexpected error in init_audio_service: {e}")
 
+    def put_audio_buffer(self, in_data, blocking=False):
+        """
+        Pass a buffer of the audio stream to the routine. Called from the thread of the stream.
+        Blocking waits for the routine instead of dropping the buffer, if the queue is full.
+        A blocking stream also waits while the routine is paused. It waits at most BLOCKING_PUT_TIMEOUT,
+        then False is returned and the stream has to pass the buffer again, so it can stop in the meantime.
+        """
+        if self._skip_routine and not blocking:
+            return True
+
+        # The buffer is complete, when the callback is called. Use this time as the capture time of the frame.
+        if blocking:
+            if not self.audio_buffer_queue.put_blocking_with_timeout((in_data, perf_counter()), self.BLOCKING_PUT_TIMEOUT):
+                return False
+        else:
+            self.audio_buffer_queue.put_none_blocking((in_data, perf_counter()))
+
+        self.end_time_1 = time()
+
+        if time() - self.ten_seconds_counter_1 > 10:
+            self.ten_seconds_counter_1 = time()
+            time_dif = self.end_time_1 - self.start_time_1
+            fps = 1 / time_dif
+            self.logger.info(f"Callback | FPS: {fps:.2f}")
+
+        self.start_time_1 = time()
+        return True
+
+    def get_audio_settings(self):
+        """
+        Return the settings, which are used to open the audio stream and to build the DSP.
+        """
+        return {key: self._config["general_settings"][key] for key in self.AUDIO_SETTING_KEYS}
+
     def log_output(self, show_output, log_level, message):
         if show_output:
             if log_level == logging.INFO:
@@ -158,12 +213,23 @@ class AudioProcessService:
                 current_notification_item = self._notification_queue_in.get_blocking()
 
                 if current_notification_item.notification_enum is NotificationEnum.config_refresh:
-                    if self.stream is not None:
-                        self.stream.stop_stream()
-                        self.stream.close()
-                    self.init_audio_service()
+                    # Only restart the audio stream, if the audio settings changed.
+                    audio_settings_before_reload = self.get_audio_settings()
+                    if current_notification_item.payload is not None:
+                        ConfigService.instance(self._config_lock).config = current_notification_item.payload
+                    else:
+                        ConfigService.instance(self._config_lock).load_config()
+                    self._config = ConfigService.instance(self._config_lock).config
+
+                    self._wakeup_counter.enabled = self._config["general_settings"]["measure_wakeups"]
+                    if self.get_audio_settings() != audio_settings_before_reload:
+                        if self.stream is not None:
+                            self.stream.stop_stream()
+                            self.stream.close()
+                        self.init_audio_service(load_config=False)
                     self._notification_queue_out.put_blocking(NotificationItem(
-                        NotificationEnum.config_refresh_finished, current_notification_item.device_id))
+                        NotificationEnum.config_refresh_finished, current_notification_item.device_id,
+                        refresh_id=current_notification_item.refresh_id))
                 elif current_notification_item.notification_enum is NotificationEnum.process_continue:
                     self._skip_routine = False
                 elif current_notification_item.notification_enum is NotificationEnum.process_pause:
@@ -172,11 +238,16 @@ class AudioProcessService:
             if self._skip_routine:
                 return
 
-            in_data = None
-            in_data = self.audio_buffer_queue.get_blocking_with_timeout()
-            if in_data is None:
+            audio_buffer = self.audio_buffer_queue.get_blocking_with_timeout()
+            if audio_buffer is None:
                 self.logger.debug("Audio in timeout. Queue is Empty")
                 return
+            in_data, capture_time = audio_buffer
+
+            frame_start = perf_counter()
+            if self._last_frame_start is not None:
+                self._metrics.observe("audio_frame_interval_seconds", frame_start - self._last_frame_start)
+            self._last_frame_start = frame_start
 
             # Convert the raw string audio stream to an array.
             y = np.fromstring(in_data, dtype=np.int16)
@@ -191,7 +262,13 @@ class AudioProcessService:
                 # Fill the array with zeros, to fade out the effect.
                 audio_datas["mel"] = np.zeros(self.n_fft_bins)
 
-            self._audio_queue.put_none_blocking(audio_datas)
+            self._beat_detector.update(audio_datas["mel"])
+            freq_detects = self._beat_detector.detect()
+
+            self._audio_ring_buffer.write(audio_datas["mel"], audio_datas["vol"], capture_time,
+                                          freq_detects, self._beat_detector.current_freq_strengths)
+            self._metrics.observe("audio_dsp_seconds", perf_counter() - frame_start)
+            self._metrics.increment("audio_frames_total")
 
             self.end_time_2 = time()
 
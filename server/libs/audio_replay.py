@@ -0,0 +1,142 @@
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+
+from threading import Thread
+import numpy as np
+import logging
+import wave
+import os
+
+# The processes close their stdin when they start, so keep a copy of it for the "stdin" source.
+try:
+    STDIN_FD = os.dup(0)
+except OSError:
+    STDIN_FD = None
+
+
+class AudioReplay():
+    """
+    Replays recorded audio instead of a microphone, e.g. for load tests or benchmarks without a sound card.
+
+    Select it with general_settings.device_id:
+        "file:<path>"   16 bit WAV file. Other sample rates are resampled, multiple channels are mixed down.
+        "raw:<path>"    Raw 16 bit mono PCM with the default sample rate, e.g. a named pipe.
+        "stdin"         Raw 16 bit mono PCM from the standard input of MLSC.
+    Files are looped, so they can run forever.
+
+    general_settings.audio_replay_speed sets the pace: 1.0 is real time, 2.0 twice as fast.
+    0 replays as fast as the DSP can process the buffers, without dropping any of them.
+    The buffers are passed to buffer_callback(in_data, blocking) from a background thread, like the PyAudio callback.
+    A blocking callback returns False, if it could not queue the buffer in time. Then it is passed again,
+    until it is queued or the replay is stopped.
+    """
+
+    FILE_PREFIX = "file:"
+    RAW_PREFIX = "raw:"
+    STDIN_SOURCE = "stdin"
+
+    def __init__(self, source, sample_rate, frames_per_buffer, speed, buffer_callback):
+        self.logger = logging.getLogger(__name__)
+
+        self._source = source
+        self._sample_rate = sample_rate
+        self._frames_per_buffer = frames_per_buffer
+        self._buffer_callback = buffer_callback
+
+        self._frame_scheduler = None
+        if speed > 0:
+            self._frame_scheduler = FrameScheduler(sample_rate / frames_per_buffer * speed)
+
+        self._samples = None
+        self._sample_position = 0
+        self._raw_file = None
+        self.open_source()
+
+        self._stopped = False
+        self._thread = Thread(target=self.replay, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def is_replay_source(device_id):
+        device_id = str(device_id)
+        return device_id.startswith(AudioReplay.FILE_PREFIX) or device_id.startswith(AudioReplay.RAW_PREFIX) \
+            or device_id == AudioReplay.STDIN_SOURCE
+
+    def open_source(self):
+        if self._source.startswith(self.FILE_PREFIX):
+            self._samples = self.read_wav(self._source[len(self.FILE_PREFIX):])
+        elif self._source.startswith(self.RAW_PREFIX):
+            self._raw_file = open(self._source[len(self.RAW_PREFIX):], "rb")
+        elif self._source == self.STDIN_SOURCE:
+            if STDIN_FD is None:
+                raise ValueError("There is no standard input to replay.")
+            self._raw_file = os.fdopen(os.dup(STDIN_FD), "rb")
+        else:
+            raise ValueError(f"Unknown audio replay source: {self._source}")
+
+        self.logger.info(f"Replaying audio from: {self._source}")
+
+    def read_wav(self, path):
+        with wave.open(path, "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError(f"Only 16 bit WAV files are supported: {path}")
+            channels = wav_file.getnchannels()
+            file_sample_rate = wav_file.getframerate()
+            samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+        samples = samples.reshape(-1, channels).mean(axis=1)
+        if file_sample_rate != self._sample_rate:
+            self.logger.info(f"Resampling {path} from {file_sample_rate} Hz to {self._sample_rate} Hz.")
+            duration = len(samples) / file_sample_rate
+            times = np.arange(int(duration * self._sample_rate)) / self._sample_rate
+            samples = np.interp(times, np.arange(len(samples)) / file_sample_rate, samples)
+
+        samples = np.round(samples).astype(np.int16)
+        if len(samples) < self._frames_per_buffer:
+            raise ValueError(f"The WAV file is shorter than one buffer: {path}")
+        return samples
+
+    def read_buffer(self):
+        """
+        Return the next buffer as bytes, like the PyAudio stream. None at the end of the standard input.
+        """
+        if self._samples is not None:
+            indexes = np.arange(self._sample_position, self._sample_position + self._frames_per_buffer) % len(self._samples)
+            self._sample_position = (self._sample_position + self._frames_per_buffer) % len(self._samples)
+            return self._samples[indexes].tobytes()
+
+        buffer_size = self._frames_per_buffer * 2
+        in_data = self._raw_file.read(buffer_size)
+        if len(in_data) < buffer_size and self._raw_file.seekable():
+            # Loop the file. Pipes only return less data at their end, then there is nothing to loop.
+            self._raw_file.seek(0)
+            in_data += self._raw_file.read(buffer_size - len(in_data))
+        if len(in_data) < buffer_size:
+            return None
+        return in_data
+
+    def replay(self):
+        try:
+            while not self._stopped:
+                in_data = self.read_buffer()
+                if in_data is None:
+                    self.logger.info(f"Audio replay finished: {self._source}")
+                    break
+
+                if self._frame_scheduler is not None:
+                    self._frame_scheduler.wait()
+
+                # Without pacing, wait for the DSP instead of dropping buffers.
+                blocking = self._frame_scheduler is None
+                while not self._buffer_callback(in_data, blocking) and not self._stopped:
+                    pass
+        except Exception as e:
+            self.logger.exception(f"Could not replay audio from {self._source}: {e}")
+
+    def stop_stream(self):
+        self._stopped = True
+
+    def close(self):
+        self._stopped = True
+        self._thread.join(1)
+        if self._raw_file is not None:
+            self._raw_file.close()
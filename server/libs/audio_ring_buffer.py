@@ -0,0 +1,226 @@
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
+
+from multiprocessing.sharedctypes import RawArray
+from time import perf_counter, sleep
+import numpy as np
+import logging
+
+
+class AudioRingBuffer():
+    """
+    Shared memory ring buffer for the processed audio frames.
+
+    The AudioProcessService is the only writer. Every DSP frame is written into the next slot
+    and published with a sequence counter. The effect processes only read the latest frame,
+    so they copy one record into their own buffer instead of getting a pickled copy for every device.
+
+    The buffer is lock free. Every slot has its own sequence number, which is set to 0 while the
+    slot is written. A reader copies the slot and only accepts the copy, if the sequence of the slot
+    matched the published one before and after the copy.
+
+    Every record carries the perf_counter times, when the audio was captured and when the frame was published.
+    Readers, which render once per audio frame, can sleep in wait_for_frame() until the next frame is published.
+    It polls the sequence instead of waiting on a shared Condition: a reader, which is terminated while it waits
+    on a Condition, never releases its slot in it, and the next notify_all() of the writer blocks forever.
+
+    The beat and band detections of the AudioProcessService are published with the frame, in the order of
+    BeatDetector.DETECTION_TYPES. For every type the record holds the sequence of the frame, in which it was
+    detected last. A reader, which skipped frames, can compare it with the last frame it has seen and does
+    not miss a detection.
+    """
+
+    # Layout of one record:
+    # [vol, mel_length, timestamp, publish_timestamp, detect_sequence_0..3, strength_0..3, mel_0, mel_1, ..., mel_n]
+    VOL_INDEX = 0
+    MEL_LENGTH_INDEX = 1
+    TIMESTAMP_INDEX = 2
+    PUBLISH_TIMESTAMP_INDEX = 3
+    DETECT_SEQUENCES_INDEX = 4
+    STRENGTHS_INDEX = DETECT_SEQUENCES_INDEX + len(BeatDetector.DETECTION_TYPES)
+    HEADER_LENGTH = STRENGTHS_INDEX + len(BeatDetector.DETECTION_TYPES)
+
+    # wait_for_frame() sleeps until shortly before the next frame is expected, then it polls the sequence.
+    # The poll interval doubles up to the maximum, while the writer is late.
+    EARLY_WAKEUP = 0.8
+    MIN_POLL_INTERVAL = 0.0005
+    MAX_POLL_INTERVAL = 0.008
+
+    def __init__(self, max_mel_bins=1024, slots=8):
+        self.logger = logging.getLogger(__name__)
+
+        self._max_mel_bins = max_mel_bins
+        self._slots = slots
+        self._record_length = self.HEADER_LENGTH + self._max_mel_bins
+
+        # The raw arrays are created before the processes are forked, so every process maps the same memory.
+        self._raw_records = RawArray("d", self._slots * self._record_length)
+        # Index 0 is the published sequence, the other entries are the sequences of the slots.
+        self._raw_sequences = RawArray("q", self._slots + 1)
+
+        self._create_views()
+
+    def __getstate__(self):
+        # Only the raw shared memory can be transferred to a new process. The views are rebuilt afterwards.
+        return {
+            "max_mel_bins": self._max_mel_bins,
+            "slots": self._slots,
+            "raw_records": self._raw_records,
+            "raw_sequences": self._raw_sequences
+        }
+
+    def __setstate__(self, state):
+        self.logger = logging.getLogger(__name__)
+
+        self._max_mel_bins = state["max_mel_bins"]
+        self._slots = state["slots"]
+        self._record_length = self.HEADER_LENGTH + self._max_mel_bins
+        self._raw_records = state["raw_records"]
+        self._raw_sequences = state["raw_sequences"]
+
+        self._create_views()
+
+    def _create_views(self):
+        self._records = np.frombuffer(self._raw_records, dtype=np.float64).reshape(self._slots, self._record_length)
+        sequences = np.frombuffer(self._raw_sequences, dtype=np.int64)
+        self._published_sequence = sequences[0:1]
+        self._slot_sequences = sequences[1:]
+
+        self._oversize_logged = False
+        # The sequences of the last detections. Only used by the writer.
+        self._detect_sequences = np.zeros(len(BeatDetector.DETECTION_TYPES))
+
+    def write(self, mel, vol, timestamp=None, freq_detects=None, freq_strengths=None):
+        """
+        Publish a new audio frame. Only one process is allowed to write.
+        timestamp is the perf_counter time of the capture. The current time is used, if it is not set.
+        freq_detects and freq_strengths are the dicts of the BeatDetector, if the frame was analyzed.
+        """
+        if timestamp is None:
+            timestamp = perf_counter()
+
+        sequence = int(self._published_sequence[0]) + 1
+        slot = sequence % self._slots
+
+        mel_length = len(mel)
+        if mel_length > self._max_mel_bins:
+            if not self._oversize_logged:
+                self.logger.error(f"Mel array with {mel_length} bins does not fit into the audio ring buffer. It will be cut to {self._max_mel_bins} bins.")
+                self._oversize_logged = True
+            mel_length = self._max_mel_bins
+
+        # Mark the slot as invalid while it is written.
+        self._slot_sequences[slot] = 0
+
+        record = self._records[slot]
+        record[self.VOL_INDEX] = vol
+        record[self.MEL_LENGTH_INDEX] = mel_length
+        record[self.TIMESTAMP_INDEX] = timestamp
+        for index, detection_type in enumerate(BeatDetector.DETECTION_TYPES):
+            if freq_detects is not None and freq_detects[detection_type]:
+                self._detect_sequences[index] = sequence
+            record[self.STRENGTHS_INDEX + index] = freq_strengths[detection_type] if freq_strengths is not None else 0
+        record[self.DETECT_SEQUENCES_INDEX:self.STRENGTHS_INDEX] = self._detect_sequences
+        record[self.HEADER_LENGTH:self.HEADER_LENGTH + mel_length] = mel[:mel_length]
+        record[self.PUBLISH_TIMESTAMP_INDEX] = perf_counter()
+
+        self._slot_sequences[slot] = sequence
+        self._published_sequence[0] = sequence
+
+    def create_record_buffer(self):
+        """
+        Create the buffer, into which one reader copies the records. Every reader needs its own buffer.
+        """
+        return np.zeros(self._record_length)
+
+    def read_latest(self, last_sequence=0, record_buffer=None):
+        """
+        Return the latest audio frame, if it is newer than last_sequence.
+        The record is copied into record_buffer from create_record_buffer(). A new buffer is created, if it is not set.
+        Returns
+        -------
+        audio_data: dict
+            Dict containing "mel", "vol", "timestamp", "publish_timestamp", "freq_detect_sequences", "freq_strengths"
+            and "sequence". None if there is no new frame or the writer overwrote the slot while it was copied.
+            "mel", "freq_detect_sequences" and "freq_strengths" are views into record_buffer.
+            They stay valid until the next read into the same buffer, so copy them if you want to keep them.
+        """
+        sequence = int(self._published_sequence[0])
+        if sequence == 0 or sequence == last_sequence:
+            return None
+
+        slot = sequence % self._slots
+        if self._slot_sequences[slot] != sequence:
+            return None
+
+        if record_buffer is None:
+            record_buffer = self.create_record_buffer()
+
+        # The mel length of a slot, which is written right now, can be torn. It is cut, so the copy always fits.
+        shared_record = self._records[slot]
+        copy_length = self.HEADER_LENGTH + min(int(shared_record[self.MEL_LENGTH_INDEX]), self._max_mel_bins)
+        record_buffer[:copy_length] = shared_record[:copy_length]
+
+        # The writer overtook us while copying.
+        if self._slot_sequences[slot] != sequence:
+            return None
+
+        record = record_buffer
+        mel_length = int(record[self.MEL_LENGTH_INDEX])
+        audio_data = {
+            "mel": record[self.HEADER_LENGTH:self.HEADER_LENGTH + mel_length],
+            "vol": float(record[self.VOL_INDEX]),
+            "timestamp": float(record[self.TIMESTAMP_INDEX]),
+            "publish_timestamp": float(record[self.PUBLISH_TIMESTAMP_INDEX]),
+            "freq_detect_sequences": record[self.DETECT_SEQUENCES_INDEX:self.STRENGTHS_INDEX],
+            "freq_strengths": record[self.STRENGTHS_INDEX:self.HEADER_LENGTH],
+            "sequence": sequence
+        }
+
+        return audio_data
+
+    def wait_for_frame(self, last_sequence, timeout=None):
+        """
+        Sleep until a frame newer than last_sequence is published.
+        Returns False, if no frame arrived within the timeout.
+        """
+        deadline = None if timeout is None else perf_counter() + timeout
+        expected_publish_time = self.get_expected_publish_time()
+        poll_interval = self.MIN_POLL_INTERVAL
+
+        while self.get_sequence() == last_sequence:
+            now = perf_counter()
+            if deadline is not None and now >= deadline:
+                return False
+
+            if expected_publish_time is not None and expected_publish_time - now > poll_interval:
+                sleep_time = expected_publish_time - now
+            else:
+                sleep_time = poll_interval
+                poll_interval = min(poll_interval * 2, self.MAX_POLL_INTERVAL)
+            if deadline is not None:
+                sleep_time = min(sleep_time, deadline - now)
+            sleep(sleep_time)
+
+        return True
+
+    def get_expected_publish_time(self):
+        """
+        Estimate the perf_counter time, shortly before the next frame is published, from the last two frames.
+        Returns None, if there are not enough frames yet.
+        """
+        sequence = self.get_sequence()
+        if sequence < 2:
+            return None
+
+        last_publish_time = self._records[sequence % self._slots][self.PUBLISH_TIMESTAMP_INDEX]
+        previous_publish_time = self._records[(sequence - 1) % self._slots][self.PUBLISH_TIMESTAMP_INDEX]
+        frame_interval = last_publish_time - previous_publish_time
+        if frame_interval <= 0:
+            return None
+
+        return last_publish_time + frame_interval * self.EARLY_WAKEUP
+
+    def get_sequence(self):
+        return int(self._published_sequence[0])
+
+    sequence = property(get_sequence)
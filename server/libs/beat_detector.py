@@ -0,0 +1,130 @@
+from time import time
+import numpy as np
+
+
+class BeatDetector():
+    """
+    Detects beats and peaks in the low, mid and high frequencies of the mel spectrum.
+
+    The history of every fft bin is stored in a ring buffer with the shape (n_fft_bins, history).
+    The sums of the bins are updated with every frame, so the averages and the differences
+    are computed with a few array operations instead of a loop over the bins.
+
+    The strength of a type is the highest rise of a loud enough bin above its average, relative to the
+    min percent diff of the type. A detection has a strength of at least 1.0.
+    """
+
+    DETECTION_TYPES = ("beat", "low", "mid", "high")
+
+    # A type is only detected again, if the last detection is older than this (seconds).
+    MIN_DETECTION_INTERVAL = 0.2
+
+    def __init__(self, n_fft_bins, history=40):
+        self._n_fft_bins = n_fft_bins
+        self._history = history
+
+        self._channels = np.zeros((n_fft_bins, history))
+        self._channel_sums = np.zeros(n_fft_bins)
+        self._newest = np.zeros(n_fft_bins)
+        self._position = 0
+        self._length = 0
+
+        # The arrays for the differences are reused in every frame.
+        self._channel_avgs = np.zeros(n_fft_bins)
+        self._differences = np.zeros(n_fft_bins)
+        self._nonzero_avgs = np.zeros(n_fft_bins, dtype=bool)
+        self._strengths = np.zeros(n_fft_bins)
+
+        self.current_freq_detects = {detection_type: False for detection_type in self.DETECTION_TYPES}
+        self.current_freq_strengths = {detection_type: 0.0 for detection_type in self.DETECTION_TYPES}
+        self.prev_freq_detects = {detection_type: 0 for detection_type in self.DETECTION_TYPES}
+        self.detection_ranges = {
+            "beat": (0, int(n_fft_bins * 0.13)),
+            "low": (int(n_fft_bins * 0.13), int(n_fft_bins * 0.4)),
+            "mid": (int(n_fft_bins * 0.4), int(n_fft_bins * 0.7)),
+            "high": (int(n_fft_bins * 0.8), int(n_fft_bins))
+        }
+        self.min_detect_amplitude = {
+            "beat": 0.7,
+            "low": 0.5,
+            "mid": 0.3,
+            "high": 0.3
+        }
+        self.min_percent_diff = {
+            "beat": 70,
+            "low": 100,
+            "mid": 50,
+            "high": 30
+        }
+
+        # The thresholds of every bin. The ranges do not overlap, bins outside of them are never detected.
+        self._min_percent_diffs = np.full(n_fft_bins, np.inf)
+        self._min_detect_amplitudes = np.full(n_fft_bins, np.inf)
+        for detection_type, (start, end) in self.detection_ranges.items():
+            self._min_percent_diffs[start:end] = self.min_percent_diff[detection_type]
+            self._min_detect_amplitudes[start:end] = self.min_detect_amplitude[detection_type]
+        self._detected_bins = np.zeros(n_fft_bins, dtype=bool)
+        self._loud_bins = np.zeros(n_fft_bins, dtype=bool)
+
+    def update(self, y):
+        """
+        Add the mel spectrum of the current frame to the history.
+        """
+        self._newest[:] = y[:self._n_fft_bins]
+
+        self._channel_sums -= self._channels[:, self._position]
+        self._channels[:, self._position] = self._newest
+        self._channel_sums += self._newest
+
+        self._position = (self._position + 1) % self._history
+        self._length = min(self._length + 1, self._history)
+
+        if self._position == 0:
+            # Sum the history again once per cycle, so the rounding errors of the running sums do not add up.
+            np.sum(self._channels, axis=1, out=self._channel_sums)
+
+    def detect(self):
+        """
+        Update and return current_freq_detects.
+        A type is detected, if one bin of its range is loud enough and louder than its average by the min percent diff.
+        Nothing is detected, until the history is full.
+        """
+        if self._length < self._history:
+            for detection_type in self.DETECTION_TYPES:
+                self.current_freq_detects[detection_type] = False
+                self.current_freq_strengths[detection_type] = 0.0
+            return self.current_freq_detects
+
+        # The difference between the newest value and the average in percent, 0 for bins with an average of 0.
+        np.divide(self._channel_sums, self._length, out=self._channel_avgs)
+        np.not_equal(self._channel_avgs, 0, out=self._nonzero_avgs)
+        np.subtract(self._newest, self._channel_avgs, out=self._differences)
+        self._differences *= 100
+        np.floor_divide(self._differences, self._channel_avgs, out=self._differences, where=self._nonzero_avgs)
+        self._differences[~self._nonzero_avgs] = 0
+
+        np.greater_equal(self._differences, self._min_percent_diffs, out=self._detected_bins)
+        np.greater_equal(self._newest, self._min_detect_amplitudes, out=self._loud_bins)
+        self._detected_bins &= self._loud_bins
+
+        np.divide(self._differences, self._min_percent_diffs, out=self._strengths)
+        self._strengths[~self._loud_bins] = 0
+
+        now = time()
+        for detection_type in self.DETECTION_TYPES:
+            start, end = self.detection_ranges[detection_type]
+            detected = self._detected_bins[start:end].any()
+            self.current_freq_strengths[detection_type] = float(self._strengths[start:end].max(initial=0.0))
+
+            if detected and now - self.prev_freq_detects[detection_type] > self.MIN_DETECTION_INTERVAL:
+                self.prev_freq_detects[detection_type] = now
+                self.current_freq_detects[detection_type] = True
+            else:
+                self.current_freq_detects[detection_type] = False
+
+        return self.current_freq_detects
+
+    def get_history_full(self):
+        return self._length == self._history
+
+    history_full = property(get_history_full)
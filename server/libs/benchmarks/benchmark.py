@@ -0,0 +1,93 @@
+from time import perf_counter
+import numpy as np
+import tracemalloc
+import wave
+
+
+class Benchmark:
+    """
+    Base class of the headless benchmarks.
+    A benchmark returns a list of result dicts, so the results can be printed or saved as JSON.
+    """
+    def __init__(self, frames=1000, audio_file=None):
+        self._frames = frames
+        self._audio_file = audio_file
+
+    def run(self):
+        raise NotImplementedError("Please implement this method.")
+
+    def measure(self, name, frame_function, parameters=None):
+        """
+        Run frame_function for the configured amount of frames and measure it.
+        The time is measured without tracemalloc, because tracing slows down every allocation.
+        The allocations are the peak of the memory that was allocated during one frame.
+        """
+        # Warm up, so lazy initializations are not measured.
+        for i in range(min(10, self._frames)):
+            frame_function()
+
+        start_time = perf_counter()
+        for i in range(self._frames):
+            frame_function()
+        duration = perf_counter() - start_time
+
+        allocation_frames = min(100, self._frames)
+        allocated_bytes = 0
+        tracemalloc.start()
+        for i in range(allocation_frames):
+            tracemalloc.clear_traces()
+            frame_function()
+            allocated_bytes += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        result = {
+            "name": name,
+            "frames": self._frames,
+            "frames_per_second": self._frames / duration,
+            "us_per_frame": duration / self._frames * 1e6,
+            "allocated_bytes_per_frame": allocated_bytes / allocation_frames
+        }
+        if parameters is not None:
+            result.update(parameters)
+
+        return result
+
+    def get_audio_buffers(self, sample_rate, frames_per_buffer, buffer_count=64):
+        """
+        Return int16 PCM buffers like the microphone stream delivers them, as float32 array (buffer_count, frames_per_buffer).
+        The buffers are read from the 16 bit WAV file of the benchmark, or synthesized if there is none.
+        """
+        if self._audio_file is not None:
+            samples = self.read_wav(self._audio_file)
+            # Repeat short recordings, so every buffer is filled.
+            repeats = int(np.ceil(buffer_count * frames_per_buffer / len(samples)))
+            samples = np.tile(samples, repeats)
+        else:
+            samples = self.synthesize_audio(sample_rate, buffer_count * frames_per_buffer)
+
+        return samples[:buffer_count * frames_per_buffer].reshape(buffer_count, frames_per_buffer).astype(np.float32)
+
+    def read_wav(self, path):
+        with wave.open(path, "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError(f"Only 16 bit WAV files are supported: {path}")
+            channels = wav_file.getnchannels()
+            samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+        # Mix the channels down to mono.
+        return samples.reshape(-1, channels).mean(axis=1)
+
+    def synthesize_audio(self, sample_rate, sample_count):
+        """
+        Music-like test signal: a kick drum on every beat at 120 bpm, a sweeping tone and some noise.
+        The same seed is used for every run, so the results can be compared.
+        """
+        random_state = np.random.RandomState(0)
+        t = np.arange(sample_count) / sample_rate
+
+        beat_time = t % 0.5
+        kick = np.sin(2 * np.pi * 60 * beat_time) * np.exp(-beat_time * 12)
+        sweep = 0.3 * np.sin(2 * np.pi * (200 + 1800 * (t % 4) / 4) * t)
+        noise = 0.05 * random_state.randn(sample_count)
+
+        return np.clip((kick + sweep + noise) * 2**14, -2**15, 2**15 - 1)
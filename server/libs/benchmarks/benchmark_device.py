@@ -0,0 +1,66 @@
+from libs.color_service_global import ColorServiceGlobal  # pylint: disable=E0611, E0401
+from libs.frame_buffer import FrameBuffer  # pylint: disable=E0611, E0401
+
+import copy
+import json
+import os
+
+
+class BenchmarkDevice():
+    """
+    Device without processes and queues for the benchmarks.
+    It provides the same properties as libs.device.Device, which the effects and outputs use.
+    """
+
+    DEVICE_ID = "benchmark_device"
+    TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config_template.json")
+
+    @staticmethod
+    def load_config_template():
+        """
+        Return the config template with one device, which is a copy of the default device.
+        Its device config is config["device_configs"][BenchmarkDevice.DEVICE_ID].
+        """
+        with open(BenchmarkDevice.TEMPLATE_PATH, "r") as read_file:
+            config = json.load(read_file)
+
+        config["device_configs"] = {BenchmarkDevice.DEVICE_ID: copy.deepcopy(config["default_device"])}
+        return config
+    def __init__(self, config, device_config, audio_ring_buffer, device_id=DEVICE_ID):
+        self.__config = config
+        self.__device_config = device_config
+        self.__audio_ring_buffer = audio_ring_buffer
+        self.__device_id = device_id
+        self.__color_service_global = ColorServiceGlobal(config)
+
+        channels = 4 if "SK6812" in self.__device_config["led_strip"] else 3
+        self.__frame_buffer = FrameBuffer(channels, self.__device_config["led_count"])
+
+    def get_config(self):
+        return self.__config
+
+    def get_device_config(self):
+        return self.__device_config
+
+    def get_audio_ring_buffer(self):
+        return self.__audio_ring_buffer
+
+    def get_frame_buffer(self):
+        return self.__frame_buffer
+
+    def get_color_service_global(self):
+        return self.__color_service_global
+
+    def get_stats_queue(self):
+        return None
+
+    def get_device_id(self):
+        return self.__device_id
+
+    config = property(get_config)
+    device_config = property(get_device_config)
+    audio_ring_buffer = property(get_audio_ring_buffer)
+    frame_buffer = property(get_frame_buffer)
+    color_service_global = property(get_color_service_global)
+    stats_queue = property(get_stats_queue)
+    device_id = property(get_device_id)
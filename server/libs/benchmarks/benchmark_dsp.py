@@ -0,0 +1,116 @@
+from libs.benchmarks.benchmark import Benchmark  # pylint: disable=E0611, E0401
+from libs.dsp import DSP, ExpFilter, Melbank  # pylint: disable=E0611, E0401
+
+from scipy.ndimage.filters import gaussian_filter1d
+import numpy as np
+
+
+class BenchmarkDSP(Benchmark):
+    """
+    Compare the DSP update with the previous implementation, which rebuilt the rolling window,
+    the padded FFT input and a dense (bins x fft) mel product in every frame.
+    One frame processes one audio buffer.
+    """
+    def __init__(self, frames=1000, audio_file=None, sample_rates=(44100, 48000, 96000), frames_per_buffers=(512, 1024),
+                 n_rolling_histories=(4, 8), n_fft_bins=24):
+        # Call the constructor of the base class.
+        super(BenchmarkDSP, self).__init__(frames, audio_file)
+        self._sample_rates = sample_rates
+        self._frames_per_buffers = frames_per_buffers
+        self._n_rolling_histories = n_rolling_histories
+        self._n_fft_bins = n_fft_bins
+
+    def run(self):
+        results = []
+        for sample_rate in self._sample_rates:
+            for frames_per_buffer in self._frames_per_buffers:
+                for n_rolling_history in self._n_rolling_histories:
+                    parameters = {
+                        "sample_rate": sample_rate,
+                        "frames_per_buffer": frames_per_buffer,
+                        "n_rolling_history": n_rolling_history
+                    }
+                    config = self.get_config(sample_rate, frames_per_buffer, n_rolling_history)
+
+                    # The audio buffers are created once, so only the DSP is measured.
+                    audio_buffers = self.get_audio_buffers(sample_rate, frames_per_buffer)
+                    buffer_index = [0]
+
+                    def next_buffer():
+                        buffer_index[0] = (buffer_index[0] + 1) % len(audio_buffers)
+                        return audio_buffers[buffer_index[0]]
+
+                    legacy_dsp = LegacyDSP(config)
+                    dsp = DSP(config)
+
+                    results.append(self.measure("dsp_legacy", lambda: legacy_dsp.update(next_buffer()), parameters))
+                    results.append(self.measure("dsp", lambda: dsp.update(next_buffer()), parameters))
+
+        return results
+
+    def get_config(self, sample_rate, frames_per_buffer, n_rolling_history):
+        return {
+            "general_settings": {
+                "default_sample_rate": sample_rate,
+                "frames_per_buffer": frames_per_buffer,
+                "max_frequency": 16000,
+                "min_frequency": 50,
+                "min_volume_threshold": 0.001,
+                "n_fft_bins": self._n_fft_bins,
+                "n_rolling_history": n_rolling_history
+            }
+        }
+
+
+class LegacyDSP():
+    """
+    The previous DSP update path. It is only kept as the baseline of the benchmark.
+    """
+    def __init__(self, config):
+        self._config = config
+        n_fft_bins = config["general_settings"]["n_fft_bins"]
+        frames_per_buffer = config["general_settings"]["frames_per_buffer"]
+        n_rolling_history = config["general_settings"]["n_rolling_history"]
+
+        self.fft_plot_filter = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.5, alpha_rise=0.99)
+        self.mel_gain = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.01, alpha_rise=0.99)
+        self.mel_smoothing = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.5, alpha_rise=0.99)
+        self.y_roll = np.random.rand(n_rolling_history, int(frames_per_buffer)) / 1e16
+        self.fft_window = np.hamming(int(frames_per_buffer) * n_rolling_history)
+        self.mel_y, _ = Melbank().compute_melmat(
+            num_mel_bands=n_fft_bins,
+            freq_min=config["general_settings"]["min_frequency"],
+            freq_max=config["general_settings"]["max_frequency"],
+            num_fft_bands=int(frames_per_buffer * (n_rolling_history / 2)),
+            sample_rate=config["general_settings"]["default_sample_rate"]
+        )
+
+    def update(self, audio_samples):
+        min_frequency = self._config["general_settings"]["min_frequency"]
+        max_frequency = self._config["general_settings"]["max_frequency"]
+
+        audio_data = {}
+        y = audio_samples / 2.0**15
+        self.y_roll[:-1] = self.y_roll[1:]
+        self.y_roll[-1, :] = np.copy(y)
+        y_data = np.concatenate(self.y_roll, axis=0).astype(np.float32)
+        vol = np.max(np.abs(y_data))
+        N = len(y_data)
+        N_zeros = 2**int(np.ceil(np.log2(N))) - N
+        y_data *= self.fft_window
+        y_padded = np.pad(y_data, (0, N_zeros), mode='constant')
+        YS = np.abs(np.fft.rfft(y_padded)[:N // 2])
+        mel = np.atleast_2d(YS).T * self.mel_y.T
+        mel = np.sum(mel, axis=0)
+        mel = mel**2.0
+        self.mel_gain.update(np.max(gaussian_filter1d(mel, sigma=1.0)))
+        mel /= self.mel_gain.value
+        mel = self.mel_smoothing.update(mel)
+        x = np.linspace(min_frequency, max_frequency, len(mel))
+        y = self.fft_plot_filter.update(mel)
+
+        audio_data["mel"] = mel
+        audio_data["vol"] = vol
+        audio_data["x"] = x
+        audio_data["y"] = y
+        return audio_data
@@ -0,0 +1,85 @@
+from libs.benchmarks.benchmark import Benchmark  # pylint: disable=E0611, E0401
+from libs.benchmarks.benchmark_device import BenchmarkDevice  # pylint: disable=E0611, E0401
+from libs.audio_ring_buffer import AudioRingBuffer  # pylint: disable=E0611, E0401
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.outputs.output_dummy import OutputDummy  # pylint: disable=E0611, E0401
+from libs.dsp import DSP  # pylint: disable=E0611, E0401
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
+
+import copy
+
+
+class BenchmarkEffects(Benchmark):
+    """
+    Run every effect of the EffectService on a device without processes.
+    The audio is processed by the DSP before the measurement, one frame publishes the next audio frame,
+    runs the effect and shows the published frame with the OutputDummy.
+    """
+    def __init__(self, frames=1000, audio_file=None, led_counts=(60, 300, 1000, 3000), n_fft_bins_list=(24, 64),
+                 sample_rate=48000, frames_per_buffer=512):
+        # Call the constructor of the base class.
+        super(BenchmarkEffects, self).__init__(frames, audio_file)
+        self._led_counts = led_counts
+        self._n_fft_bins_list = n_fft_bins_list
+        self._sample_rate = sample_rate
+        self._frames_per_buffer = frames_per_buffer
+
+    def run(self):
+        results = []
+        for n_fft_bins in self._n_fft_bins_list:
+            config = self.get_config(n_fft_bins)
+            audio_frames = self.get_audio_frames(config)
+
+            for led_count in self._led_counts:
+                parameters = {"led_count": led_count, "n_fft_bins": n_fft_bins}
+                for effect_enum, effect_class in EffectService.AVAILABLE_EFFECTS.items():
+                    device = self.get_device(config, led_count)
+                    effect = effect_class(device)
+                    output = OutputDummy(device)
+                    frame_index = [0, 0]
+
+                    def render_frame():
+                        mel, vol, freq_detects, freq_strengths = audio_frames[frame_index[0] % len(audio_frames)]
+                        frame_index[0] += 1
+                        device.audio_ring_buffer.write(mel, vol, None, freq_detects, freq_strengths)
+
+                        effect.start_frame()
+                        effect.run()
+
+                        frame_data = device.frame_buffer.read_latest(frame_index[1])
+                        if frame_data is not None:
+                            frame_index[1] = frame_data["sequence"]
+                            output.show(frame_data["frame"])
+
+                    results.append(self.measure(effect_enum.name, render_frame, parameters))
+
+        return results
+
+    def get_config(self, n_fft_bins):
+        config = BenchmarkDevice.load_config_template()
+        config["general_settings"]["default_sample_rate"] = self._sample_rate
+        config["general_settings"]["frames_per_buffer"] = self._frames_per_buffer
+        config["general_settings"]["n_fft_bins"] = n_fft_bins
+        return config
+
+    def get_device(self, config, led_count):
+        config = copy.deepcopy(config)
+        device_config = config["device_configs"][BenchmarkDevice.DEVICE_ID]
+        device_config["led_count"] = led_count
+        device_config["led_mid"] = led_count // 2
+
+        return BenchmarkDevice(config, device_config, AudioRingBuffer())
+
+    def get_audio_frames(self, config):
+        """
+        Process the PCM buffers with the DSP and the BeatDetector once, so the effects are measured without the audio analysis.
+        """
+        dsp = DSP(config)
+        beat_detector = BeatDetector(config["general_settings"]["n_fft_bins"])
+        audio_frames = []
+        for audio_buffer in self.get_audio_buffers(self._sample_rate, self._frames_per_buffer):
+            audio_data = dsp.update(audio_buffer)
+            beat_detector.update(audio_data["mel"])
+            freq_detects = dict(beat_detector.detect())
+            audio_frames.append((audio_data["mel"].copy(), audio_data["vol"], freq_detects, dict(beat_detector.current_freq_strengths)))
+        return audio_frames
@@ -0,0 +1,57 @@
+from libs.benchmarks.benchmark import Benchmark  # pylint: disable=E0611, E0401
+from libs.dsp import ExpFilter, ExpFilterBank  # pylint: disable=E0611, E0401
+
+import numpy as np
+
+
+class BenchmarkExpFilter(Benchmark):
+    """
+    Compare the single ExpFilters with the ExpFilterBank.
+    One frame updates all smoothing filters of a DSP once.
+    """
+    def __init__(self, frames=1000, audio_file=None, led_counts=(60, 300, 1000, 3000), n_fft_bins=24):
+        # Call the constructor of the base class.
+        super(BenchmarkExpFilter, self).__init__(frames, audio_file)
+        self._led_counts = led_counts
+        self._n_fft_bins = n_fft_bins
+
+    def run(self):
+        results = []
+        for led_count in self._led_counts:
+            parameters = {"led_count": led_count, "n_fft_bins": self._n_fft_bins}
+            filter_specs = self.get_filter_specs(led_count)
+
+            # The input values are created once, so only the filters are measured.
+            inputs = {}
+            for name, (initial_value, alpha_decay, alpha_rise) in filter_specs.items():
+                inputs[name] = np.random.rand(*np.shape(initial_value))
+
+            exp_filters = {}
+            for name, (initial_value, alpha_decay, alpha_rise) in filter_specs.items():
+                exp_filters[name] = ExpFilter(initial_value, alpha_decay=alpha_decay, alpha_rise=alpha_rise)
+
+            filter_bank = ExpFilterBank(filter_specs)
+
+            results.append(self.measure("exp_filter", lambda: self.update_filters(exp_filters, inputs), parameters))
+            results.append(self.measure("exp_filter_bank", lambda: self.update_filters(filter_bank.filters, inputs), parameters))
+
+        return results
+
+    def update_filters(self, exp_filters, inputs):
+        for name, exp_filter in exp_filters.items():
+            exp_filter.update(inputs[name])
+
+    def get_filter_specs(self, led_count):
+        # The same filters as inside the DSP and SmoothingFilters.
+        return {
+            "fft_plot_filter": (np.tile(1e-1, self._n_fft_bins), 0.5, 0.99),
+            "mel_gain": (1e-1, 0.01, 0.99),
+            "mel_smoothing": (np.tile(1e-1, self._n_fft_bins), 0.5, 0.99),
+            "gain": (np.tile(0.01, self._n_fft_bins), 0.001, 0.99),
+            "r_filt": (np.tile(0.01, led_count // 2), 0.2, 0.99),
+            "g_filt": (np.tile(0.01, led_count // 2), 0.05, 0.3),
+            "b_filt": (np.tile(0.01, led_count // 2), 0.1, 0.5),
+            "common_mode": (np.tile(0.01, led_count // 2), 0.99, 0.01),
+            "p_filt": (np.tile(1.0, (3, led_count // 2)), 0.1, 0.99),
+            "volume": (0.001, 0.02, 0.02)
+        }
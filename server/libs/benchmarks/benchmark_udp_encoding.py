@@ -0,0 +1,96 @@
+from libs.benchmarks.benchmark_effects import BenchmarkEffects  # pylint: disable=E0611, E0401
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.outputs.output_udp import OutputUDP  # pylint: disable=E0611, E0401
+from libs.outputs.udp_frame_protocol import UDPFramePacker, UDPFrameEncoder, UDPFrameReceiver  # pylint: disable=E0611, E0401
+
+
+class BenchmarkUDPEncoding(BenchmarkEffects):
+    """
+    Send the frames of every effect with the "compressed" UDP protocol and compare the bytes per frame with the
+    "chunked" protocol. The frames are rendered before the measurement and decoded with the UDPFrameReceiver,
+    so a frame, which is not decoded correctly, fails the benchmark.
+    The frames are timed with the fps of the device, so the keyframes are sent like on a real strip.
+    """
+    def __init__(self, frames=1000, audio_file=None, led_counts=(60, 300, 1000), n_fft_bins_list=(24,),
+                 sample_rate=48000, frames_per_buffer=512):
+        # Call the constructor of the base class.
+        super(BenchmarkUDPEncoding, self).__init__(frames, audio_file, led_counts, n_fft_bins_list,
+                                                   sample_rate, frames_per_buffer)
+
+    def run(self):
+        results = []
+        for n_fft_bins in self._n_fft_bins_list:
+            config = self.get_config(n_fft_bins)
+            audio_frames = self.get_audio_frames(config)
+
+            for led_count in self._led_counts:
+                for effect_enum, effect_class in EffectService.AVAILABLE_EFFECTS.items():
+                    device = self.get_device(config, led_count)
+                    packets = self.render_packets(device, effect_class(device), audio_frames)
+                    frame_duration = 1 / device.device_config["fps"]
+                    bytes_per_led = packets[0].shape[1]
+
+                    parameters = {
+                        "led_count": led_count,
+                        "n_fft_bins": n_fft_bins,
+                        "chunked_bytes_per_frame": self.get_bytes_per_frame(packets, frame_duration, None),
+                        "compressed_bytes_per_frame": self.get_bytes_per_frame(packets, frame_duration, UDPFrameEncoder())
+                    }
+
+                    frame_encoder = UDPFrameEncoder()
+                    frame_packer = UDPFramePacker(bytes_per_led)
+                    frame_index = [0]
+
+                    def encode_frame():
+                        packet = packets[frame_index[0] % len(packets)]
+                        frame_index[0] += 1
+                        payload, flags = frame_encoder.encode(packet, frame_index[0] * frame_duration)
+                        frame_packer.pack(payload, flags)
+
+                    results.append(self.measure(effect_enum.name, encode_frame, parameters))
+
+        return results
+
+    def render_packets(self, device, effect, audio_frames):
+        """
+        Run the effect and return the packets of its frames, like the OutputUDP sends them.
+        """
+        output = OutputUDP(device)
+        packets = []
+        frame_sequence = 0
+        for frame_index in range(self._frames):
+            mel, vol, freq_detects, freq_strengths = audio_frames[frame_index % len(audio_frames)]
+            device.audio_ring_buffer.write(mel, vol, None, freq_detects, freq_strengths)
+
+            effect.start_frame()
+            effect.run()
+
+            frame_data = device.frame_buffer.read_latest(frame_sequence)
+            if frame_data is not None:
+                frame_sequence = frame_data["sequence"]
+                packets.append(output.pack_frame(frame_data["frame"]).copy())
+
+        return packets
+
+    def get_bytes_per_frame(self, packets, frame_duration, frame_encoder):
+        """
+        Return the average length of the datagrams of a frame including the headers.
+        """
+        bytes_per_led = packets[0].shape[1]
+        frame_packer = UDPFramePacker(bytes_per_led)
+        frame_receiver = UDPFrameReceiver(bytes_per_led)
+        sent_bytes = 0
+        for frame_index, packet in enumerate(packets):
+            payload, flags = packet, 0
+            if frame_encoder is not None:
+                payload, flags = frame_encoder.encode(packet, frame_index * frame_duration)
+
+            frame = None
+            for datagram in frame_packer.pack(payload, flags):
+                sent_bytes += len(datagram)
+                frame = frame_receiver.receive(datagram)
+
+            if frame != packet.tobytes():
+                raise ValueError(f"The receiver decoded a wrong frame: {frame_index}")
+
+        return round(sent_bytes / len(packets), 1)
@@ -1,9 +1,14 @@
 from scipy.ndimage.filters import gaussian_filter1d
 import numpy as np
 import logging
+import json
 
 
 class ColorService():
+    # Built color arrays of this process. The key contains everything the arrays are built from.
+    _cache = {}
+    _max_cache_entries = 8
+
     def __init__(self, config, device_config):
         self.logger = logging.getLogger(__name__)
 
@@ -14,6 +19,40 @@ class ColorService():
         self.full_slide = {}
         self.full_bubble = {}
 
+    @staticmethod
+    def cached(config, device_config):
+        """
+        Return a ColorService with all arrays built.
+        The arrays are only built once per process for the same colors, gradients and LED count.
+        Every caller gets its own dicts, because some effects replace the array of their gradient to roll it.
+        """
+        cache_key = json.dumps([
+            config["colors"],
+            config["gradients"],
+            device_config["led_count"],
+            device_config["effects"]["effect_bubble"]
+        ], sort_keys=True)
+
+        if cache_key not in ColorService._cache:
+            if len(ColorService._cache) >= ColorService._max_cache_entries:
+                ColorService._cache.clear()
+
+            color_service = ColorService(config, device_config)
+            color_service.build_gradients()
+            color_service.build_fadegradients()
+            color_service.build_slidearrays()
+            color_service.build_bubblearrays()
+            ColorService._cache[cache_key] = color_service
+
+        cached_color_service = ColorService._cache[cache_key]
+
+        color_service = ColorService(config, device_config)
+        color_service.full_gradients = dict(cached_color_service.full_gradients)
+        color_service.full_fadegradients = dict(cached_color_service.full_fadegradients)
+        color_service.full_slide = dict(cached_color_service.full_slide)
+        color_service.full_bubble = dict(cached_color_service.full_bubble)
+        return color_service
+
     def build_gradients(self):
         self.full_gradients = {}
 
@@ -0,0 +1,61 @@
+import copy
+
+
+class ConfigDiff():
+    """
+    Creates and applies the difference between two configs.
+    A diff is a nested dict, which only contains the changed keys. Lists are handled like single values.
+    """
+
+    @staticmethod
+    def create(old_config, new_config):
+        """
+        Return the changed and added keys of new_config.
+        Returns None, if keys were removed or a dict was replaced with a value, because a diff can not describe it.
+        """
+        config_diff = {}
+        for key, old_value in old_config.items():
+            if key not in new_config:
+                return None
+
+        for key, new_value in new_config.items():
+            if key not in old_config:
+                config_diff[key] = copy.deepcopy(new_value)
+                continue
+
+            old_value = old_config[key]
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                value_diff = ConfigDiff.create(old_value, new_value)
+                if value_diff is None:
+                    return None
+                if value_diff:
+                    config_diff[key] = value_diff
+            elif isinstance(old_value, dict) or isinstance(new_value, dict):
+                return None
+            elif old_value != new_value:
+                config_diff[key] = copy.deepcopy(new_value)
+
+        return config_diff
+
+    @staticmethod
+    def apply(config, config_diff):
+        """
+        Apply a diff to the config in place, so every reference to a part of the config sees the change.
+        """
+        for key, value in config_diff.items():
+            if isinstance(value, dict) and isinstance(config.get(key), dict):
+                ConfigDiff.apply(config[key], value)
+            else:
+                config[key] = copy.deepcopy(value)
+
+    @staticmethod
+    def contains(config_diff, *keys):
+        """
+        Check if the diff contains the nested key, e.g. contains(diff, "device_configs", "device_0", "led_count").
+        """
+        current_diff = config_diff
+        for key in keys:
+            if not isinstance(current_diff, dict) or key not in current_diff:
+                return False
+            current_diff = current_diff[key]
+        return True
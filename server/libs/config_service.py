@@ -1,22 +1,41 @@
 #
 #   Contains all configuration for the server.
 #   Load and save the config after every change.
+#   Rapid changes are collected and written once after a short quiet period.
 #
 from libs.config_converter.config_converter_service import ConfigConverterService  # pylint: disable=E0611, E0401
 
 from logging.handlers import RotatingFileHandler
 from shutil import copyfile, copy
+from threading import Timer, RLock
+from copy import deepcopy
 from pathlib import Path
 import coloredlogs
+import atexit
 import logging
+import signal
 import json
 import sys
 import os
 
 
 class ConfigService():
+    # A failed write is tried again after this time (seconds).
+    WRITE_RETRY_DELAY = 5
+    # When the process is terminated, the locks are only waited for this long, so the process still stops.
+    TERMINATE_FLUSH_TIMEOUT = 2
+
     def __init__(self, config_lock):
         self.config = None
+        # The timer and the pending config are changed by the request threads and the timer thread.
+        self._write_lock = RLock()
+        self._write_timer = None
+        # The config, which waits to be written. It is serialized when it is saved, because the request threads
+        # keep changing the config dict.
+        self._pending_config_json = None
+        # The content of the config file, so unchanged configs are not written again.
+        self._saved_config_json = None
+        self._logging_settings = None
 
         # Start with the default logging settings, because the config was not loaded.
         self.setup_logging()
@@ -58,6 +77,10 @@ class ConfigService():
         # Now the config was loaded, so we can reinit the logging with the set logging levels.
         self.setup_logging()
 
+        # Write pending changes, if the process exits normally or is terminated.
+        atexit.register(self.flush_config)
+        self.register_terminate_handler()
+
     def load_config(self):
         """Load the configuration file inside the self.config variable."""
         self.config_lock.acquire()
@@ -65,6 +88,7 @@ class ConfigService():
         try:
             with open(self._config_path, "r") as read_file:
                 self.config = json.load(read_file)
+            self._saved_config_json = self.serialize_config(self.config)
         except Exception as e:
             self.logger.error(f"Could not load config due to exception: {e}")
             self.load_backup()
@@ -73,23 +97,138 @@ class ConfigService():
 
         self.logger.debug("Settings loaded from config.")
 
-    def save_config(self, config=None):
-        """Save the config file. Use the current self.config"""
+    def save_config(self, config=None, write_delay=None):
+        """
+        Save the config file. Use the current self.config
+        The file is written after general_settings.config_write_delay seconds without a new change.
+        Use write_delay=0 to write it immediately.
+        """
         self.logger.debug("Saving settings...")
 
+        if config is not None:
+            self.config = config
+
+        # Maybe the logging updated
+        if self.get_logging_settings() != self._logging_settings:
+            self.setup_logging()
+
+        if write_delay is None:
+            try:
+                write_delay = float(self.config["general_settings"]["config_write_delay"])
+            except Exception:
+                write_delay = 0
+
         self.config_lock.acquire()
+        try:
+            config_json = self.serialize_config(self.config)
+        finally:
+            self.config_lock.release()
 
-        self.save_backup()
+        with self._write_lock:
+            self._pending_config_json = config_json
+            if write_delay > 0:
+                self.schedule_write(write_delay)
+                return
 
-        if config is not None:
-            self.config = config
+        self.write_config()
 
-        with open(self._config_path, "w") as write_file:
-            json.dump(self.config, write_file, indent=4, sort_keys=True)
+    def schedule_write(self, write_delay):
+        with self._write_lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
 
-        # Maybe the logging updated
-        self.setup_logging()
-        self.config_lock.release()
+            self._write_timer = Timer(write_delay, self.write_config)
+            self._write_timer.daemon = True
+            self._write_timer.start()
+
+    def write_config(self, lock_timeout=-1):
+        """
+        Write the pending config now. The file is replaced atomically, so a power loss can not leave half a config behind.
+        A failed write is tried again after WRITE_RETRY_DELAY seconds.
+        Returns False, if the locks could not be acquired within lock_timeout seconds. -1 waits without a timeout.
+        """
+        if not self._write_lock.acquire(timeout=lock_timeout):
+            return False
+
+        try:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+
+            config_json = self._pending_config_json
+            if config_json is None:
+                return True
+            if config_json == self._saved_config_json:
+                self.logger.debug("Config did not change. Skip writing.")
+                self._pending_config_json = None
+                return True
+
+            if not self.config_lock.acquire(timeout=None if lock_timeout < 0 else lock_timeout):
+                return False
+
+            try:
+                self.save_backup()
+
+                temp_path = self._config_path + ".tmp"
+                with open(temp_path, "w") as write_file:
+                    write_file.write(config_json)
+                    write_file.flush()
+                    os.fsync(write_file.fileno())
+                os.replace(temp_path, self._config_path)
+
+                self._saved_config_json = config_json
+                self._pending_config_json = None
+                self.logger.debug("Settings saved.")
+            except Exception as e:
+                self.logger.exception(f"Could not save config due to exception: {e}")
+                self.schedule_write(self.WRITE_RETRY_DELAY)
+            finally:
+                self.config_lock.release()
+
+            return True
+        finally:
+            self._write_lock.release()
+
+    def flush_config(self, lock_timeout=-1):
+        """Write a pending config change now."""
+        return self.write_config(lock_timeout)
+
+    def register_terminate_handler(self):
+        """
+        Write a pending config change, before the process is terminated with SIGTERM, e.g. when MLSC is stopped.
+        """
+        try:
+            self._previous_terminate_handler = signal.signal(signal.SIGTERM, self.handle_terminate)
+        except ValueError:
+            # Signal handlers can only be set in the main thread.
+            self.logger.debug("Could not register the terminate handler outside of the main thread.")
+
+    def handle_terminate(self, signum, frame):
+        if not self.flush_config(self.TERMINATE_FLUSH_TIMEOUT):
+            self.logger.warning("Could not write the pending config before the process was terminated.")
+
+        # Terminate the process like without the handler.
+        if callable(self._previous_terminate_handler):
+            self._previous_terminate_handler(signum, frame)
+            return
+        if self._previous_terminate_handler == signal.SIG_IGN:
+            return
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def serialize_config(self, config):
+        return json.dumps(config, indent=4, sort_keys=True)
+
+    def get_config_snapshot(self):
+        """
+        Return a deep copy of the config, taken under the config lock.
+        The queues pickle their items later in a feeder thread, so the live config must not be put into a queue.
+        """
+        self.config_lock.acquire()
+        try:
+            return deepcopy(self.config)
+        finally:
+            self.config_lock.release()
 
     def load_backup(self):
         try:
@@ -99,7 +238,8 @@ class ConfigService():
             self.logger.error(f"Could not load backup config due to exception: {e}")
 
     def save_backup(self):
-        copy(self._config_path, self._backup_path)
+        if os.path.exists(self._config_path):
+            copy(self._config_path, self._backup_path)
 
     def reset_config(self):
         """Reset the config."""
@@ -114,7 +254,7 @@ class ConfigService():
         self.config_lock.release()
 
         # Save the config again.
-        self.save_config()
+        self.save_config(write_delay=0)
 
     def load_template(self):
         config_template = None
@@ -149,7 +289,8 @@ class ConfigService():
         self.check_devices(loaded_config["device_configs"], template_config["default_device"])
 
         self.config = loaded_config
-        self.save_config()
+        # The other processes load the config file during their start, so it is written immediately.
+        self.save_config(write_delay=0)
 
     def check_leaf(self, loaded_config_leaf, template_config_leaf):
         if type(template_config_leaf) is dict:
@@ -167,7 +308,16 @@ class ConfigService():
     def get_config_path(self):
         return self._config_path
 
+    def get_logging_settings(self):
+        if self.config is None:
+            return None
+
+        general_settings = self.config.get("general_settings", {})
+        return {key: general_settings.get(key) for key in ("log_level_console", "log_level_file", "log_file_enabled")}
+
     def setup_logging(self):
+        self._logging_settings = self.get_logging_settings()
+
         logging_path = "../../.mlsc/"
         logging_file = "mlsc.log"
 
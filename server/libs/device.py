@@ -1,18 +1,26 @@
 from libs.effect_service import EffectService
 from libs.output_service import OutputService
 from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+from libs.frame_buffer import FrameBuffer  # pylint: disable=E0611, E0401
+from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
+from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
+from libs.config_diff import ConfigDiff  # pylint: disable=E0611, E0401
 
 from multiprocessing import Process, Queue
 import logging
 
 
 class Device:
-    def __init__(self, config, device_config, color_service_global):
+    def __init__(self, config, device_config, color_service_global, audio_ring_buffer, stats_queue=None, device_id=None):
         self.logger = logging.getLogger(__name__)
 
         self.__config = config
         self.__device_config = device_config
         self.__color_service_global = color_service_global
+        self.__audio_ring_buffer = audio_ring_buffer
+        self.__device_id = device_id
+        # The output reports its latency statistics to the webserver with this queue.
+        self.__stats_queue = QueueWrapper(stats_queue, count_drops=False) if stats_queue is not None else None
 
         self.create_queues()
         self.create_processes()
@@ -26,8 +34,11 @@ class Device:
     def stop_device(self):
         self.logger.info(
             f'Stopping device: {self.__device_config["device_name"]}')
-        self.__effect_process.terminate()
-        self.__output_process.terminate()
+        # The processes were not started, if the render engine runs the device.
+        if self.__effect_process.is_alive():
+            self.__effect_process.terminate()
+        if self.__output_process.is_alive():
+            self.__output_process.terminate()
 
     def create_processes(self):
         self.__output_service = OutputService()
@@ -43,13 +54,20 @@ class Device:
         )
 
     def create_queues(self):
-        self.__device_notification_queue_in = QueueWrapper(Queue(2))
-        self.__device_notification_queue_out = QueueWrapper(Queue(2))
+        # The EffectService and the OutputService get their own notification queue, so both receive every update.
+        self.__effect_notification_queue_in = QueueWrapper(Queue(2))
+        self.__output_notification_queue_in = QueueWrapper(Queue(2))
+        # The services report finished refreshes here. Nobody waits for them, so old reports are dropped silently.
+        self.__device_notification_queue_out = QueueWrapper(Queue(2), count_drops=False)
         self.__effect_queue = QueueWrapper(Queue(2))
-        self.__audio_queue = QueueWrapper(Queue(2))
-        self.__output_queue = QueueWrapper(Queue(2))
+        # The config diffs, which did not fit into the notification queues yet.
+        self.__pending_config_diffs = {}
 
-    def refresh_config(self, config, device_config):
+        # The pixel data is shared through memory, the queues are only used for control messages.
+        channels = 4 if "SK6812" in self.__device_config["led_strip"] else 3
+        self.__frame_buffer = FrameBuffer(channels, self.__device_config["led_count"])
+
+    def refresh_config(self, config, device_config, start_processes=True):
         self.logger.info(
             f'Refreshing config of device: {self.__device_config["device_name"]}')
 
@@ -61,19 +79,40 @@ class Device:
         self.create_queues()
         self.create_processes()
 
-        self.__output_service = OutputService()
-        self.__output_process = Process(
-            target=self.__output_service.start,
-            args=(self,)
-        )
+        if start_processes:
+            self.start_device()
 
-        self.__effect_service = EffectService()
-        self.__effect_process = Process(
-            target=self.__effect_service.start,
-            args=(self,)
-        )
+    def update_config(self, config, device_config, config_diff, device_id):
+        """
+        Apply a config change without restarting the processes.
+        The running EffectService and OutputService apply the diff to their own copy of the config.
+        """
+        self.logger.debug(
+            f'Updating config of device: {self.__device_config["device_name"]}')
 
-        self.start_device()
+        self.__config = config
+        self.__device_config = device_config
+        self.__device_id = device_id
+
+        # A burst of changes, e.g. from a slider, must not block the DeviceManager.
+        # The diffs are merged, until the services took the previous updates.
+        for notification_queue in (self.__effect_notification_queue_in, self.__output_notification_queue_in):
+            pending_config_diff = self.__pending_config_diffs.setdefault(notification_queue, {})
+            ConfigDiff.apply(pending_config_diff, config_diff)
+
+        self.send_config_updates()
+
+    def send_config_updates(self):
+        """
+        Put the pending config diffs into the notification queues, which have space for them.
+        The DeviceManager calls this regularly, so the diffs arrive once the services took the previous ones.
+        """
+        for notification_queue, config_diff in list(self.__pending_config_diffs.items()):
+            if notification_queue.full():
+                continue
+            notification_queue.put_blocking(
+                NotificationItem(NotificationEnum.config_update, self.__device_id, config_diff))
+            del self.__pending_config_diffs[notification_queue]
 
     def get_config(self):
         return self.__config
@@ -81,8 +120,11 @@ class Device:
     def get_device_config(self):
         return self.__device_config
 
-    def get_device_notification_queue_in(self):
-        return self.__device_notification_queue_in
+    def get_effect_notification_queue_in(self):
+        return self.__effect_notification_queue_in
+
+    def get_output_notification_queue_in(self):
+        return self.__output_notification_queue_in
 
     def get_device_notification_queue_out(self):
         return self.__device_notification_queue_out
@@ -90,11 +132,20 @@ class Device:
     def get_effect_queue(self):
         return self.__effect_queue
 
-    def get_audio_queue(self):
-        return self.__audio_queue
+    def get_audio_ring_buffer(self):
+        return self.__audio_ring_buffer
+
+    def get_frame_buffer(self):
+        return self.__frame_buffer
+
+    def get_stats_queue(self):
+        return self.__stats_queue
 
-    def get_output_queue(self):
-        return self.__output_queue
+    def get_device_id(self):
+        return self.__device_id
+
+    def get_pending_config_updates(self):
+        return len(self.__pending_config_diffs) > 0
 
     def get_color_service_global(self):
         return self.__color_service_global
@@ -102,14 +153,22 @@ class Device:
     config = property(get_config)
     device_config = property(get_device_config)
 
-    device_notification_queue_in = property(get_device_notification_queue_in)
+    effect_notification_queue_in = property(get_effect_notification_queue_in)
+
+    output_notification_queue_in = property(get_output_notification_queue_in)
 
     device_notification_queue_out = property(get_device_notification_queue_out)
 
     effect_queue = property(get_effect_queue)
 
-    audio_queue = property(get_audio_queue)
+    audio_ring_buffer = property(get_audio_ring_buffer)
+
+    frame_buffer = property(get_frame_buffer)
+
+    stats_queue = property(get_stats_queue)
+
+    device_id = property(get_device_id)
 
-    output_queue = property(get_output_queue)
+    pending_config_updates = property(get_pending_config_updates)
 
     color_service_global = property(get_color_service_global)
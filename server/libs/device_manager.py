@@ -2,17 +2,29 @@ from libs.color_service_global import ColorServiceGlobal  # pylint: disable=E061
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
 from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
+from libs.render_engine import RenderEngine  # pylint: disable=E0611, E0401
 from libs.device import Device  # pylint: disable=E0611, E0401
 from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+from libs.config_diff import ConfigDiff  # pylint: disable=E0611, E0401
+from libs.wakeup_counter import WakeupCounter  # pylint: disable=E0611, E0401
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
 
+from multiprocessing import Process
 from time import time
 import logging
-import copy
 
 
 class DeviceManager():
-    def start(self, config_lock, notification_queue_in, notification_queue_out, effect_queue, audio_queue):
+    # Changes of these device settings need a new output, so the processes of the device are restarted.
+    RESTART_DEVICE_KEYS = ("led_count", "led_strip", "output_type", "output")
+    # Changes of these general settings restart the render engine in the consolidated mode.
+    RESTART_ENGINE_KEYS = ("render_workers", "render_clock")
+    # Without effects or notifications, the loop only wakes up after this time.
+    IDLE_TIMEOUT = 1
+    # Config updates, which wait for space in the queues of a device, are retried after this time.
+    PENDING_CONFIG_TIMEOUT = 0.05
+
+    def start(self, config_lock, notification_queue_in, notification_queue_out, effect_queue, audio_ring_buffer, stats_queue):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
@@ -21,13 +33,19 @@ class DeviceManager():
         self._notification_queue_in = QueueWrapper(notification_queue_in)
         self._notification_queue_out = QueueWrapper(notification_queue_out)
         self._effect_queue = QueueWrapper(effect_queue)
-        self._audio_queue = QueueWrapper(audio_queue)
+        self._audio_ring_buffer = audio_ring_buffer
+        # The raw queue is handed to the devices, the wrapper is used for the metrics of this process.
+        self._stats_queue = stats_queue
+        self._stats_queue_wrapper = QueueWrapper(stats_queue, count_drops=False)
+        self._metrics = MetricsRegistry.instance()
+        self._metrics.process_name = "device_manager"
 
-        # Init FPS Limiter.
-        self._fps_limiter = FPSLimiter(120)
+        self._wakeup_counter = WakeupCounter("Device Manager", self._config["general_settings"]["measure_wakeups"])
 
         self._skip_routine = False
         self._devices = {}
+        self._render_engine_process = None
+        self._engine_mode = self._config["general_settings"]["engine_mode"]
         self.init_devices()
         self.start_devices()
 
@@ -41,6 +59,19 @@ class DeviceManager():
                 break
 
     def routine(self):
+        # Sleep until a new effect or a notification arrives.
+        timeout = self.IDLE_TIMEOUT
+        if any(device.pending_config_updates for device in self._devices.values()):
+            timeout = self.PENDING_CONFIG_TIMEOUT
+        QueueWrapper.wait([self._effect_queue, self._notification_queue_in], timeout)
+        self._wakeup_counter.count()
+
+        self._metrics.set_gauge("devices", len(self._devices))
+        self._metrics.report(self._stats_queue_wrapper)
+
+        for device in self._devices.values():
+            device.send_config_updates()
+
         # Check the effect queue.
         if not self._effect_queue.empty():
             current_effect_item = self._effect_queue.get_blocking()
@@ -60,37 +91,38 @@ class DeviceManager():
                     self._config["device_configs"].keys())
                 self.logger.debug(
                     f"Device count before: {devices_count_before_reload}")
-                self.reload_config()
+                config_before_reload = self._config
+                self.reload_config(current_notification_item.payload)
+                config_diff = ConfigDiff.create(config_before_reload, self._config)
                 devices_count_after_reload = len(
                     self._config["device_configs"].keys())
                 self.logger.debug(
                     f"Device count after: {devices_count_after_reload}")
 
-                if(devices_count_before_reload != devices_count_after_reload):
-                    self.reinit_devices()
+                engine_mode_changed = self._engine_mode != self._config["general_settings"]["engine_mode"]
 
                 if(current_notification_item.device_id == "all_devices"):
-                    for key, value in self._devices.items():
-                        self.restart_device(key)
+                    device_ids = list(self._devices.keys())
+                else:
+                    device_ids = [current_notification_item.device_id]
+
+                if(devices_count_before_reload != devices_count_after_reload or engine_mode_changed):
+                    # The devices are created again with the new config.
+                    self.reinit_devices()
                 else:
-                    self.restart_device(current_notification_item.device_id)
+                    self.refresh_devices(device_ids, config_diff)
                 self._notification_queue_out.put_blocking(NotificationItem(
-                    NotificationEnum.config_refresh_finished, current_notification_item.device_id))
+                    NotificationEnum.config_refresh_finished, current_notification_item.device_id,
+                    refresh_id=current_notification_item.refresh_id))
 
             elif current_notification_item.notification_enum is NotificationEnum.process_continue:
                 self._skip_routine = False
             elif current_notification_item.notification_enum is NotificationEnum.process_pause:
                 self._skip_routine = True
 
-        # Limit the fps to decrease lags caused by 100 percent CPU.
-        self._fps_limiter.fps_limiter()
-
         if self._skip_routine:
             return
 
-        audio_data = self.get_audio_data()
-        self.refresh_audio_queues(audio_data)
-
         self.end_time = time()
 
         if time() - self.ten_seconds_counter > 10:
@@ -101,19 +133,6 @@ class DeviceManager():
 
         self.start_time = time()
 
-    def get_audio_data(self):
-        audio_data = None
-        if not self._audio_queue.empty():
-            audio_data = self._audio_queue.get_blocking()
-        return audio_data
-
-    def refresh_audio_queues(self, audio_data):
-        if audio_data is None:
-            return
-        for key, value in self._devices.items():
-            audio_copy = copy.deepcopy(audio_data)
-            value.audio_queue.put_none_blocking(audio_data)
-
     def init_devices(self):
         self.logger.debug("Entering init_devices()")
         self._color_service_global = ColorServiceGlobal(self._config)
@@ -122,29 +141,114 @@ class DeviceManager():
             device_id = key
             self.logger.debug(f"Init device with device id: {device_id}")
             self._devices[device_id] = Device(
-                self._config, self._config["device_configs"][device_id], self._color_service_global)
+                self._config, self._config["device_configs"][device_id], self._color_service_global, self._audio_ring_buffer,
+                self._stats_queue, device_id)
         self.logger.debug("Leaving init_devices()")
 
     def reinit_devices(self):
         self.logger.debug("Entering reinit_devices()")
+        self.stop_render_engine()
         for key, value in self._devices.items():
             self.stop_device(key)
         self._devices = {}
+        self._engine_mode = self._config["general_settings"]["engine_mode"]
         self.init_devices()
         self.start_devices()
         self.logger.debug("Leaving reinit_devices()")
 
     def start_devices(self):
+        if self._engine_mode == "consolidated":
+            self.start_render_engine()
+            return
+
         for key, value in self._devices.items():
             self.logger.debug(f"Starting device: {key}")
             value.start_device()
 
-    def reload_config(self):
+    def start_render_engine(self):
+        render_workers = self._config["general_settings"]["render_workers"]
+        render_clock = self._config["general_settings"]["render_clock"]
+        self.logger.info(f"Starting render engine for {len(self._devices)} devices.")
+        self._render_engine = RenderEngine()
+        self._render_engine_process = Process(
+            target=self._render_engine.start,
+            args=(list(self._devices.values()), render_workers, render_clock)
+        )
+        self._render_engine_process.start()
+
+    def stop_render_engine(self):
+        if self._render_engine_process is None:
+            return
+        self.logger.info("Stopping render engine.")
+        self._render_engine_process.terminate()
+        self._render_engine_process = None
+
+    def reload_config(self, config=None):
+        """
+        Use the config of the notification. Load the config file only, if the notification does not contain it.
+        """
         self.logger.debug("Entering reload_config()")
-        ConfigService.instance(self._config_lock).load_config()
+        if config is not None:
+            ConfigService.instance(self._config_lock).config = config
+        else:
+            ConfigService.instance(self._config_lock).load_config()
         self._config = ConfigService.instance(self._config_lock).config
+        self._wakeup_counter.enabled = self._config["general_settings"]["measure_wakeups"]
         self.logger.debug("Leaving reload_config()")
 
+    def refresh_devices(self, device_ids, config_diff):
+        """
+        Send the changed settings to the running devices.
+        Only devices with changed output settings are restarted.
+        """
+        if config_diff is None:
+            self.restart_devices(device_ids)
+            return
+
+        if not config_diff:
+            self.logger.debug("Config did not change.")
+            return
+
+        restart_device_ids = []
+        for device_id in device_ids:
+            if self.device_needs_restart(device_id, config_diff):
+                restart_device_ids.append(device_id)
+            else:
+                self.update_device(device_id, config_diff)
+
+        # The render engine threads and its clock are only created at the start.
+        if self._engine_mode == "consolidated" and any(
+                ConfigDiff.contains(config_diff, "general_settings", key) for key in self.RESTART_ENGINE_KEYS):
+            restart_device_ids = device_ids
+
+        if restart_device_ids:
+            self.restart_devices(restart_device_ids)
+
+    def device_needs_restart(self, device_id, config_diff):
+        for key in self.RESTART_DEVICE_KEYS:
+            if ConfigDiff.contains(config_diff, "device_configs", device_id, key):
+                return True
+        return False
+
+    def update_device(self, device_id, config_diff):
+        self.logger.debug(f"Updating {device_id}")
+        self._devices[device_id].update_config(
+            self._config, self._config["device_configs"][device_id], config_diff, device_id)
+        self.logger.debug(f"Updated {device_id}")
+
+    def restart_devices(self, device_ids):
+        if self._engine_mode != "consolidated":
+            for device_id in device_ids:
+                self.restart_device(device_id)
+            return
+
+        # The render engine owns the effects and outputs of all devices, so it has to restart once.
+        self.stop_render_engine()
+        for device_id in device_ids:
+            self._devices[device_id].refresh_config(
+                self._config, self._config["device_configs"][device_id], start_processes=False)
+        self.start_render_engine()
+
     def restart_device(self, device_id):
         self.logger.debug(f"Restarting {device_id}")
         self._devices[device_id].refresh_config(
@@ -5,9 +5,12 @@ import numpy as np
 
 
 class DSP():
-    def __init__(self, config, device_config=None):
+    """
+    Audio analysis of the AudioProcessService.
+    The effects only get the result, their smoothing filters are inside SmoothingFilters.
+    """
+    def __init__(self, config):
         self._config = config
-        self._device_config = device_config
 
         # Initialise filters etc. I've no idea what most of these are for but I imagine I won't be getting rid of them soon.
         n_fft_bins = self._config["general_settings"]["n_fft_bins"]
@@ -15,32 +18,44 @@ class DSP():
         frames_per_buffer = self._config["general_settings"]["frames_per_buffer"]
         n_rolling_history = self._config["general_settings"]["n_rolling_history"]
 
-        if device_config is None:
-            led_count = 200
-        else:
-            led_count = self._device_config["led_count"]
-
-        self.fft_plot_filter = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.5, alpha_rise=0.99)
-        self.mel_gain = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.01, alpha_rise=0.99)
-        self.mel_smoothing = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.5, alpha_rise=0.99)
-        self.gain = ExpFilter(np.tile(0.01, n_fft_bins), alpha_decay=0.001, alpha_rise=0.99)
-        self.r_filt = ExpFilter(np.tile(0.01, led_count // 2), alpha_decay=0.2, alpha_rise=0.99)
-        self.g_filt = ExpFilter(np.tile(0.01, led_count // 2), alpha_decay=0.05, alpha_rise=0.3)
-        self.b_filt = ExpFilter(np.tile(0.01, led_count // 2), alpha_decay=0.1, alpha_rise=0.5)
-        self.common_mode = ExpFilter(np.tile(0.01, led_count // 2), alpha_decay=0.99, alpha_rise=0.01)
-        self.p_filt = ExpFilter(np.tile(1, (3, led_count // 2)), alpha_decay=0.1, alpha_rise=0.99)
-        self.volume = ExpFilter(min_volume_threshold, alpha_decay=0.02, alpha_rise=0.02)
-        self.p = np.tile(1.0, (3, led_count // 2))
+        # All smoothing states live in one preallocated filter bank and are updated in place.
+        # The mel gain is only updated with the maximum of the mel curve, so a scalar filter is enough.
+        self.filter_bank = ExpFilterBank({
+            "fft_plot_filter": (np.tile(1e-1, n_fft_bins), 0.5, 0.99),
+            "mel_gain": (1e-1, 0.01, 0.99),
+            "mel_smoothing": (np.tile(1e-1, n_fft_bins), 0.5, 0.99),
+            "volume": (min_volume_threshold, 0.02, 0.02)
+        })
+        self.fft_plot_filter = self.filter_bank.filters["fft_plot_filter"]
+        self.mel_gain = self.filter_bank.filters["mel_gain"]
+        self.mel_smoothing = self.filter_bank.filters["mel_smoothing"]
+        self.volume = self.filter_bank.filters["volume"]
         # Number of audio samples to read every time frame.
         # self.samples_per_frame = int(default_sample_rate / fps)
         self.samples_per_frame = int(frames_per_buffer)
-        # Array containing the rolling audio sample window.
-        self.y_roll = np.random.rand(n_rolling_history, self.samples_per_frame) / 1e16
-        self.fft_window = np.hamming(int(frames_per_buffer) * n_rolling_history)
+        self.n_rolling_samples = self.samples_per_frame * n_rolling_history
+        # Circular buffer containing the rolling audio sample window.
+        # Every sample is written twice, so the current window is always one contiguous slice of the buffer.
+        self.y_roll = np.zeros(2 * self.n_rolling_samples, dtype=np.float32)
+        self.y_roll[:self.n_rolling_samples] = np.random.rand(self.n_rolling_samples) / 1e16
+        self.y_roll[self.n_rolling_samples:] = self.y_roll[:self.n_rolling_samples]
+        self.y_roll_position = 0
+        self.fft_window = np.hamming(self.n_rolling_samples).astype(np.float32)
+
+        # The FFT input is padded with zeros until the next power of two. The padding never changes.
+        self.n_fft_samples = 2**int(np.ceil(np.log2(self.n_rolling_samples)))
+        self.fft_input = np.zeros(self.n_fft_samples, dtype=np.float32)
+        self.fft_magnitude = np.zeros(self.n_rolling_samples // 2)
+        self.abs_samples = np.zeros(self.n_rolling_samples, dtype=np.float32)
+        self.mel = np.zeros(n_fft_bins)
 
         self.samples = None
-        self.mel_y = None
+        self.mel_band_indices = None
+        self.mel_band_offsets = None
+        self.mel_band_weights = None
+        self.mel_band_products = None
         self.mel_x = None
+        self.x = None
         self.melbank = Melbank()
         self.create_mel_bank()
 
@@ -49,44 +64,41 @@ class DSP():
         Return processed audio data.
         Returns mel curve, x/y data.
         This method is called every time there is a microphone update.
+        "mel" and "y" are the states of the smoothing filters, so they will change with the next update.
         Returns:
         -------
         audio_data: dict
             Dict containing "mel", "vol", "x", and "y".
         """
-        min_frequency = self._config["general_settings"]["min_frequency"]
-        max_frequency = self._config["general_settings"]["max_frequency"]
-
         audio_data = {}
-        # Normalize samples between 0 and 1.
-        y = audio_samples / 2.0**15
-        # Construct a rolling window of audio samples.
-        self.y_roll[:-1] = self.y_roll[1:]
-        self.y_roll[-1, :] = np.copy(y)
-        y_data = np.concatenate(self.y_roll, axis=0).astype(np.float32)
-        vol = np.max(np.abs(y_data))
+        # Write the new samples into the rolling window and normalize them between 0 and 1.
+        start = self.y_roll_position
+        end = start + self.samples_per_frame
+        np.multiply(audio_samples, 1.0 / 2.0**15, out=self.y_roll[start:end])
+        self.y_roll[start + self.n_rolling_samples:end + self.n_rolling_samples] = self.y_roll[start:end]
+        self.y_roll_position = end % self.n_rolling_samples
+        # The window starts with the oldest samples.
+        y_data = self.y_roll[self.y_roll_position:self.y_roll_position + self.n_rolling_samples]
+        vol = float(np.abs(y_data, out=self.abs_samples).max())
         # Transform audio input into the frequency domain.
-        N = len(y_data)
-        N_zeros = 2**int(np.ceil(np.log2(N))) - N
-        # Pad with zeros until the next power of two.
-        y_data *= self.fft_window
-        y_padded = np.pad(y_data, (0, N_zeros), mode='constant')
-        YS = np.abs(np.fft.rfft(y_padded)[:N // 2])
+        np.multiply(y_data, self.fft_window, out=self.fft_input[:self.n_rolling_samples])
+        np.abs(np.fft.rfft(self.fft_input)[:self.n_rolling_samples // 2], out=self.fft_magnitude)
         # Construct a Mel filterbank from the FFT data.
-        mel = np.atleast_2d(YS).T * self.mel_y.T
+        # Every band only covers a small range of the FFT, so only these values are weighted and summed up.
+        np.take(self.fft_magnitude, self.mel_band_indices, out=self.mel_band_products)
+        self.mel_band_products *= self.mel_band_weights
+        mel = np.add.reduceat(self.mel_band_products, self.mel_band_offsets, out=self.mel)
         # Scale data to values more suitable for visualization.
-        mel = np.sum(mel, axis=0)
-        mel = mel**2.0
+        mel **= 2.0
         # Gain normalization.
         self.mel_gain.update(np.max(gaussian_filter1d(mel, sigma=1.0)))
         mel /= self.mel_gain.value
         mel = self.mel_smoothing.update(mel)
-        x = np.linspace(min_frequency, max_frequency, len(mel))
         y = self.fft_plot_filter.update(mel)
 
         audio_data["mel"] = mel
         audio_data["vol"] = vol
-        audio_data["x"] = x
+        audio_data["x"] = self.x
         audio_data["y"] = y
         return audio_data
 
@@ -116,13 +128,42 @@ class DSP():
 
         samples = int(frames_per_buffer * (n_rolling_history / 2))
 
-        self.mel_y, (_, self.mel_x) = self.melbank.compute_melmat(
+        (band_starts, band_lengths, self.mel_band_weights), (_, self.mel_x) = self.melbank.compute_melbands(
             num_mel_bands=n_fft_bins,
             freq_min=min_frequency,
             freq_max=max_frequency,
             num_fft_bands=samples,
             sample_rate=default_sample_rate
         )
+        # Flat FFT indices of all bands. The bands overlap, so some FFT values are used twice.
+        self.mel_band_offsets = np.concatenate(([0], np.cumsum(band_lengths)[:-1]))
+        self.mel_band_indices = np.concatenate([
+            np.arange(start, start + length) for start, length in zip(band_starts, band_lengths)])
+        self.mel_band_products = np.zeros(len(self.mel_band_indices))
+        self.x = np.linspace(min_frequency, max_frequency, n_fft_bins)
+
+
+class SmoothingFilters():
+    """
+    Smoothing state of one effect.
+    The effects only need these filters, so they do not have to build a whole DSP with its mel bank.
+    """
+    def __init__(self, n_fft_bins, led_count):
+        self.filter_bank = ExpFilterBank({
+            "gain": (np.tile(0.01, n_fft_bins), 0.001, 0.99),
+            "r_filt": (np.tile(0.01, led_count // 2), 0.2, 0.99),
+            "g_filt": (np.tile(0.01, led_count // 2), 0.05, 0.3),
+            "b_filt": (np.tile(0.01, led_count // 2), 0.1, 0.5),
+            "common_mode": (np.tile(0.01, led_count // 2), 0.99, 0.01),
+            "p_filt": (np.tile(1, (3, led_count // 2)), 0.1, 0.99)
+        })
+        self.gain = self.filter_bank.filters["gain"]
+        self.r_filt = self.filter_bank.filters["r_filt"]
+        self.g_filt = self.filter_bank.filters["g_filt"]
+        self.b_filt = self.filter_bank.filters["b_filt"]
+        self.common_mode = self.filter_bank.filters["common_mode"]
+        self.p_filt = self.filter_bank.filters["p_filt"]
+        self.p = np.tile(1.0, (3, led_count // 2))
 
 
 class ExpFilter():
@@ -146,6 +187,105 @@ class ExpFilter():
         return self.value
 
 
+class ScalarExpFilter():
+    """
+    Exponential smoothing filter for a single value.
+    Same behavior as ExpFilter, but without the type check in every update.
+    """
+    def __init__(self, val=0.0, alpha_decay=0.5, alpha_rise=0.5):
+        """Small rise/decay factors = more smoothing."""
+        assert 0.0 < alpha_decay < 1.0, 'Invalid decay smoothing factor.'
+        assert 0.0 < alpha_rise < 1.0, 'Invalid rise smoothing factor.'
+        self.alpha_decay = alpha_decay
+        self.alpha_rise = alpha_rise
+        self.value = float(val)
+
+    def update(self, value):
+        alpha = self.alpha_rise if value > self.value else self.alpha_decay
+        self.value = alpha * value + (1.0 - alpha) * self.value
+        return self.value
+
+
+class BankedExpFilter():
+    """
+    Exponential smoothing filter for an array, which is stored inside an ExpFilterBank.
+    The value and the scratch arrays are views into the memory of the bank,
+    so update() changes the value in place and does not allocate new arrays.
+    The returned value is the state itself. Copy it, if you want to change it.
+    """
+    def __init__(self, value, scratch, mask, alpha_decay=0.5, alpha_rise=0.5):
+        """Small rise/decay factors = more smoothing."""
+        assert 0.0 < alpha_decay < 1.0, 'Invalid decay smoothing factor.'
+        assert 0.0 < alpha_rise < 1.0, 'Invalid rise smoothing factor.'
+        self.alpha_decay = alpha_decay
+        self.alpha_rise = alpha_rise
+        self._value = value
+        self._difference = scratch[0]
+        self._alpha = scratch[1]
+        self._mask = mask
+
+    def update(self, value):
+        # value = alpha * value + (1 - alpha) * value_old = value_old + alpha * (value - value_old)
+        np.subtract(value, self._value, out=self._difference)
+        np.greater(self._difference, 0.0, out=self._mask)
+        self._alpha.fill(self.alpha_decay)
+        np.copyto(self._alpha, self.alpha_rise, where=self._mask)
+        self._difference *= self._alpha
+        self._value += self._difference
+        return self._value
+
+    def get_value(self):
+        return self._value
+
+    value = property(get_value)
+
+
+class ExpFilterBank():
+    """
+    Holds the states of all smoothing filters of one DSP in a single preallocated array.
+
+    filter_specs is a dict with the name of the filter as key and a tuple (initial value, alpha_decay, alpha_rise).
+    Scalar initial values create a ScalarExpFilter, array values a BankedExpFilter with the same shape.
+    All filters are available inside the filters dict and can be used like an ExpFilter.
+    """
+    def __init__(self, filter_specs):
+        array_specs = {}
+        for name, (initial_value, alpha_decay, alpha_rise) in filter_specs.items():
+            if np.ndim(initial_value) > 0:
+                array_specs[name] = np.asarray(initial_value, dtype=np.float64)
+
+        total_size = sum(initial_value.size for initial_value in array_specs.values())
+        max_size = max([initial_value.size for initial_value in array_specs.values()], default=0)
+
+        # One block for all states. The scratch arrays are shared, because the filters are updated one after another.
+        self.values = np.zeros(total_size)
+        self._scratch = np.zeros((2, max_size))
+        self._mask = np.zeros(max_size, dtype=bool)
+
+        self.filters = {}
+        offset = 0
+        for name, (initial_value, alpha_decay, alpha_rise) in filter_specs.items():
+            if name not in array_specs:
+                self.filters[name] = ScalarExpFilter(initial_value, alpha_decay=alpha_decay, alpha_rise=alpha_rise)
+                continue
+
+            initial_value = array_specs[name]
+            size = initial_value.size
+            shape = initial_value.shape
+
+            value = self.values[offset:offset + size].reshape(shape)
+            value[...] = initial_value
+            offset += size
+
+            self.filters[name] = BankedExpFilter(
+                value,
+                self._scratch[:, :size].reshape((2,) + shape),
+                self._mask[:size].reshape(shape),
+                alpha_decay=alpha_decay,
+                alpha_rise=alpha_rise
+            )
+
+
 class Melbank():
     """This class implements a Mel Filter Bank.
     In other words it is a filter bank with triangular shaped bands
@@ -236,6 +376,63 @@ class Melbank():
         center_frequencies_mel = frequencies_mel[1:-1]
         return center_frequencies_mel, lower_edges_mel, upper_edges_mel
 
+    def compute_melbands(self, num_mel_bands=12, freq_min=64, freq_max=8000,
+                         num_fft_bands=513, sample_rate=16000):
+        """
+        Returns the mel bands in a compact form.
+        Every triangular band is only nonzero over a small contiguous range of fft bands,
+        so only the start, the length and the weights of this range are stored.
+        The weights are the same as the nonzero values of compute_melmat.
+        Parameters
+        ----------
+        See compute_melmat.
+        Returns
+        -------
+        bands : tuple (ndarray <num_mel_bands>, ndarray <num_mel_bands>, ndarray)
+            Index of the first fft band, number of fft bands and the concatenated weights of all mel bands.
+            Every mel band covers at least one fft band, so empty bands have a single weight of 0.
+        frequencies : tuple (ndarray <num_mel_bands>, ndarray <num_fft_bands>)
+            Center frequencies of the mel bands, center frequencies of fft spectrum.
+        """
+        center_frequencies_mel, lower_edges_mel, upper_edges_mel = self.melfrequencies_mel_filterbank(
+            num_mel_bands,
+            freq_min,
+            freq_max,
+            num_fft_bands
+        )
+
+        center_frequencies_hz = self.mel_to_hertz(center_frequencies_mel)
+        lower_edges_hz = self.mel_to_hertz(lower_edges_mel)
+        upper_edges_hz = self.mel_to_hertz(upper_edges_mel)
+        freqs = linspace(0.0, sample_rate / 2.0, num_fft_bands)
+
+        band_starts = zeros(num_mel_bands, dtype=int)
+        band_lengths = zeros(num_mel_bands, dtype=int)
+        band_weights = []
+
+        for imelband, (center, lower, upper) in enumerate(zip(
+                center_frequencies_hz, lower_edges_hz, upper_edges_hz)):
+
+            start = np.searchsorted(freqs, lower, side="left")
+            end = np.searchsorted(freqs, upper, side="right")
+            if start >= end:
+                start = min(start, num_fft_bands - 1)
+                band_starts[imelband] = start
+                band_lengths[imelband] = 1
+                band_weights.append(zeros(1))
+                continue
+
+            band_freqs = freqs[start:end]
+            band_starts[imelband] = start
+            band_lengths[imelband] = end - start
+            band_weights.append(np.where(
+                band_freqs < center,
+                (band_freqs - lower) / (center - lower),
+                (upper - band_freqs) / (upper - center)
+            ))
+
+        return (band_starts, band_lengths, np.concatenate(band_weights)), (center_frequencies_mel, freqs)
+
     def compute_melmat(self, num_mel_bands=12, freq_min=64, freq_max=8000,
                        num_fft_bands=513, sample_rate=16000):
         """
@@ -26,9 +26,14 @@ from libs.effects.effect_rods import EffectRods  # pylint: disable=E0611, E0401
 from libs.effects.effect_wave import EffectWave  # pylint: disable=E0611, E0401
 from libs.effects.effect_off import EffectOff  # pylint: disable=E0611, E0401
 from libs.effects_enum import EffectsEnum  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
+from libs.config_diff import ConfigDiff  # pylint: disable=E0611, E0401
+from libs.wakeup_counter import WakeupCounter  # pylint: disable=E0611, E0401
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+from libs.audio_clock import AudioClock  # pylint: disable=E0611, E0401
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
 
-from time import time
+from collections import OrderedDict
+from time import perf_counter
 import logging
 
 # Output array should look like:
@@ -36,52 +41,94 @@ import logging
 
 
 class EffectService():
+    # The effect classes by their enum. The benchmarks use it too, to run every effect.
+    AVAILABLE_EFFECTS = {
+        EffectsEnum.effect_off: EffectOff,
+        EffectsEnum.effect_single: EffectSingle,
+        EffectsEnum.effect_gradient: EffectGradient,
+        EffectsEnum.effect_fade: EffectFade,
+        EffectsEnum.effect_sync_fade: EffectSyncFade,
+        EffectsEnum.effect_slide: EffectSlide,
+        EffectsEnum.effect_bubble: EffectBubble,
+        EffectsEnum.effect_twinkle: EffectTwinkle,
+        EffectsEnum.effect_pendulum: EffectPendulum,
+        EffectsEnum.effect_rods: EffectRods,
+        EffectsEnum.effect_advanced_scroll: EffectAdvancedScroll,
+        EffectsEnum.effect_scroll: EffectScroll,
+        EffectsEnum.effect_energy: EffectEnergy,
+        EffectsEnum.effect_wavelength: EffectWavelength,
+        EffectsEnum.effect_bars: EffectBars,
+        EffectsEnum.effect_power: EffectPower,
+        EffectsEnum.effect_beat: EffectBeat,
+        EffectsEnum.effect_wave: EffectWave,
+        EffectsEnum.effect_beat_slide: EffectBeatSlide,
+        EffectsEnum.effect_spectrum_analyzer: EffectSpectrumAnalyzer,
+        EffectsEnum.effect_vu_meter: EffectVuMeter,
+        EffectsEnum.effect_wiggle: EffectWiggle,
+        EffectsEnum.effect_direction_changer: EffectDirectionChanger,
+        EffectsEnum.effect_beat_twinkle: EffectBeatTwinkle,
+        EffectsEnum.effect_segment_color: EffectSegmentColor,
+        EffectsEnum.effect_fireplace: EffectFireplace
+    }
+
     def start(self, device):
         """
         Start the effect service process.
         You can change the effect by adding a new effect enum inside the enum_queue.
         """
+        self.init_effect_service(device)
+        MetricsRegistry.instance().process_name = "effect_service"
+
+        while not self._cancel_token:
+            try:
+                # Limit the fps to decrease lags caused by 100 percent CPU.
+                self.wait_for_frame()
+                self._wakeup_counter.count()
+                self.effect_routine()
+            except KeyboardInterrupt:
+                break
+
+        self.logger.info(
+            f'Effects component stopped. Device: {self._device.device_config["device_name"]}')
+
+    def wait_for_frame(self):
+        """
+        Sleep until the next frame is due.
+        With the audio render clock, every published audio frame is rendered exactly once.
+        """
+        if self._render_clock == "audio":
+            self._audio_clock.wait(self._frame_scheduler)
+        else:
+            self._frame_scheduler.wait()
+
+    def init_effect_service(self, device):
+        """
+        Prepare the effect service without starting the loop.
+        The RenderEngine uses this to step the effects of all devices inside one process.
+        """
         self.logger = logging.getLogger(__name__)
 
         self._device = device
         self.logger.info(
             f'Starting Effect Service component from device: {self._device.device_config["device_name"]}')
 
-        self.ten_seconds_counter = time()
-        self.start_time = time()
-
-        self._fps_limiter = FPSLimiter(self._device.device_config["fps"])
-
-        self._available_effects = {
-            EffectsEnum.effect_off: EffectOff,
-            EffectsEnum.effect_single: EffectSingle,
-            EffectsEnum.effect_gradient: EffectGradient,
-            EffectsEnum.effect_fade: EffectFade,
-            EffectsEnum.effect_sync_fade: EffectSyncFade,
-            EffectsEnum.effect_slide: EffectSlide,
-            EffectsEnum.effect_bubble: EffectBubble,
-            EffectsEnum.effect_twinkle: EffectTwinkle,
-            EffectsEnum.effect_pendulum: EffectPendulum,
-            EffectsEnum.effect_rods: EffectRods,
-            EffectsEnum.effect_advanced_scroll: EffectAdvancedScroll,
-            EffectsEnum.effect_scroll: EffectScroll,
-            EffectsEnum.effect_energy: EffectEnergy,
-            EffectsEnum.effect_wavelength: EffectWavelength,
-            EffectsEnum.effect_bars: EffectBars,
-            EffectsEnum.effect_power: EffectPower,
-            EffectsEnum.effect_beat: EffectBeat,
-            EffectsEnum.effect_wave: EffectWave,
-            EffectsEnum.effect_beat_slide: EffectBeatSlide,
-            EffectsEnum.effect_spectrum_analyzer: EffectSpectrumAnalyzer,
-            EffectsEnum.effect_vu_meter: EffectVuMeter,
-            EffectsEnum.effect_wiggle: EffectWiggle,
-            EffectsEnum.effect_direction_changer: EffectDirectionChanger,
-            EffectsEnum.effect_beat_twinkle: EffectBeatTwinkle,
-            EffectsEnum.effect_segment_color: EffectSegmentColor,
-            EffectsEnum.effect_fireplace: EffectFireplace
-        }
-
-        self._initialized_effects = {}
+        self.ten_seconds_counter = perf_counter()
+
+        self._frame_scheduler = FrameScheduler(self._device.device_config["fps"])
+        self._audio_clock = AudioClock(self._device.audio_ring_buffer)
+        self._render_clock = self._device.config["general_settings"]["render_clock"]
+        self._metrics = MetricsRegistry.instance()
+        self._metric_labels = {"device": self._device.device_config["device_name"]}
+        self._last_frame_start = None
+        self._wakeup_counter = WakeupCounter(
+            f'Effect Service | Device: {self._device.device_config["device_name"]}',
+            self._device.config["general_settings"]["measure_wakeups"])
+
+        self._available_effects = self.AVAILABLE_EFFECTS
+
+        # The last used effects are cached, so switching between them is fast. The oldest one is removed first.
+        self._initialized_effects = OrderedDict()
+        self._effect_cache_size = max(1, self._device.config["general_settings"]["effect_cache_size"])
         self._current_effect = {}
 
         try:
@@ -96,36 +143,28 @@ class EffectService():
         # A token to cancel the while loop.
         self._cancel_token = False
         self._skip_effect = False
+        self._current_notification_in = None
         self.logger.info(
             f'Effects component started. Device: {self._device.device_config["device_name"]}')
 
-        while not self._cancel_token:
-            try:
-                self.effect_routine()
-            except KeyboardInterrupt:
-                break
-
-        self.logger.info(
-            f'Effects component stopped. Device: {self._device.device_config["device_name"]}')
-
     def effect_routine(self):
-        # Limit the fps to decrease lags caused by 100 percent CPU.
-        self._fps_limiter.fps_limiter()
-
         # Check the notification queue.
-        if not self._device.device_notification_queue_in.empty():
-            self._current_notification_in = self._device.device_notification_queue_in.get_blocking()
+        if not self._device.effect_notification_queue_in.empty():
+            self._current_notification_in = self._device.effect_notification_queue_in.get_blocking()
             self.logger.debug(
-                f'Effects Service has a new notification in. Notification: {self._current_notification_in} | Device: {self._device.device_config["device_name"]}')
+                f'Effects Service has a new notification in. Notification: {self._current_notification_in.notification_enum} | Device: {self._device.device_config["device_name"]}')
 
-        if hasattr(self, "_current_notification_in"):
-            if self._current_notification_in is NotificationEnum.config_refresh:
+        if self._current_notification_in is not None:
+            notification_enum = self._current_notification_in.notification_enum
+            if notification_enum is NotificationEnum.config_refresh:
                 self.refresh()
-            elif self._current_notification_in is NotificationEnum.process_continue:
+            elif notification_enum is NotificationEnum.config_update:
+                self.update_config(self._current_notification_in.payload)
+            elif notification_enum is NotificationEnum.process_continue:
                 self._skip_effect = False
-            elif self._current_notification_in is NotificationEnum.process_pause:
+            elif notification_enum is NotificationEnum.process_pause:
                 self._skip_effect = True
-            elif self._current_notification_in is NotificationEnum.process_stop:
+            elif notification_enum is NotificationEnum.process_stop:
                 self.stop()
 
         # Reset the current in notification, to do it only one time.
@@ -147,25 +186,51 @@ class EffectService():
             self.logger.error("Effect Service | Could not find effect.")
             return
 
-        if(not(self._current_effect in self._initialized_effects.keys())):
-            if self._current_effect in self._available_effects.keys():
-                self._initialized_effects[self._current_effect] = self._available_effects[self._current_effect](
-                    self._device)
-            else:
-                self.logger.error(
-                    f"Could not find effect: {self._current_effect}")
-
-        self.end_time = time()
-        if time() - self.ten_seconds_counter > 10:
-            self.ten_seconds_counter = time()
-            self.time_dif = self.end_time - self.start_time
-            self.fps = 1 / self.time_dif
+        current_effect = self.get_effect(self._current_effect)
+        if current_effect is None:
+            return
+
+        if perf_counter() - self.ten_seconds_counter > 10:
+            self.ten_seconds_counter = perf_counter()
+            statistics = self._frame_scheduler.get_statistics()
+            self.fps = statistics["fps"]
             self.logger.info(
-                f'FPS: {self.fps:.2f} | Device: {self._device.device_config["device_name"]}')
+                f'FPS: {self.fps:.2f} | Jitter: {statistics["jitter"] * 1000:.2f} ms | '
+                f'Skipped frames: {statistics["skipped_frames"]} | Device: {self._device.device_config["device_name"]}')
+
+        frame_start = perf_counter()
+        if self._last_frame_start is not None:
+            self._metrics.observe("effect_frame_interval_seconds", frame_start - self._last_frame_start, self._metric_labels)
+        self._last_frame_start = frame_start
+
+        current_effect.start_frame()
+        current_effect.run()
+
+        self._metrics.observe("effect_run_seconds", perf_counter() - frame_start, self._metric_labels)
+        self._metrics.increment("effect_frames_total", 1, self._metric_labels)
+        self._metrics.set_gauge("effect_skipped_frames", self._frame_scheduler.skipped_frames, self._metric_labels)
+        self._metrics.report(self._device.stats_queue)
+
+    def get_effect(self, effect_enum):
+        """
+        Return the instance of the effect. It is created on the first use and cached for the next switches.
+        """
+        if effect_enum in self._initialized_effects:
+            self._initialized_effects.move_to_end(effect_enum)
+            return self._initialized_effects[effect_enum]
+
+        if effect_enum not in self._available_effects:
+            self.logger.error(f"Could not find effect: {effect_enum}")
+            return None
 
-        self.start_time = time()
+        effect = self._available_effects[effect_enum](self._device)
+        self._initialized_effects[effect_enum] = effect
 
-        self._initialized_effects[self._current_effect].run()
+        while len(self._initialized_effects) > self._effect_cache_size:
+            removed_effect_enum, _ = self._initialized_effects.popitem(last=False)
+            self.logger.debug(f"Removed effect from the cache: {removed_effect_enum}")
+
+        return effect
 
     def stop(self):
         self.logger.info("Stopping effect component...")
@@ -173,11 +238,47 @@ class EffectService():
 
     def refresh(self):
         self.logger.debug("Refreshing effects...")
-        self._initialized_effects = {}
-
-        self._fps_limiter = FPSLimiter(self._device.device_config["fps"])
+        self.refresh_settings()
 
         # Notify the master component, that I'm finished.
-        self._device.device_notification_queue_out.put_blocking(
+        self._device.device_notification_queue_out.put_none_blocking(
             NotificationEnum.config_refresh_finished)
         self.logger.debug("Effects refreshed.")
+
+    def refresh_settings(self):
+        """
+        Apply the current config to the cached effects and the frame scheduler.
+        """
+        self._effect_cache_size = max(1, self._device.config["general_settings"]["effect_cache_size"])
+
+        # Keep the effects, which do not depend on the changed settings.
+        reusable_effects = OrderedDict()
+        for effect_enum, effect in self._initialized_effects.items():
+            if effect.is_reusable():
+                effect.reset()
+                reusable_effects[effect_enum] = effect
+        self._initialized_effects = reusable_effects
+
+        while len(self._initialized_effects) > self._effect_cache_size:
+            self._initialized_effects.popitem(last=False)
+
+        # Keep the deadlines, so a config change does not shift the frames.
+        self._frame_scheduler.set_fps(self._device.device_config["fps"])
+        self._render_clock = self._device.config["general_settings"]["render_clock"]
+        self._metric_labels = {"device": self._device.device_config["device_name"]}
+        self._wakeup_counter.enabled = self._device.config["general_settings"]["measure_wakeups"]
+
+    def update_config(self, config_diff):
+        """
+        Apply the changed config keys in place and keep running.
+        The effects read their settings every frame, so only effects built with other colors or sizes are recreated.
+        Nobody waits for the update, so it is not answered like a config refresh.
+        """
+        self.logger.debug("Updating effect config...")
+        ConfigDiff.apply(self._device.config, config_diff)
+        self.refresh_settings()
+
+    def get_frame_scheduler(self):
+        return self._frame_scheduler
+
+    frame_scheduler = property(get_frame_scheduler)
@@ -1,10 +1,12 @@
 from libs.color_service import ColorService  # pylint: disable=E0611, E0401
 from libs.math_service import MathService  # pylint: disable=E0611, E0401
-from libs.dsp import DSP  # pylint: disable=E0611, E0401
+from libs.dsp import SmoothingFilters  # pylint: disable=E0611, E0401
+from libs.latency_tracker import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
 
-from collections import deque
-from time import time
+from time import perf_counter
 import numpy as np
+import json
 
 
 class Effect:
@@ -18,32 +20,36 @@ class Effect:
         self._config_gradients = self._config["gradients"]
 
         self._device_config = self._device.device_config
-        self._output_queue = self._device.output_queue
-        self._audio_queue = self._device.audio_queue
-
-        # Initialize color service and build gradients.
-        self._color_service = ColorService(self._config, self._device_config)
-        self._color_service.build_gradients()
-        self._color_service.build_fadegradients()
-        self._color_service.build_slidearrays()
-        self._color_service.build_slidearrays()
-        self._color_service.build_bubblearrays()
+        self._frame_buffer = self._device.frame_buffer
+        self._audio_ring_buffer = self._device.audio_ring_buffer
+        self._last_audio_sequence = 0
+        # The audio frames are copied into this buffer, so the writer can not change them while the effect runs.
+        self._audio_record = self._audio_ring_buffer.create_record_buffer()
+        # The beat detections of the AudioProcessService. Only detections after this audio frame are new.
+        self._last_freq_detect_sequence = self._audio_ring_buffer.sequence
+        self._freq_detect_sequences = None
+        self._freq_strengths = None
+        # The stage timestamps of the current frame. They are published together with the frame.
+        self._frame_timestamps = np.zeros(LatencyTracker.TIMESTAMP_COUNT)
+
+        # Get the color service with the built gradients. The arrays are shared by all effects of the process.
+        self._color_service = ColorService.cached(self._config, self._device_config)
 
         # Init math service.
         self._math_service = MathService()
 
-        # Init dsp.
-        self._dsp = DSP(self._config, self._device_config)
-
         # Init some variables for the effects.
         self.led_count = self._device_config["led_count"]
         self.n_fft_bins = self._config["general_settings"]["n_fft_bins"]
 
+        # Init the smoothing filters. The audio analysis itself runs only inside the AudioProcessService.
+        self._smoothing = SmoothingFilters(self.n_fft_bins, self.led_count)
+
         self.prev_spectrum = np.array([self.led_count // 2])
         self.freq_channel_history = 40
         self.beat_count = 0
-        self.freq_channels = [deque(maxlen=self.freq_channel_history)
-                              for i in range(self.n_fft_bins)]
+        # Only used, if the effect detects the beats itself. It is created, when the local detection is switched on.
+        self._beat_detector = None
 
         self.output = np.array(
             [[0 for i in range(self.led_count)] for i in range(3)])
@@ -52,39 +58,8 @@ class Effect:
 
         self.speed_counter = 0
 
-        self.current_freq_detects = {
-            "beat": False,
-            "low": False,
-            "mid": False,
-            "high": False
-        }
-        self.prev_freq_detects = {
-            "beat": 0,
-            "low": 0,
-            "mid": 0,
-            "high": 0
-        }
-        self.detection_ranges = {
-            "beat": (0, int(self._config["general_settings"]["n_fft_bins"] * 0.13)),
-            "low": (int(self._config["general_settings"]["n_fft_bins"] * 0.13),
-                    int(self._config["general_settings"]["n_fft_bins"] * 0.4)),
-            "mid": (int(self._config["general_settings"]["n_fft_bins"] * 0.4),
-                    int(self._config["general_settings"]["n_fft_bins"] * 0.7)),
-            "high": (int(self._config["general_settings"]["n_fft_bins"] * 0.8),
-                     int(self._config["general_settings"]["n_fft_bins"]))
-        }
-        self.min_detect_amplitude = {
-            "beat": 0.7,
-            "low": 0.5,
-            "mid": 0.3,
-            "high": 0.3
-        }
-        self.min_percent_diff = {
-            "beat": 70,
-            "low": 100,
-            "mid": 50,
-            "high": 30
-        }
+        self.current_freq_detects = {detection_type: False for detection_type in BeatDetector.DETECTION_TYPES}
+        self.current_freq_strengths = {detection_type: 0.0 for detection_type in BeatDetector.DETECTION_TYPES}
 
         # Setup for "Power" (don't change these).
         self.power_indexes = []
@@ -93,40 +68,84 @@ class Effect:
         # Setup for "Wave" (don't change this).
         self.wave_wipe_count = 0
 
+        # Remember the config this instance was built with, so the EffectService can decide if it can be reused.
+        self._config_signature = self.get_config_signature()
+
     def run(self):
         raise NotImplementedError
 
-    def update_freq_channels(self, y):
-        for i in range(len(y)):
-            self.freq_channels[i].appendleft(y[i])
+    def start_frame(self):
+        """
+        Called by the EffectService before run(). Starts the timestamps of the new frame.
+        """
+        self._frame_timestamps.fill(0)
+        self._frame_timestamps[LatencyTracker.TIMESTAMP_EFFECT_START] = perf_counter()
+
+    def get_config_signature(self):
+        """
+        Return the part of the current config, which the constructor of an effect depends on.
+        The effect settings are read in every frame, so they are not part of it.
+        """
+        return json.dumps([
+            self._device.config["colors"],
+            self._device.config["gradients"],
+            self._device.config["general_settings"]["n_fft_bins"],
+            self._device.device_config["led_count"],
+            self._device.device_config["led_mid"],
+            self._device.device_config["effects"]["effect_bubble"]
+        ], sort_keys=True)
+
+    def is_reusable(self):
+        """
+        Check if the effect was built with the same config, which the device uses now.
+        """
+        return self._config_signature == self.get_config_signature()
+
+    def reset(self):
+        """
+        Prepare a cached effect for a new config with the same signature.
+        Only the config references are updated, so the effect continues where it stopped.
+        """
+        self._config = self._device.config
+        self._config_colours = self._config["colors"]
+        self._config_gradients = self._config["gradients"]
+        self._device_config = self._device.device_config
+        # Do not show the beats, which were detected while the effect was not running.
+        self._last_freq_detect_sequence = self._audio_ring_buffer.sequence
+        self._beat_detector = None
+
+    def update_freq_channels(self, y, local_detection=False):
+        """
+        Add the mel spectrum to the history of the own beat detector. It is only kept with local_detection,
+        so a detector switched on later starts with a fresh history instead of an old one.
+        """
+        if not local_detection:
+            self._beat_detector = None
+            return
+
+        if self._beat_detector is None:
+            self._beat_detector = BeatDetector(self.n_fft_bins, self.freq_channel_history)
+        self._beat_detector.update(y)
 
-    def detect_freqs(self):
+    def detect_freqs(self, local_detection=False):
         """
         Function that updates current_freq_detects. Any visualisation algorithm can check if
         there is currently a beat, low, mid, or high by querying the self.current_freq_detects dict.
+
+        By default the detections of the AudioProcessService are used, so all devices show the same beats.
+        A detection is shown once, even if the effect skipped the audio frame it was detected in.
+        With local_detection the effect detects the beats in its own history instead.
         """
-        n_fft_bins = self._config["general_settings"]["n_fft_bins"]
-        channel_avgs = []
-        differences = []
-
-        for i in range(n_fft_bins):
-            channel_avgs.append(
-                sum(self.freq_channels[i]) / len(self.freq_channels[i]))
-            if channel_avgs[i] != 0:
-                differences.append(
-                    ((self.freq_channels[i][0] - channel_avgs[i]) * 100) // channel_avgs[i])
-            else:
-                differences.append(0)
-        for i in ["beat", "low", "mid", "high"]:
-            if (any(differences[j] >= self.min_percent_diff[i]
-                    and self.freq_channels[j][0] >= self.min_detect_amplitude[i]
-                    for j in range(*self.detection_ranges[i]))
-                and (time() - self.prev_freq_detects[i] > 0.2)
-                    and len(self.freq_channels[0]) == self.freq_channel_history):
-                self.prev_freq_detects[i] = time()
-                self.current_freq_detects[i] = True
-            else:
-                self.current_freq_detects[i] = False
+        if local_detection or self._freq_detect_sequences is None:
+            if self._beat_detector is not None:
+                self.current_freq_detects.update(self._beat_detector.detect())
+                self.current_freq_strengths.update(self._beat_detector.current_freq_strengths)
+            return
+
+        for index, detection_type in enumerate(BeatDetector.DETECTION_TYPES):
+            self.current_freq_detects[detection_type] = bool(self._freq_detect_sequences[index] > self._last_freq_detect_sequence)
+            self.current_freq_strengths[detection_type] = float(self._freq_strengths[index])
+        self._last_freq_detect_sequence = self._last_audio_sequence
 
     def get_roll_steps(self, current_speed):
         """
@@ -153,9 +172,14 @@ class Effect:
         return steps
 
     def get_audio_data(self):
-        audio_data = None
-        if not self._audio_queue.empty():
-            audio_data = self._audio_queue.get_blocking()
+        # Only return a frame once, like the audio queue did before.
+        audio_data = self._audio_ring_buffer.read_latest(self._last_audio_sequence, self._audio_record)
+        if audio_data is not None:
+            self._last_audio_sequence = audio_data["sequence"]
+            self._freq_detect_sequences = audio_data["freq_detect_sequences"]
+            self._freq_strengths = audio_data["freq_strengths"]
+            self._frame_timestamps[LatencyTracker.TIMESTAMP_CAPTURE] = audio_data["timestamp"]
+            self._frame_timestamps[LatencyTracker.TIMESTAMP_AUDIO_PUBLISH] = audio_data["publish_timestamp"]
         return audio_data
 
     def get_mel(self, audio_data):
@@ -187,10 +211,12 @@ class Effect:
         return audio_vol
 
     def queue_output_array_blocking(self, output_array):
-        self._output_queue.put_blocking(output_array)
+        self._frame_timestamps[LatencyTracker.TIMESTAMP_EFFECT_PUBLISH] = perf_counter()
+        self._frame_buffer.publish(output_array, self._frame_timestamps)
 
     def queue_output_array_noneblocking(self, output_array):
-        self._output_queue.put_none_blocking(output_array)
+        self._frame_timestamps[LatencyTracker.TIMESTAMP_EFFECT_PUBLISH] = perf_counter()
+        self._frame_buffer.publish(output_array, self._frame_timestamps)
 
     def get_effect_config(self, effect_id):
         # Check if we use the global "all_devices" settings or the device specific one.
@@ -17,10 +17,10 @@ class EffectBars(Effect):
 
         # Bit of fiddling with the y values.
         y = np.copy(self._math_service.interpolate(y, led_count // 2))
-        self._dsp.common_mode.update(y)
+        self._smoothing.common_mode.update(y)
         self.prev_spectrum = np.copy(y)
         # Color channel mappings.
-        r = self._dsp.r_filt.update(y - self._dsp.common_mode.value)
+        r = self._smoothing.r_filt.update(y - self._smoothing.common_mode.value)
         r = np.array([j for i in zip(r, r) for j in i])
         # Split y into [resolution] chunks and calculate the average of each.
         max_values = np.array([max(i) for i in np.array_split(r, effect_config["resolution"])])
@@ -25,8 +25,8 @@ class EffectBeat(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_channels(y, effect_config["local_beat_detection"])
+        self.detect_freqs(effect_config["local_beat_detection"])
 
         output = np.zeros((3, led_count))
 
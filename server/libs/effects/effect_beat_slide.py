@@ -19,8 +19,8 @@ class EffectBeatSlide(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_channels(y, effect_config["local_beat_detection"])
+        self.detect_freqs(effect_config["local_beat_detection"])
 
         self.current_color = self._color_service.colour(effect_config["color"])
 
@@ -17,8 +17,8 @@ class EffectEnergy(Effect):
             return
 
         y = np.copy(y)
-        self._dsp.gain.update(y)
-        y /= self._dsp.gain.value
+        self._smoothing.gain.update(y)
+        y /= self._smoothing.gain.value
         scale = effect_config["scale"]
         # Scale by the width of the LED strip.
         y *= float((led_count * scale) - 1)
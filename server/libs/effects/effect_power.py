@@ -17,15 +17,15 @@ class EffectPower(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_channels(y, effect_config["local_beat_detection"])
+        self.detect_freqs(effect_config["local_beat_detection"])
 
         # Bit of fiddling with the y values.
         y = np.copy(self._math_service.interpolate(y, led_count // 2))
-        self._dsp.common_mode.update(y)
+        self._smoothing.common_mode.update(y)
         self.prev_spectrum = np.copy(y)
         # Color channel mappings.
-        r = self._dsp.r_filt.update(y - self._dsp.common_mode.value)
+        r = self._smoothing.r_filt.update(y - self._smoothing.common_mode.value)
         r = np.array([j for i in zip(r, r) for j in i])
         # If the r array is smaller than the led_count, the r array will be filled with the last value.
         r_len_before_resize = len(r)
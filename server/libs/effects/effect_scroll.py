@@ -29,7 +29,7 @@ class EffectScroll(Effect):
         y = y**4.0
         n_pixels = led_count
         y = np.copy(self._math_service.interpolate(y, (n_pixels // 2)))
-        self._dsp.common_mode.update(y)
+        self._smoothing.common_mode.update(y)
         self.prev_spectrum = np.copy(y)
 
         y = np.clip(y, 0, 1)
@@ -14,8 +14,8 @@ class EffectWave(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_channels(y, effect_config["local_beat_detection"])
+        self.detect_freqs(effect_config["local_beat_detection"])
 
         """Effect that flashes to the beat with scrolling coloured bits"""
         if self.current_freq_detects["beat"]:
@@ -18,10 +18,10 @@ class EffectWavelength(Effect):
 
         # Interpolate y to get an array, which is half as long as the LED strip.
         y = np.copy(self._math_service.interpolate(y, led_count // 2))
-        self._dsp.common_mode.update(y)
+        self._smoothing.common_mode.update(y)
 
         # Color channel mappings.
-        r = self._dsp.r_filt.update(y - self._dsp.common_mode.value)
+        r = self._smoothing.r_filt.update(y - self._smoothing.common_mode.value)
 
         # Expand the array twice the size and mirror the values.
         # [0,1,2,3]
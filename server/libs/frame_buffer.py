@@ -0,0 +1,178 @@
+from libs.latency_tracker import LatencyTracker  # pylint: disable=E0611, E0401
+
+from multiprocessing.sharedctypes import RawArray, RawValue
+from multiprocessing import Pipe
+import numpy as np
+import logging
+
+
+class FrameBuffer():
+    """
+    Shared memory framebuffer between the EffectService and the OutputService of one device.
+
+    The effect quantizes every output array to uint8 and writes it into the next of the
+    (by default three) frame slots, then publishes the slot with a sequence counter.
+    The output reads the latest published frame as a read-only numpy view.
+    A frame stays valid until the effect published (slots - 1) newer frames.
+
+    The output can sleep until a new frame arrives. The signal is a pipe, so it can be waited on
+    together with queues using multiprocessing.connection.wait.
+
+    Every slot also stores the timestamps of the frame, which the LatencyTracker of the output evaluates.
+    """
+
+    def __init__(self, channels, led_count, slots=3):
+        self.logger = logging.getLogger(__name__)
+
+        self._channels = channels
+        self._led_count = led_count
+        self._slots = slots
+
+        # The raw arrays are created before the processes are started, so both processes map the same memory.
+        self._raw_frames = RawArray("B", self._slots * self._channels * self._led_count)
+        # Index 0 is the published sequence, the other entries are the sequences of the slots.
+        self._raw_sequences = RawArray("q", self._slots + 1)
+        self._raw_timestamps = RawArray("d", self._slots * LatencyTracker.TIMESTAMP_COUNT)
+
+        # Only one byte is written into the pipe until the reader cleared the signal.
+        self._signal_pending = RawValue("b", 0)
+        self._signal_reader, self._signal_writer = Pipe(duplex=False)
+
+        self._create_views()
+
+    def __getstate__(self):
+        # Only the raw shared memory can be transferred to a new process. The views are rebuilt afterwards.
+        return {
+            "channels": self._channels,
+            "led_count": self._led_count,
+            "slots": self._slots,
+            "raw_frames": self._raw_frames,
+            "raw_sequences": self._raw_sequences,
+            "raw_timestamps": self._raw_timestamps,
+            "signal_pending": self._signal_pending,
+            "signal_reader": self._signal_reader,
+            "signal_writer": self._signal_writer
+        }
+
+    def __setstate__(self, state):
+        self.logger = logging.getLogger(__name__)
+
+        self._channels = state["channels"]
+        self._led_count = state["led_count"]
+        self._slots = state["slots"]
+        self._raw_frames = state["raw_frames"]
+        self._raw_sequences = state["raw_sequences"]
+        self._raw_timestamps = state["raw_timestamps"]
+        self._signal_pending = state["signal_pending"]
+        self._signal_reader = state["signal_reader"]
+        self._signal_writer = state["signal_writer"]
+
+        self._create_views()
+
+    def _create_views(self):
+        self._frames = np.frombuffer(self._raw_frames, dtype=np.uint8).reshape(self._slots, self._channels, self._led_count)
+        sequences = np.frombuffer(self._raw_sequences, dtype=np.int64)
+        self._published_sequence = sequences[0:1]
+        self._slot_sequences = sequences[1:]
+        self._timestamps = np.frombuffer(self._raw_timestamps, dtype=np.float64).reshape(self._slots, LatencyTracker.TIMESTAMP_COUNT)
+
+        self._read_frames = self._frames.view()
+        self._read_frames.flags.writeable = False
+        self._read_timestamps = self._timestamps.view()
+        self._read_timestamps.flags.writeable = False
+
+        # Reused by the writer to clip the effect output before the quantization.
+        self._clip_buffer = None
+
+    def publish(self, output_array, timestamps=None):
+        """
+        Quantize the output array of an effect and publish it. Only one process is allowed to write.
+        Missing channels or LEDs are filled with zeros, additional ones are ignored.
+        timestamps are the perf_counter times of the frame stages, see LatencyTracker.
+        """
+        if self._clip_buffer is None:
+            self._clip_buffer = np.zeros((self._channels, self._led_count))
+
+        output_array = np.asarray(output_array)
+        channels = min(len(output_array), self._channels)
+        led_count = min(output_array.shape[1], self._led_count)
+
+        clip_buffer = self._clip_buffer[:channels, :led_count]
+        np.clip(output_array[:channels, :led_count], 0, 255, out=clip_buffer)
+
+        sequence = int(self._published_sequence[0]) + 1
+        slot = sequence % self._slots
+
+        # Mark the slot as invalid while it is written.
+        self._slot_sequences[slot] = 0
+
+        frame = self._frames[slot]
+        frame[:channels, :led_count] = clip_buffer
+        if channels < self._channels:
+            frame[channels:] = 0
+        if led_count < self._led_count:
+            frame[:, led_count:] = 0
+
+        if timestamps is None:
+            self._timestamps[slot] = 0
+        else:
+            self._timestamps[slot] = timestamps
+
+        self._slot_sequences[slot] = sequence
+        self._published_sequence[0] = sequence
+
+        # Wake up the reader.
+        if not self._signal_pending.value:
+            self._signal_pending.value = 1
+            self._signal_writer.send_bytes(b"\0")
+
+    def clear_signal(self):
+        """
+        Reset the new frame signal. Call it before read_latest(), so no frame can be missed.
+        """
+        while self._signal_reader.poll():
+            self._signal_reader.recv_bytes()
+        self._signal_pending.value = 0
+
+    def read_latest(self, last_sequence=0):
+        """
+        Return the latest frame, if it is newer than last_sequence.
+        Returns
+        -------
+        frame_data: dict
+            Dict containing "frame" (uint8 array with the shape (channels, led_count)), "timestamps" and "sequence".
+            None if there is no new frame.
+        """
+        sequence = int(self._published_sequence[0])
+        if sequence == 0 or sequence == last_sequence:
+            return None
+
+        slot = sequence % self._slots
+        if self._slot_sequences[slot] != sequence:
+            return None
+
+        return {
+            "frame": self._read_frames[slot],
+            "timestamps": self._read_timestamps[slot],
+            "sequence": sequence
+        }
+
+    def get_sequence(self):
+        return int(self._published_sequence[0])
+
+    def get_channels(self):
+        return self._channels
+
+    def get_led_count(self):
+        return self._led_count
+
+    def get_signal(self):
+        """
+        Return the connection, which becomes readable when a new frame was published.
+        """
+        return self._signal_reader
+
+    sequence = property(get_sequence)
+    channels = property(get_channels)
+    led_count = property(get_led_count)
+    signal = property(get_signal)
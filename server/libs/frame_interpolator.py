@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class FrameInterpolator():
+    """
+    Linear interpolation between the frames of the effect, for general_settings.render_interpolation.
+
+    If the effects render once per audio frame, the output can still run at the higher fps of the device.
+    Every new effect frame becomes the target of a blend, which starts at the currently shown frame
+    and takes as long as the interval between the last two effect frames. This adds one effect frame of latency.
+    """
+
+    # Longer intervals, for example after a pause, are not blended over their whole length.
+    MAX_INTERVAL = 0.1
+
+    def __init__(self, channels, led_count):
+        self._start_frame = np.zeros((channels, led_count), dtype=np.float32)
+        self._target_frame = np.zeros((channels, led_count), dtype=np.float32)
+        self._current_frame = np.zeros((channels, led_count), dtype=np.float32)
+        self._output_frame = np.zeros((channels, led_count), dtype=np.uint8)
+
+        self._target_time = None
+        self._interval = 0.0
+        self._finished = True
+
+    def set_target(self, frame, now):
+        """
+        Start a new blend to the frame. now is the perf_counter time, when the frame arrived.
+        """
+        if self._target_time is None:
+            self._current_frame[:] = frame
+            self._interval = 0.0
+        else:
+            self._interval = min(now - self._target_time, self.MAX_INTERVAL)
+
+        self._start_frame[:] = self._current_frame
+        self._target_frame[:] = frame
+        self._target_time = now
+        self._finished = False
+
+    def get_frame(self, now):
+        """
+        Return the blended frame for the perf_counter time now.
+        Returns None, if the blend already reached its target, so the same frame is not shown again.
+        """
+        if self._finished:
+            return None
+
+        if self._interval > 0:
+            progress = min((now - self._target_time) / self._interval, 1.0)
+        else:
+            progress = 1.0
+
+        if progress >= 1.0:
+            self._current_frame[:] = self._target_frame
+            self._finished = True
+        else:
+            np.subtract(self._target_frame, self._start_frame, out=self._current_frame)
+            self._current_frame *= progress
+            self._current_frame += self._start_frame
+
+        np.copyto(self._output_frame, self._current_frame, casting="unsafe")
+        return self._output_frame
+
+    def get_finished(self):
+        return self._finished
+
+    finished = property(get_finished)
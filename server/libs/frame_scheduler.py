@@ -0,0 +1,112 @@
+from time import perf_counter, sleep
+import math
+
+
+class FrameScheduler():
+    """
+    Frame scheduler with absolute deadlines on the monotonic perf_counter clock.
+
+    Every frame has a fixed deadline (start + n * frame_time), so the work time of a frame
+    does not shift the following frames and the average fps matches the target.
+    If a frame is too late, the missed deadlines are skipped and counted instead of
+    rendering the frames in a burst.
+    """
+
+    def __init__(self, fps):
+        self._fps = None
+        self._frame_time = None
+        self.set_fps(fps)
+
+        self._next_deadline = perf_counter()
+        self._skipped_frames = 0
+        self.reset_statistics()
+
+    def set_fps(self, fps):
+        """
+        Change the target fps. The next deadline stays the same.
+        """
+        self._fps = max(float(fps), 0.001)
+        self._frame_time = 1 / self._fps
+
+    def wait(self):
+        """
+        Sleep until the deadline of the next frame.
+        """
+        remaining_time = self._next_deadline - perf_counter()
+        if remaining_time > 0:
+            sleep(remaining_time)
+
+        self.advance(perf_counter())
+
+    def advance(self, now):
+        """
+        Start the frame, which was due at the current deadline, and move to the next one.
+        Use this method directly, if the caller waits by itself, like the render engine.
+        """
+        if self._last_frame_start is not None:
+            interval = now - self._last_frame_start
+            self._interval_count += 1
+            self._interval_sum += interval
+            self._interval_square_sum += interval * interval
+            self._interval_max = max(self._interval_max, interval)
+        self._last_frame_start = now
+
+        self._next_deadline += self._frame_time
+        if self._next_deadline <= now:
+            # We are late. Skip the missed frames, but stay in phase with the old deadlines.
+            missed_frames = int((now - self._next_deadline) / self._frame_time) + 1
+            self._skipped_frames += missed_frames
+            self._next_deadline += missed_frames * self._frame_time
+
+    def get_statistics(self, reset=True):
+        """
+        Return the statistics of the frame intervals since the last reset.
+        Returns
+        -------
+        statistics: dict
+            Dict containing "fps", "target_fps", "interval_mean", "interval_max", "jitter" and "skipped_frames".
+            The intervals and the jitter (standard deviation of the intervals) are in seconds.
+        """
+        count = self._interval_count
+        if count > 0:
+            interval_mean = self._interval_sum / count
+            variance = max(self._interval_square_sum / count - interval_mean * interval_mean, 0.0)
+            fps = 1 / interval_mean if interval_mean > 0 else 0.0
+        else:
+            interval_mean = 0.0
+            variance = 0.0
+            fps = 0.0
+
+        statistics = {
+            "fps": fps,
+            "target_fps": self._fps,
+            "interval_mean": interval_mean,
+            "interval_max": self._interval_max,
+            "jitter": math.sqrt(variance),
+            "skipped_frames": self._skipped_frames
+        }
+
+        if reset:
+            self.reset_statistics()
+
+        return statistics
+
+    def reset_statistics(self):
+        self._last_frame_start = None
+        self._interval_count = 0
+        self._interval_sum = 0.0
+        self._interval_square_sum = 0.0
+        self._interval_max = 0.0
+
+    def get_next_deadline(self):
+        return self._next_deadline
+
+    def get_skipped_frames(self):
+        return self._skipped_frames
+
+    def get_fps(self):
+        return self._fps
+
+    next_deadline = property(get_next_deadline)
+    skipped_frames = property(get_skipped_frames)
+    fps = property(get_fps)
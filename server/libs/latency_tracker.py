@@ -0,0 +1,89 @@
+from libs.log_histogram import LogHistogram  # pylint: disable=E0611, E0401
+
+from time import perf_counter
+
+
+class LatencyTracker():
+    """
+    Latency histograms of the stages a frame passes from the microphone to the LED strip.
+
+    Every frame carries the perf_counter timestamps of the capture, the published audio frame,
+    the start of the effect and the published LED frame. The output adds the time around the write to the strip.
+    perf_counter is a system wide monotonic clock, so the timestamps of the different processes can be compared.
+
+    The latencies are counted in logarithmic histograms, so adding a frame does not allocate memory.
+    """
+
+    STAGES = ("capture_to_dsp", "dsp_to_effect", "effect", "effect_to_output", "output_write", "total")
+    CAPTURE_TO_DSP, DSP_TO_EFFECT, EFFECT, EFFECT_TO_OUTPUT, OUTPUT_WRITE, TOTAL = range(len(STAGES))
+
+    # Indexes of the frame timestamps. Unknown timestamps are 0, e.g. the audio timestamps of effects without audio.
+    TIMESTAMP_CAPTURE = 0
+    TIMESTAMP_AUDIO_PUBLISH = 1
+    TIMESTAMP_EFFECT_START = 2
+    TIMESTAMP_EFFECT_PUBLISH = 3
+    TIMESTAMP_COUNT = 4
+
+    def __init__(self):
+        self._histograms = [LogHistogram() for stage in self.STAGES]
+        self._start_time = perf_counter()
+
+    def add_frame(self, timestamps, output_start, output_end):
+        """
+        Add the stage latencies of one shown frame.
+        output_start and output_end are the perf_counter times around the write to the LED strip.
+        """
+        effect_start = timestamps[self.TIMESTAMP_EFFECT_START]
+        effect_publish = timestamps[self.TIMESTAMP_EFFECT_PUBLISH]
+        if effect_start > 0:
+            self.add(self.EFFECT, effect_publish - effect_start)
+            self.add(self.EFFECT_TO_OUTPUT, output_start - effect_publish)
+        self.add(self.OUTPUT_WRITE, output_end - output_start)
+
+        capture = timestamps[self.TIMESTAMP_CAPTURE]
+        if capture > 0:
+            audio_publish = timestamps[self.TIMESTAMP_AUDIO_PUBLISH]
+            self.add(self.CAPTURE_TO_DSP, audio_publish - capture)
+            self.add(self.DSP_TO_EFFECT, effect_start - audio_publish)
+            self.add(self.TOTAL, output_end - capture)
+
+    def add(self, stage, latency):
+        self._histograms[stage].add(latency)
+
+    def get_summary(self, reset=True):
+        """
+        Return the percentiles of every stage since the last reset.
+        Returns
+        -------
+        summary: dict
+            Dict containing "window" (seconds) and "stages". Every stage contains "count", "p50", "p95", "p99" and "max".
+            The latencies are in milliseconds.
+        """
+        stages = {}
+        for stage, histogram in zip(self.STAGES, self._histograms):
+            stage_summary = {"count": histogram.count}
+            if histogram.count > 0:
+                for name, percentile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                    stage_summary[name] = round(histogram.get_percentile(percentile) * 1000, 3)
+                stage_summary["max"] = round(histogram.max * 1000, 3)
+            stages[stage] = stage_summary
+
+        summary = {
+            "window": round(self.window, 3),
+            "stages": stages
+        }
+
+        if reset:
+            self.reset()
+
+        return summary
+
+    def reset(self):
+        for histogram in self._histograms:
+            histogram.reset()
+        self._start_time = perf_counter()
+
+    def get_window(self):
+        return perf_counter() - self._start_time
+
+    window = property(get_window)
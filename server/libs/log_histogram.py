@@ -0,0 +1,63 @@
+import numpy as np
+import math
+
+
+class LogHistogram():
+    """
+    Histogram with logarithmic buckets for durations in seconds.
+    Adding a value does not allocate memory. The percentiles are accurate to about 3 percent.
+    """
+
+    MIN_VALUE = 0.00001
+    MAX_VALUE = 10.0
+    BUCKETS = 256
+
+    def __init__(self):
+        self._log_min_value = math.log(self.MIN_VALUE)
+        self._bucket_width = (math.log(self.MAX_VALUE) - self._log_min_value) / self.BUCKETS
+        # Geometric center of every bucket.
+        self._bucket_values = np.exp(self._log_min_value + (np.arange(self.BUCKETS) + 0.5) * self._bucket_width)
+
+        self._counts = np.zeros(self.BUCKETS, dtype=np.int64)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def add(self, value):
+        if value < self.MIN_VALUE:
+            bucket = 0
+        else:
+            bucket = min(int((math.log(value) - self._log_min_value) / self._bucket_width), self.BUCKETS - 1)
+        self._counts[bucket] += 1
+        self._count += 1
+        self._sum += value
+        if value > self._max:
+            self._max = value
+
+    def get_percentile(self, percentile):
+        """
+        Return the value below which the given fraction (0 to 1) of the values lie. 0 if the histogram is empty.
+        """
+        if self._count == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self._counts), percentile * self._count))
+        return float(min(self._bucket_values[bucket], self._max))
+
+    def reset(self):
+        self._counts.fill(0)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def get_count(self):
+        return self._count
+
+    def get_sum(self):
+        return self._sum
+
+    def get_max(self):
+        return self._max
+
+    count = property(get_count)
+    sum = property(get_sum)
+    max = property(get_max)
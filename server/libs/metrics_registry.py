@@ -0,0 +1,178 @@
+from libs.log_histogram import LogHistogram  # pylint: disable=E0611, E0401
+
+from threading import Lock
+from time import perf_counter
+import os
+
+
+class MetricsRegistry():
+    """
+    Counters, gauges and rolling histograms of one process.
+
+    Every process uses its own registry, see instance(). The services send a snapshot of it with the stats queue
+    to the webserver every few seconds, which serves the metrics of all processes with the system info API.
+    The histograms are reported as summaries. Their percentiles cover the interval since the last report,
+    count and sum are counted since the start of the process.
+    The render workers of one process share the registry, so every access takes its lock.
+    """
+
+    # Send the metrics to the webserver in this interval (seconds).
+    REPORT_INTERVAL = 5
+
+    def __init__(self):
+        self._process_id = os.getpid()
+        self._process_name = "main"
+
+        # The metrics are stored with the key (name, labels).
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._histogram_totals = {}
+        self._lock = Lock()
+
+        self._last_report_time = perf_counter()
+
+    @staticmethod
+    def instance():
+        """
+        Returns the registry of the current process.
+        A new process starts with an empty registry, even if it was forked from a process with metrics.
+        """
+        current_instance = getattr(MetricsRegistry, 'current_instance', None)
+        if current_instance is None or current_instance.process_id != os.getpid():
+            MetricsRegistry.current_instance = MetricsRegistry()
+
+        return MetricsRegistry.current_instance
+
+    def increment(self, name, value=1, labels=None):
+        key = self.get_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, labels=None):
+        key = self.get_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, labels=None):
+        """
+        Add a value (usually a duration in seconds) to the rolling histogram of the metric.
+        """
+        key = self.get_key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LogHistogram()
+                self._histogram_totals[key] = [0, 0.0]
+
+            histogram.add(value)
+            totals = self._histogram_totals[key]
+            totals[0] += 1
+            totals[1] += value
+
+    def get_key(self, name, labels):
+        if not labels:
+            return (name, ())
+        return (name, tuple(sorted(labels.items())))
+
+    def get_snapshot(self, reset=True):
+        """
+        Return all metrics as a list of dicts with "name", "type", "labels" and the values.
+        Counters and gauges contain "value", summaries contain "count", "sum", "p50", "p95", "p99" and "max".
+        If reset is True, the rolling histograms start a new interval.
+        """
+        metrics = []
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                metrics.append({"name": name, "type": "counter", "labels": dict(labels), "value": value})
+
+            for (name, labels), value in self._gauges.items():
+                metrics.append({"name": name, "type": "gauge", "labels": dict(labels), "value": value})
+
+            for key, histogram in self._histograms.items():
+                name, labels = key
+                count, total = self._histogram_totals[key]
+                metrics.append({
+                    "name": name,
+                    "type": "summary",
+                    "labels": dict(labels),
+                    "count": count,
+                    "sum": total,
+                    "p50": histogram.get_percentile(0.5),
+                    "p95": histogram.get_percentile(0.95),
+                    "p99": histogram.get_percentile(0.99),
+                    "max": histogram.max
+                })
+                if reset:
+                    histogram.reset()
+
+        return metrics
+
+    def report(self, stats_queue, force=False):
+        """
+        Send the snapshot to the webserver, if the report interval passed.
+        """
+        if stats_queue is None:
+            return
+
+        now = perf_counter()
+        with self._lock:
+            if not force and now - self._last_report_time < self.REPORT_INTERVAL:
+                return
+            self._last_report_time = now
+
+        stats_queue.put_none_blocking({
+            "process_id": self._process_id,
+            "process_name": self._process_name,
+            "metrics": self.get_snapshot()
+        })
+
+    @staticmethod
+    def format_prometheus(process_reports):
+        """
+        Format the reports of the processes in the Prometheus text format.
+        Every metric gets the prefix "mlsc_" and the labels "process" and "pid".
+        """
+        samples = {}
+        types = {}
+        for process_report in process_reports:
+            process_labels = {"process": process_report["process_name"], "pid": process_report["process_id"]}
+            for metric in process_report["metrics"]:
+                name = "mlsc_" + metric["name"]
+                labels = dict(process_labels, **metric["labels"])
+                types[name] = metric["type"]
+                metric_samples = samples.setdefault(name, [])
+
+                if metric["type"] == "summary":
+                    for quantile in ("p50", "p95", "p99"):
+                        quantile_labels = dict(labels, quantile=str(int(quantile[1:]) / 100))
+                        metric_samples.append((name, quantile_labels, metric[quantile]))
+                    metric_samples.append((name + "_sum", labels, metric["sum"]))
+                    metric_samples.append((name + "_count", labels, metric["count"]))
+                else:
+                    metric_samples.append((name, labels, metric["value"]))
+
+        lines = []
+        for name in sorted(samples):
+            lines.append(f"# TYPE {name} {types[name]}")
+            for sample_name, labels, value in samples[name]:
+                label_text = ",".join(f'{key}="{MetricsRegistry.escape_label(value)}"' for key, value in labels.items())
+                lines.append(f"{sample_name}{{{label_text}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def escape_label(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    def set_process_name(self, process_name):
+        self._process_name = process_name
+
+    def get_process_name(self):
+        return self._process_name
+
+    def get_process_id(self):
+        return self._process_id
+
+    process_name = property(get_process_name, set_process_name)
+    process_id = property(get_process_id)
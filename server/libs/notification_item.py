@@ -1,7 +1,10 @@
 class NotificationItem():
-    def __init__(self, notification_enum, device_id):
+    def __init__(self, notification_enum, device_id, payload=None, refresh_id=None):
         self.__notification_enum = notification_enum
         self.__device_id = device_id
+        self.__payload = payload
+        # Id of the config refresh. The config_refresh_finished reply repeats it, so late replies can be told apart.
+        self.__refresh_id = refresh_id
 
     def get_notification_enum(self):
         return self.__notification_enum
@@ -9,5 +12,13 @@ class NotificationItem():
     def get_device_id(self):
         return self.__device_id
 
+    def get_payload(self):
+        return self.__payload
+
+    def get_refresh_id(self):
+        return self.__refresh_id
+
     notification_enum = property(get_notification_enum)
     device_id = property(get_device_id)
+    payload = property(get_payload)
+    refresh_id = property(get_refresh_id)
@@ -1,12 +1,19 @@
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
 from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
+from libs.wakeup_counter import WakeupCounter  # pylint: disable=E0611, E0401
 
-from time import sleep
+from time import time
 import logging
 
 
 class NotificationService():
+    # Maximum time to wait for the processes to refresh the config.
+    REFRESH_TIMEOUT = 30
+    # The loop wakes up after this time, even without a notification.
+    IDLE_TIMEOUT = 1
+
     def start(self, config_lock, notification_queue_device_manager_in,
               notification_queue_device_manager_out, notification_queue_audio_in,
               notification_queue_audio_out, notification_queue_webserver_in,
@@ -29,6 +36,10 @@ class NotificationService():
 
         self._current_notification_item = NotificationItem(
             NotificationEnum.config_refresh, "all_devices")
+        self._refresh_id = 0
+
+        config = ConfigService.instance(self._config_lock).config
+        self._wakeup_counter = WakeupCounter("Notification Service", config["general_settings"]["measure_wakeups"])
 
         self._cancel_token = False
         self.logger.debug("NotificationService component started.")
@@ -37,17 +48,23 @@ class NotificationService():
             # 2. Check Output
             # 3. Check Effects
             try:
-                sleep(0.5)
-
-                if not self._notification_queue_webserver_out.empty():
+                # Sleep until the webserver sends a notification.
+                ready_queues = QueueWrapper.wait([self._notification_queue_webserver_out], self.IDLE_TIMEOUT)
+                self._wakeup_counter.count()
+                if not ready_queues:
+                    continue
+
+                self._current_notification_item = self._notification_queue_webserver_out.get_blocking_with_timeout()
+                if self._current_notification_item is not None:
                     self.logger.debug(
                         "NotificationService: New Notification detected.")
-                    self._current_notification_item = self._notification_queue_webserver_out.get_blocking()
 
                     self.logger.debug("Item get")
                     if self._current_notification_item.notification_enum is NotificationEnum.config_refresh:
 
                         self.logger.debug("Reloading config...")
+                        if self._current_notification_item.payload is not None:
+                            self._wakeup_counter.enabled = self._current_notification_item.payload["general_settings"]["measure_wakeups"]
                         self.config_refresh(self._current_notification_item)
                         self.logger.debug("Config reloaded.")
 
@@ -59,6 +76,8 @@ class NotificationService():
 
     def config_refresh(self, original_notification_item):
         device_id = original_notification_item.device_id
+        # A reply of an earlier refresh, which timed out, can still arrive. It is ignored by its id.
+        self._refresh_id += 1
 
         # Summary
         # 1. Pause every process that has to refresh the config.
@@ -76,35 +95,46 @@ class NotificationService():
         self.logger.debug("2. Refresh")
         # 2. Send the refresh command.
         self._notification_queue_device_manager_in.put_blocking(
-            NotificationItem(NotificationEnum.config_refresh, device_id))
+            NotificationItem(NotificationEnum.config_refresh, device_id, original_notification_item.payload, self._refresh_id))
         self._notification_queue_audio_in.put_blocking(
-            NotificationItem(NotificationEnum.config_refresh, device_id))
+            NotificationItem(NotificationEnum.config_refresh, device_id, original_notification_item.payload, self._refresh_id))
 
         # 3. Wait for all to finish the process.
-        processes_not_ready = True
-
         self.logger.debug("3. Wait")
         device_ready = False
         effect_ready = False
-        while processes_not_ready:
+        deadline = time() + self.REFRESH_TIMEOUT
+        while not (device_ready and effect_ready):
+            remaining_time = deadline - time()
+            if remaining_time <= 0:
+                self.logger.error(
+                    f"Config refresh timed out. Device manager ready: {device_ready} | Audio ready: {effect_ready}")
+                break
 
-            # Check the notification queue of device_manager, if it is ready to continue.
-            if(not self._notification_queue_device_manager_out.empty()):
-                current_output_out = self._notification_queue_device_manager_out.get_blocking()
-                if current_output_out.notification_enum is NotificationEnum.config_refresh_finished:
+            # Sleep until one of the processes answers.
+            waiting_queues = []
+            if not device_ready:
+                waiting_queues.append(self._notification_queue_device_manager_out)
+            if not effect_ready:
+                waiting_queues.append(self._notification_queue_audio_out)
+
+            for ready_queue in QueueWrapper.wait(waiting_queues, remaining_time):
+                current_out = ready_queue.get_blocking_with_timeout()
+                if current_out is None or current_out.notification_enum is not NotificationEnum.config_refresh_finished:
+                    continue
+                if current_out.refresh_id != self._refresh_id:
+                    self.logger.debug(f"Ignoring the late reply of config refresh {current_out.refresh_id}.")
+                    continue
+
+                # Check the notification queue of device_manager, if it is ready to continue.
+                if ready_queue is self._notification_queue_device_manager_out:
                     device_ready = True
                     self.logger.debug("Device refreshed the config.")
-
-            # Check the notification queue of audio, if it is ready to continue.
-            if(not self._notification_queue_audio_out.empty()):
-                current_effects_out = self._notification_queue_audio_out.get_blocking()
-                if current_effects_out.notification_enum is NotificationEnum.config_refresh_finished:
+                # Check the notification queue of audio, if it is ready to continue.
+                else:
                     effect_ready = True
                     self.logger.debug("Audio refreshed the config.")
 
-            if device_ready and effect_ready:
-                processes_not_ready = False
-
         # 4. Continue the processes.
         self._notification_queue_device_manager_in.put_blocking(
             NotificationItem(NotificationEnum.process_continue, device_id))
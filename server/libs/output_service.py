@@ -3,15 +3,58 @@ from libs.outputs.output_raspi import OutputRaspi  # pylint: disable=E0611, E040
 from libs.outputs.output_dummy import OutputDummy  # pylint: disable=E0611, E0401
 from libs.outputs.output_udp import OutputUDP  # pylint: disable=E0611, E0401
 from libs.output_enum import OutputsEnum  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
-
-from time import time
-import numpy as np
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+from libs.frame_interpolator import FrameInterpolator  # pylint: disable=E0611, E0401
+from libs.latency_tracker import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
+from libs.config_diff import ConfigDiff  # pylint: disable=E0611, E0401
+from libs.wakeup_counter import WakeupCounter  # pylint: disable=E0611, E0401
+
+from multiprocessing.connection import wait
+from time import perf_counter
 import logging
 
 
 class OutputService():
+    # Without frames or notifications, the loop only wakes up after this time.
+    IDLE_TIMEOUT = 1
+    # The latency percentiles are sent to the webserver in this interval (seconds).
+    LATENCY_REPORT_INTERVAL = 5
+
     def start(self, device):
+        self.init_output_service(device)
+        MetricsRegistry.instance().process_name = "output_service"
+
+        while not self._cancel_token:
+            try:
+                if self._interpolator is not None and not self._interpolator.finished:
+                    # Show the next blended frame on the deadline of the device.
+                    self._frame_scheduler.wait()
+                    self._frame_buffer.clear_signal()
+                    self._wakeup_counter.count()
+                else:
+                    # Do not show more frames than the fps target of the device.
+                    # With the phase lock, the output follows the deadlines of the effect and shows every frame right away.
+                    if not self._phase_lock:
+                        self._frame_scheduler.wait()
+                    self.wait_for_event()
+                self.output_routine()
+            except KeyboardInterrupt:
+                break
+
+    def wait_for_event(self):
+        """
+        Sleep until the effect published a new frame or a notification arrived.
+        """
+        wait([self._frame_buffer.signal, self._device_notification_queue_in.reader], self.IDLE_TIMEOUT)
+        self._frame_buffer.clear_signal()
+        self._wakeup_counter.count()
+
+    def init_output_service(self, device):
+        """
+        Prepare the output service without starting the loop.
+        The RenderEngine uses this to step the outputs of all devices inside one process.
+        """
         self.logger = logging.getLogger(__name__)
 
         self._device = device
@@ -23,19 +66,30 @@ class OutputService():
         # Initial config load.
         self._config = self._device.config
 
-        self._output_queue = self._device.output_queue
-        self._device_notification_queue_in = self._device.device_notification_queue_in
+        self._frame_buffer = self._device.frame_buffer
+        self._last_frame_sequence = 0
+        self._device_notification_queue_in = self._device.output_notification_queue_in
         self._device_notification_queue_out = self._device.device_notification_queue_out
 
-        self.ten_seconds_counter = time()
-        self.sec_ten_seconds_counter = time()
-        self.start_time = time()
+        self.ten_seconds_counter = perf_counter()
+        self.start_time = perf_counter()
 
-        # Init FPS Limiter.
-        self._fps_limiter = FPSLimiter(self._device.device_config["fps"])
+        self._frame_scheduler = FrameScheduler(self._device.device_config["fps"])
+        self._phase_lock = self._config["general_settings"]["output_phase_lock"]
+        self._keep_alive_interval = self._config["general_settings"]["output_keep_alive_interval"]
+        self._interpolator = None
+        self.init_interpolator()
+        self._latency_tracker = LatencyTracker()
+        self._metrics = MetricsRegistry.instance()
+        self._metric_labels = {"device": self._device.device_config["device_name"]}
 
         self._skip_output = False
         self._cancel_token = False
+        self._current_notification_in = None
+
+        self._wakeup_counter = WakeupCounter(
+            f'Output Service | Device: {self._device.device_config["device_name"]}',
+            self._config["general_settings"]["measure_wakeups"])
 
         self._available_outputs = {
             OutputsEnum.output_dummy: OutputDummy,
@@ -51,28 +105,22 @@ class OutputService():
         self.logger.debug(
             f'Output component started. Device: {self._device.device_config["device_name"]}')
 
-        while not self._cancel_token:
-            try:
-                self.output_routine()
-            except KeyboardInterrupt:
-                break
-
     def output_routine(self):
-        # Limit the fps to decrease lags caused by 100 percent CPU.
-        self._fps_limiter.fps_limiter()
-
         # Check the notification queue.
         if not self._device_notification_queue_in.empty():
             self._current_notification_in = self._device_notification_queue_in.get_blocking()
 
-        if hasattr(self, "_current_notification_in"):
-            if self._current_notification_in is NotificationEnum.config_refresh:
+        if self._current_notification_in is not None:
+            notification_enum = self._current_notification_in.notification_enum
+            if notification_enum is NotificationEnum.config_refresh:
                 self.refresh()
-            elif self._current_notification_in is NotificationEnum.process_continue:
+            elif notification_enum is NotificationEnum.config_update:
+                self.update_config(self._current_notification_in.payload)
+            elif notification_enum is NotificationEnum.process_continue:
                 self._skip_output = False
-            elif self._current_notification_in is NotificationEnum.process_pause:
+            elif notification_enum is NotificationEnum.process_pause:
                 self._skip_output = True
-            elif self._current_notification_in is NotificationEnum.process_stop:
+            elif notification_enum is NotificationEnum.process_stop:
                 self.stop()
 
         # Reset the current in notification, to do it only one time.
@@ -80,31 +128,82 @@ class OutputService():
 
         # Skip the output sequence, for example to "pause" the process.
         if self._skip_output:
-            if not self._output_queue.empty():
-                skip_output_queue = self._output_queue.get_blocking()
-                del skip_output_queue
+            self._last_frame_sequence = self._frame_buffer.sequence
             return
 
-        # Check if the queue is empty and stop if its empty.
-        if not self._output_queue.empty():
-            current_output_array = self._output_queue.get_blocking()
-            # Add another Array of LEDS for White Channel
-            if "SK6812" in self._led_strip and len(current_output_array) == 3:
-                current_output_array = np.vstack(
-                    (current_output_array, np.zeros(self._device.device_config["led_count"])))
-
-            self._current_output.show(current_output_array)
-
-        self.end_time = time()
-
-        if time() - self.ten_seconds_counter > 10:
-            self.ten_seconds_counter = time()
+        # Show the latest frame, if the effect published a new one.
+        # The frame buffer already contains the white channel for SK6812 strips.
+        frame_data = self._frame_buffer.read_latest(self._last_frame_sequence)
+        if frame_data is not None:
+            self._last_frame_sequence = frame_data["sequence"]
+
+        output_start = perf_counter()
+        frame_shown = False
+        if self._interpolator is not None:
+            if frame_data is not None:
+                self._interpolator.set_target(frame_data["frame"], output_start)
+            frame = self._interpolator.get_frame(output_start)
+            if frame is not None:
+                frame_shown = self.show_frame(frame)
+        elif frame_data is not None:
+            frame_shown = self.show_frame(frame_data["frame"])
+
+        # An unchanged frame was not written, so it has no output latency.
+        if frame_data is not None and frame_shown:
+            output_end = perf_counter()
+            self._latency_tracker.add_frame(frame_data["timestamps"], output_start, output_end)
+            self._metrics.observe("output_write_seconds", output_end - output_start, self._metric_labels)
+            self._metrics.increment("output_frames_total", 1, self._metric_labels)
+
+        if self._latency_tracker.window > self.LATENCY_REPORT_INTERVAL:
+            self.report_latency()
+        self._metrics.report(self._device.stats_queue)
+
+        self.end_time = perf_counter()
+
+        if self.end_time - self.ten_seconds_counter > 10:
+            self.ten_seconds_counter = self.end_time
             self.time_dif = self.end_time - self.start_time
             self.fps = 1 / self.time_dif
             self.logger.info(
                 f'FPS: {self.fps:.2f} | Device: {self._device.device_config["device_name"]}')
 
-        self.start_time = time()
+        self.start_time = perf_counter()
+
+    def show_frame(self, frame):
+        """
+        Show the frame, if it changed. Static effects do not cost a render or a packet in every frame.
+        Returns True, if the frame was written to the output.
+        """
+        if not self._current_output.show_changed(frame, self._keep_alive_interval):
+            self._metrics.increment("output_unchanged_frames_total", 1, self._metric_labels)
+            return False
+        return True
+
+    def report_latency(self):
+        """
+        Send the latency percentiles of the last interval to the webserver.
+        """
+        latency = self._latency_tracker.get_summary()
+        if self._device.stats_queue is None:
+            return
+
+        self._device.stats_queue.put_none_blocking({
+            "device_id": self._device.device_id,
+            "device_name": self._device.device_config["device_name"],
+            "latency": latency
+        })
+
+    def init_interpolator(self):
+        """
+        Create the frame interpolator, if general_settings.render_interpolation is enabled.
+        The render engine shows the frames right after the effects, so there is nothing to blend in the consolidated mode.
+        """
+        general_settings = self._config["general_settings"]
+        if not general_settings["render_interpolation"] or general_settings["engine_mode"] == "consolidated":
+            self._interpolator = None
+        elif self._interpolator is None:
+            self._interpolator = FrameInterpolator(self._frame_buffer.channels, self._frame_buffer.led_count)
 
     def stop(self):
         self._cancel_token = True
@@ -117,7 +216,28 @@ class OutputService():
         self._config = self._device.config
 
         # Notify the master component, that I'm finished.
-        self._device_notification_queue_out.put_blocking(
+        self._device_notification_queue_out.put_none_blocking(
             NotificationEnum.config_refresh_finished)
 
         self.logger.debug("Output refreshed.")
+
+    def update_config(self, config_diff):
+        """
+        Apply the changed config keys in place.
+        Changes of the LED count, the strip type or the output settings restart the device instead.
+        """
+        self.logger.debug("Updating output config...")
+        ConfigDiff.apply(self._device.config, config_diff)
+        self._config = self._device.config
+
+        self._frame_scheduler.set_fps(self._device.device_config["fps"])
+        self._phase_lock = self._config["general_settings"]["output_phase_lock"]
+        self._keep_alive_interval = self._config["general_settings"]["output_keep_alive_interval"]
+        self.init_interpolator()
+        self._metric_labels = {"device": self._device.device_config["device_name"]}
+        self._wakeup_counter.enabled = self._config["general_settings"]["measure_wakeups"]
+        self._current_output.update_config()
+        # E.g. the brightness changed, so the next frame has to be shown, even if the effect did not change it.
+        self._current_output.reset_last_frame()
+
+        self.logger.debug("Output config updated.")
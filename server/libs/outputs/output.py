@@ -1,7 +1,79 @@
+from time import perf_counter
+import numpy as np
+
+
 class Output:
     def __init__(self, device):
         self._device = device
         self._device_config = device.device_config
 
+        # The last shown frame in 8 bit colors, to skip unchanged frames.
+        self._last_frame = None
+        self._quantized_frame = None
+        self._changed_leds = None
+        self._last_show_time = 0.0
+
     def show(self, output_array):
         raise NotImplementedError("Please implement this method.")
+
+    def show_partial(self, output_array, start, end):
+        """
+        Show a frame, of which only the LEDs from start to end (exclusive) changed since the last shown frame.
+        Outputs, which can update a part of the strip, can override this. The others show the whole frame.
+        """
+        self.show(output_array)
+
+    def show_changed(self, output_array, keep_alive_interval):
+        """
+        Show the frame, if its 8 bit colors differ from the last shown frame.
+        An unchanged frame is shown again after keep_alive_interval seconds. 0 shows every frame.
+        Returns True, if the frame was shown.
+        """
+        now = perf_counter()
+        if keep_alive_interval <= 0:
+            self.show(output_array)
+            self._last_frame = None
+            self._last_show_time = now
+            return True
+
+        if self._quantized_frame is None or self._quantized_frame.shape != output_array.shape:
+            self._quantized_frame = np.zeros(output_array.shape, dtype=np.uint8)
+            self._changed_leds = np.zeros(output_array.shape[-1], dtype=bool)
+            self._last_frame = None
+        # The unsafe cast truncates the colors like the outputs do.
+        np.copyto(self._quantized_frame, np.clip(output_array, 0, 255), casting="unsafe")
+
+        if self._last_frame is None or now - self._last_show_time >= keep_alive_interval:
+            self.show(output_array)
+        else:
+            np.any(self._quantized_frame != self._last_frame, axis=0, out=self._changed_leds)
+            changed_indexes = np.flatnonzero(self._changed_leds)
+            if len(changed_indexes) == 0:
+                return False
+
+            start = int(changed_indexes[0])
+            end = int(changed_indexes[-1]) + 1
+            if start == 0 and end == len(self._changed_leds):
+                self.show(output_array)
+            else:
+                self.show_partial(output_array, start, end)
+
+        if self._last_frame is None:
+            self._last_frame = self._quantized_frame.copy()
+        else:
+            self._last_frame[:] = self._quantized_frame
+        self._last_show_time = now
+        return True
+
+    def reset_last_frame(self):
+        """
+        Show the next frame, even if it did not change. E.g. after the brightness changed.
+        """
+        self._last_frame = None
+
+    def update_config(self):
+        """
+        Apply the settings of the device config, which can change while the output is running, e.g. the brightness.
+        The device config was already updated in place.
+        """
+        pass
@@ -2,9 +2,14 @@ from libs.outputs.output import Output  # pylint: disable=E0611, E0401
 
 import numpy as np
 import logging
+import ctypes
 
 
 class OutputRaspi(Output):
+    # The bit positions of the color channels in the packed LED value.
+    RGB_CHANNEL_SHIFTS = (8, 16, 0)
+    RGBW_CHANNEL_SHIFTS = (16, 24, 8, 0)
+
     def __init__(self, device):
         # Call the constructor of the base class.
         super(OutputRaspi, self).__init__(device)
@@ -79,34 +84,71 @@ class OutputRaspi(Output):
             message = ws.ws2811_get_return_t_str(resp)
             raise RuntimeError(f'ws2811_init failed with code {resp} ({message})')
 
-    def show(self, output_array):
-        import _rpi_ws281x as ws  # pylint: disable=import-error
+        # The packed colors are reused in every frame.
+        self._packed_colors = np.zeros(self._led_count, dtype=np.uint32)
+        self._packed_channel = np.zeros(self._led_count, dtype=np.uint32)
+        self._clipped_array = None
+        self._led_buffer = self.get_led_buffer(ws)
+
+    def get_led_buffer(self, ws):
+        """
+        Return a numpy view of the LED buffer of the channel, which the library allocated in ws2811_init.
+        The packed colors are copied into it with one call, instead of calling ws2811_led_set for every LED.
+        Returns None, if the pointer of the buffer is not available. Then the LEDs are set one by one.
+        """
+        try:
+            leds_address = int(ws.ws2811_channel_t_leds_get(self.channel))
+            if leds_address == 0:
+                raise ValueError("The LED buffer is not allocated.")
+            leds_type = ctypes.c_uint32 * self._led_count
+            return np.frombuffer(leds_type.from_address(leds_address), dtype=np.uint32)
+        except Exception as e:
+            self.logger.warning(f"Could not map the LED buffer, the LEDs are set one by one. Exception: {str(e)}")
+            return None
 
-        # Typecast the array to int.
-        output_array = output_array.clip(0, 255).astype(int)
+    def pack_colors(self, output_array):
+        """
+        Pack the color channels into one uint32 per LED, without allocating new arrays.
+        """
+        if self._clipped_array is None or self._clipped_array.shape != output_array.shape:
+            self._clipped_array = np.zeros(output_array.shape)
+        np.clip(output_array, 0, 255, out=self._clipped_array)
 
         # Check if we have a white channel or not.
-        if len(output_array[:]) == 4 and "SK6812" in self._led_strip:
-            # Sort the colors as RGB type.
-            g = np.left_shift(output_array[1][:].astype(int), 24)  # pylint: disable=assignment-from-no-return
-            r = np.left_shift(output_array[0][:].astype(int), 16)  # pylint: disable=assignment-from-no-return
-            b = np.left_shift(output_array[2][:].astype(int), 8)  # pylint: disable=assignment-from-no-return
-            w = output_array[3][:].astype(int)
-            grbw = np.bitwise_or(np.bitwise_or(np.bitwise_or(r, g), b), w).astype(int)
-
-            # You can only use ws2811_leds_set with the custom version.
-            for i in range(self._led_count):
-                ws.ws2811_led_set(self.channel, i, int(grbw[i].item()))
+        if len(output_array) == 4 and "SK6812" in self._led_strip:
+            channel_shifts = self.RGBW_CHANNEL_SHIFTS
         else:
-            # Sort the colors as RGB type.
-            g = np.left_shift(output_array[1][:].astype(int), 16)  # pylint: disable=assignment-from-no-return
-            r = np.left_shift(output_array[0][:].astype(int), 8)  # pylint: disable=assignment-from-no-return
-            b = output_array[2][:].astype(int)
-            grb = np.bitwise_or(np.bitwise_or(r, g), b).astype(int)
+            channel_shifts = self.RGB_CHANNEL_SHIFTS
+
+        self._packed_colors.fill(0)
+        for channel, shift in enumerate(channel_shifts):
+            # The unsafe cast truncates the floats like astype(int).
+            np.copyto(self._packed_channel, self._clipped_array[channel, :self._led_count], casting="unsafe")
+            np.left_shift(self._packed_channel, shift, out=self._packed_channel)
+            self._packed_colors |= self._packed_channel
+
+        return self._packed_colors
+
+    def update_config(self):
+        import _rpi_ws281x as ws  # pylint: disable=import-error
 
-            # You can only use ws2811_leds_set with the custom version.
+        # The brightness is applied by the library during the next render.
+        self._led_brightness = int(self._device_config["led_brightness"])
+        self._led_brightness_translated = int(255 * (self._led_brightness / 100))
+        ws.ws2811_channel_t_brightness_set(self.channel, self._led_brightness_translated)
+
+        self.logger.debug(f"LED Brightness: {self._led_brightness}")
+
+    def show(self, output_array):
+        import _rpi_ws281x as ws  # pylint: disable=import-error
+
+        packed_colors = self.pack_colors(output_array)
+
+        if self._led_buffer is not None:
+            self._led_buffer[:] = packed_colors
+        else:
             for i in range(self._led_count):
-                ws.ws2811_led_set(self.channel, i, grb[i].item())
+                ws.ws2811_led_set(self.channel, i, int(packed_colors[i]))
 
         resp = ws.ws2811_render(self._leds)
 
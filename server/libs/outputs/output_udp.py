@@ -1,4 +1,5 @@
 from libs.outputs.output import Output  # pylint: disable=E0611, E0401
+from libs.outputs.udp_frame_protocol import UDPFramePacker, UDPFrameEncoder  # pylint: disable=E0611, E0401
 
 import numpy as np
 import logging
@@ -6,6 +7,29 @@ import socket
 
 
 class OutputUDP(Output):
+    # The channels of the frame (r, g, b, w), which are sent for the strip types.
+    WS2811_CHANNEL_ORDERS = {
+        "ws2811_strip_bgr": (2, 1, 0),
+        "ws2811_strip_brg": (2, 0, 1),
+        "ws2811_strip_gbr": (1, 2, 0),
+        "ws2811_strip_grb": (1, 0, 2),
+        "ws2811_strip_rbg": (0, 2, 1)
+    }
+    SK6812_RGB_CHANNEL_ORDERS = {
+        "sk6812_strip_bgrw": (2, 1, 0),
+        "sk6812_strip_brgw": (2, 0, 1),
+        "sk6812_strip_gbrw": (1, 2, 0),
+        "sk6812_strip_grbw": (1, 0, 2),
+        "sk6812_strip_rbgw": (0, 2, 1)
+    }
+    SK6812_RGBW_CHANNEL_ORDERS = {
+        "sk6812_strip_bgrw": (2, 1, 0, 3),
+        "sk6812_strip_brgw": (2, 0, 1, 3),
+        "sk6812_strip_gbrw": (1, 2, 0, 3),
+        "sk6812_strip_grbw": (1, 0, 2, 3),
+        "sk6812_strip_rbgw": (0, 2, 1, 3)
+    }
+
     def __init__(self, device):
         # Call the constructor of the base class.
         super(OutputUDP, self).__init__(device)
@@ -15,142 +39,83 @@ class OutputUDP(Output):
 
         self._udp_client_ip = self._device_config["output"][output_id]["udp_client_ip"]
         self._udp_client_port = int(self._device_config["output"][output_id]["udp_client_port"])
+        self._udp_protocol = self._device_config["output"][output_id]["udp_protocol"]
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self._led_strip = self._device_config["led_strip"]
         self._led_brightness = int(self._device_config["led_brightness"])  # Set to '0' for darkest and 100 for brightest.
+        self._brightness_scale = self._led_brightness / 100
+
+        # The strip type is resolved once. The packet buffers are reused in every frame.
+        self._channel_orders = self.get_channel_orders()
+        self._scaled_array = None
+        self._packet = None
+
+        # "raw" sends every frame as one datagram. "chunked" splits it into datagrams with a header, see UDPFramePacker.
+        # "compressed" sends the chunked frames as keyframes and delta frames, see UDPFrameEncoder.
+        self._frame_packer = None
+        self._frame_encoder = None
+        if self._udp_protocol in ("chunked", "compressed"):
+            self._frame_packer = UDPFramePacker(4 if "SK6812" in self._led_strip else 3)
+        if self._udp_protocol == "compressed":
+            self._frame_encoder = UDPFrameEncoder()
+
+    def update_config(self):
+        self._led_brightness = int(self._device_config["led_brightness"])
+        self._brightness_scale = self._led_brightness / 100
 
     def show(self, output_array):
-
-        output_array = output_array * (self._led_brightness / 100)
-
-        output_array = self.map_channels(output_array)
-        # Typecast the array to int.
-        output_array = output_array.clip(0, 255).astype(np.uint8)
-
-        byte_array = output_array.tobytes('F')
+        packet = self.pack_frame(output_array)
         try:
-            self._sock.sendto(byte_array, (self._udp_client_ip, self._udp_client_port))
+            if self._frame_packer is None:
+                self._sock.sendto(packet, (self._udp_client_ip, self._udp_client_port))
+            else:
+                flags = 0
+                if self._frame_encoder is not None:
+                    packet, flags = self._frame_encoder.encode(packet)
+                for datagram in self._frame_packer.pack(packet, flags):
+                    self._sock.sendto(datagram, (self._udp_client_ip, self._udp_client_port))
         except Exception as ex:
             self.logger.exception(f"Could not send to client", ex)
             self.logger.debug(f"Reinit output of {self._udp_client_ip}")
             self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-    def map_channels(self, output_array_in):
-        if "SK6812" in self._led_strip:
-            if len(output_array_in[:]) == 4:
-                return self.map_four_channels_sk(output_array_in)
+    def pack_frame(self, output_array):
+        """
+        Scale the frame with the brightness, sort the channels for the strip and convert it to the interleaved 8 bit colors
+        [c0, c1, c2, c0, c1, c2, ...]. The returned array is reused for the next frame.
+        """
+        channel_order = self._channel_orders.get(len(output_array), tuple(range(len(output_array))))
+        led_count = output_array.shape[1]
+        if self._packet is None or self._packet.shape != (led_count, len(channel_order)):
+            self._scaled_array = np.zeros((led_count, len(channel_order)))
+            self._packet = np.zeros((led_count, len(channel_order)), dtype=np.uint8)
+
+        # Scale the channels straight into their interleaved position.
+        for packet_channel, frame_channel in enumerate(channel_order):
+            np.multiply(output_array[frame_channel], self._brightness_scale, out=self._scaled_array[:, packet_channel])
+        np.maximum(self._scaled_array, 0, out=self._scaled_array)
+        np.minimum(self._scaled_array, 255, out=self._scaled_array)
+        # The unsafe cast truncates like astype(np.uint8).
+        np.copyto(self._packet, self._scaled_array, casting="unsafe")
+
+        return self._packet
+
+    def get_channel_orders(self):
+        """
+        Resolve the order of the color channels in the packet for frames with 3 and 4 channels.
+        A shorter order drops the last channels. Strips without an entry are sent in the order of the frame.
+        """
+        channel_orders = {}
+        for channels in (3, 4):
+            if "SK6812" in self._led_strip:
+                if channels == 4:
+                    channel_order = self.SK6812_RGBW_CHANNEL_ORDERS.get(self._led_strip)
+                else:
+                    channel_order = self.SK6812_RGB_CHANNEL_ORDERS.get(self._led_strip)
             else:
-                return self.map_three_channels_sk(output_array_in)
-        else:
-            return self.map_three_channels_ws(output_array_in)
-
-    def map_three_channels_ws(self, output_array_in):
-        r = output_array_in[0]
-        g = output_array_in[1]
-        b = output_array_in[2]
-
-        output_array_out = np.zeros((3, len(r)))
-
-        if self._led_strip == "ws2811_strip_bgr":
-            output_array_out[0] = b
-            output_array_out[1] = g
-            output_array_out[2] = r
-            return output_array_out
-        elif self._led_strip == "ws2811_strip_brg":
-            output_array_out[0] = b
-            output_array_out[1] = r
-            output_array_out[2] = g
-            return output_array_out
-        elif self._led_strip == "ws2811_strip_gbr":
-            output_array_out[0] = g
-            output_array_out[1] = b
-            output_array_out[2] = r
-            return output_array_out
-        elif self._led_strip == "ws2811_strip_grb":
-            output_array_out[0] = g
-            output_array_out[1] = r
-            output_array_out[2] = b
-            return output_array_out
-        elif self._led_strip == "ws2811_strip_rbg":
-            output_array_out[0] = r
-            output_array_out[1] = b
-            output_array_out[2] = g
-            return output_array_out
-        else:
-            return output_array_in
-
-    def map_three_channels_sk(self, output_array_in):
-        r = output_array_in[0]
-        g = output_array_in[1]
-        b = output_array_in[2]
-
-        output_array_out = np.zeros((3, len(r)))
-
-        if self._led_strip == "sk6812_strip_bgrw":
-            output_array_out[0] = b
-            output_array_out[1] = g
-            output_array_out[2] = r
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_brgw":
-            output_array_out[0] = b
-            output_array_out[1] = r
-            output_array_out[2] = g
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_gbrw":
-            output_array_out[0] = g
-            output_array_out[1] = b
-            output_array_out[2] = r
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_grbw":
-            output_array_out[0] = g
-            output_array_out[1] = r
-            output_array_out[2] = b
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_rbgw":
-            output_array_out[0] = r
-            output_array_out[1] = b
-            output_array_out[2] = g
-            return output_array_out
-        else:
-            return output_array_in
-
-    def map_four_channels_sk(self, output_array_in):
-        r = output_array_in[0]
-        g = output_array_in[1]
-        b = output_array_in[2]
-        w = output_array_in[3]
-
-        output_array_out = np.zeros((4, len(r)))
-
-        if self._led_strip == "sk6812_strip_bgrw":
-            output_array_out[0] = b
-            output_array_out[1] = g
-            output_array_out[2] = r
-            output_array_out[3] = w
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_brgw":
-            output_array_out[0] = b
-            output_array_out[1] = r
-            output_array_out[2] = g
-            output_array_out[3] = w
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_gbrw":
-            output_array_out[0] = g
-            output_array_out[1] = b
-            output_array_out[2] = r
-            output_array_out[3] = w
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_grbw":
-            output_array_out[0] = g
-            output_array_out[1] = r
-            output_array_out[2] = b
-            output_array_out[3] = w
-            return output_array_out
-        elif self._led_strip == "sk6812_strip_rbgw":
-            output_array_out[0] = r
-            output_array_out[1] = b
-            output_array_out[2] = g
-            output_array_out[3] = w
-            return output_array_out
-        else:
-            return output_array_in
+                channel_order = self.WS2811_CHANNEL_ORDERS.get(self._led_strip)
+
+            if channel_order is not None:
+                channel_orders[channels] = channel_order
+
+        return channel_orders
@@ -0,0 +1,366 @@
+from time import perf_counter
+import numpy as np
+import struct
+
+
+class UDPFramePacker():
+    """
+    Splits frames into datagrams of the chunked UDP protocol.
+
+    Every datagram starts with a header of 16 bytes in network byte order:
+        magic           2 bytes   "ML"
+        version         1 byte    PROTOCOL_VERSION
+        flags           1 byte    Encoding of the frame, see UDPFrameEncoder. 0 for a plain frame.
+        sequence        4 bytes   Sequence of the frame, the same for all chunks of a frame.
+        offset          4 bytes   Position of the payload inside the frame in bytes.
+        length          2 bytes   Length of the payload in bytes.
+        chunk_index     1 byte    Index of the chunk inside the frame.
+        chunk_count     1 byte    Number of chunks of the frame.
+    followed by the payload. The chunks fit into one Ethernet frame, so they are not fragmented by the IP layer.
+    The receiver shows a frame only once all of its chunks arrived, so a lost chunk drops the whole frame.
+
+    The clients also accept raw frames, which are not wrapped into datagrams. A raw frame can start with "ML" too,
+    so a datagram is only taken as a chunk, if its whole header is consistent, see is_chunk().
+    """
+
+    MAGIC = b"ML"
+    PROTOCOL_VERSION = 1
+    HEADER = struct.Struct("!2sBBIIHBB")
+    HEADER_LENGTH = HEADER.size
+    # 1500 bytes MTU minus the IP and UDP headers.
+    MAX_DATAGRAM_LENGTH = 1472
+    MAX_PAYLOAD_LENGTH = MAX_DATAGRAM_LENGTH - HEADER_LENGTH
+    MAX_CHUNKS = 255
+
+    def __init__(self, bytes_per_led=3, max_datagram_length=MAX_DATAGRAM_LENGTH):
+        if not self.HEADER_LENGTH < max_datagram_length <= self.MAX_DATAGRAM_LENGTH:
+            raise ValueError(f"The datagrams must be longer than the header and at most {self.MAX_DATAGRAM_LENGTH} bytes.")
+        # The chunks contain only whole LEDs, so a receiver can also write them to the strip directly.
+        max_payload_length = max_datagram_length - self.HEADER_LENGTH
+        self._chunk_length = max_payload_length - max_payload_length % bytes_per_led
+        self._sequence = 0
+
+    def pack(self, frame_bytes, flags=0):
+        """
+        Return the datagrams of the next frame. frame_bytes can be any contiguous buffer, e.g. a numpy array.
+        """
+        self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+        frame_view = memoryview(frame_bytes).cast("B")
+        frame_length = len(frame_view)
+        chunk_count = max(1, -(-frame_length // self._chunk_length))
+        if chunk_count > self.MAX_CHUNKS:
+            raise ValueError(f"The frame with {frame_length} bytes does not fit into {self.MAX_CHUNKS} chunks.")
+
+        datagrams = []
+        for chunk_index in range(chunk_count):
+            offset = chunk_index * self._chunk_length
+            payload = frame_view[offset:offset + self._chunk_length]
+            header = self.HEADER.pack(self.MAGIC, self.PROTOCOL_VERSION, flags, self._sequence,
+                                      offset, len(payload), chunk_index, chunk_count)
+            datagrams.append(header + payload)
+
+        return datagrams
+
+    @staticmethod
+    def is_chunk(datagram):
+        """
+        Check the header of a datagram strictly, so a raw frame, which starts with "ML", is not taken as a chunk.
+        The payload must fill the rest of the datagram and the offset must match the chunk index:
+        All chunks except the last one have the same length, so the offset is chunk_index * length for them.
+        The last chunk can be shorter than the others.
+        """
+        if not UDPFramePacker.HEADER_LENGTH <= len(datagram) <= UDPFramePacker.MAX_DATAGRAM_LENGTH:
+            return False
+
+        magic, version, flags, _, offset, length, chunk_index, chunk_count = UDPFramePacker.HEADER.unpack_from(datagram)
+        if magic != UDPFramePacker.MAGIC or version != UDPFramePacker.PROTOCOL_VERSION \
+                or flags & ~UDPFrameEncoder.KNOWN_FLAGS or UDPFramePacker.HEADER_LENGTH + length != len(datagram) \
+                or chunk_index >= chunk_count:
+            return False
+
+        if chunk_index < chunk_count - 1:
+            return length > 0 and offset == chunk_index * length
+        return chunk_index * length <= offset <= chunk_index * UDPFramePacker.MAX_PAYLOAD_LENGTH
+
+    def get_chunk_length(self):
+        return self._chunk_length
+
+    def get_sequence(self):
+        return self._sequence
+
+    chunk_length = property(get_chunk_length)
+    sequence = property(get_sequence)
+
+
+class UDPFrameReceiver():
+    """
+    Reference receiver of the chunked UDP protocol, e.g. as a stand-in for a client in tests.
+    It does the same as the ESP client: collect the chunks of the newest frame and return the frame once it is complete.
+    Chunks of older frames are ignored, an incomplete frame is dropped when the chunks of a newer frame arrive.
+    """
+
+    # Chunks up to this many frames behind the current frame are late. Older sequences mean, that the server restarted.
+    MAX_LATE_FRAMES = 64
+
+    def __init__(self, bytes_per_led=3):
+        self._decoder = UDPFrameDecoder(bytes_per_led)
+        self._sequence = None
+        self._flags = 0
+        self._frame = bytearray()
+        self._frame_length = 0
+        self._received_chunks = set()
+        self._chunk_count = 0
+        self._frame_complete = False
+
+        self._completed_frames = 0
+        self._dropped_frames = 0
+        self._invalid_datagrams = 0
+        self._undecodable_frames = 0
+
+    @staticmethod
+    def is_chunked_datagram(datagram):
+        return UDPFramePacker.is_chunk(datagram)
+
+    def receive(self, datagram):
+        """
+        Add a datagram. Returns the decoded frame as bytes, if it completed a frame, otherwise None.
+        """
+        if not self.is_chunked_datagram(datagram):
+            self._invalid_datagrams += 1
+            return None
+
+        _, _, flags, sequence, offset, length, chunk_index, chunk_count = UDPFramePacker.HEADER.unpack_from(datagram)
+        payload = datagram[UDPFramePacker.HEADER_LENGTH:]
+
+        if sequence != self._sequence:
+            # The sequence wraps around, so compare the difference instead of the values.
+            if self._sequence is not None and 0 < ((self._sequence - sequence) & 0xFFFFFFFF) <= self.MAX_LATE_FRAMES:
+                return None
+            if self._sequence is not None and not self._frame_complete:
+                self._dropped_frames += 1
+            self.start_frame(sequence, flags, chunk_count)
+        elif self._frame_complete or chunk_index in self._received_chunks:
+            return None
+
+        if len(self._frame) < offset + length:
+            self._frame.extend(bytes(offset + length - len(self._frame)))
+        self._frame[offset:offset + length] = payload
+        self._frame_length = max(self._frame_length, offset + length)
+        self._received_chunks.add(chunk_index)
+
+        if len(self._received_chunks) < self._chunk_count:
+            return None
+
+        self._frame_complete = True
+        self._completed_frames += 1
+        frame = self._decoder.decode(self._frame[:self._frame_length], self._flags)
+        if frame is None:
+            self._undecodable_frames += 1
+        return frame
+
+    def start_frame(self, sequence, flags, chunk_count):
+        self._sequence = sequence
+        self._flags = flags
+        self._chunk_count = chunk_count
+        self._received_chunks.clear()
+        self._frame_length = 0
+        self._frame_complete = False
+
+    def get_statistics(self):
+        return {
+            "completed_frames": self._completed_frames,
+            "dropped_frames": self._dropped_frames,
+            "invalid_datagrams": self._invalid_datagrams,
+            "undecodable_frames": self._undecodable_frames
+        }
+
+    statistics = property(get_statistics)
+
+
+class UDPFrameEncoder():
+    """
+    Encodes the frames of the "compressed" UDP protocol as keyframes and delta frames, to send less data for frames,
+    which change only a little or consist of runs of the same color.
+
+    A keyframe contains the whole frame. A delta frame contains the XOR of the frame and the last keyframe,
+    so the unchanged LEDs become runs of zeros. The delta frames refer to the keyframe and not to the previous frame,
+    so a lost delta frame does not affect the following frames. After a lost keyframe, the client shows nothing
+    until the next keyframe, which is sent every keyframe_interval seconds and whenever a delta frame would be large.
+
+    The payload starts with the id of the keyframe (4 bytes, network byte order), followed by the LEDs.
+    With FLAG_RUN_LENGTH, the LEDs are run-length encoded. Every run starts with a control byte:
+        0 - 127     control + 1 different LEDs follow.
+        128 - 255   One LED follows, which is repeated control - 125 times (3 - 130).
+    """
+
+    FLAG_KEYFRAME = 0x01
+    FLAG_DELTA = 0x02
+    FLAG_RUN_LENGTH = 0x04
+    KNOWN_FLAGS = FLAG_KEYFRAME | FLAG_DELTA | FLAG_RUN_LENGTH
+
+    KEYFRAME_ID = struct.Struct("!I")
+    KEYFRAME_INTERVAL = 1.0
+    # A delta frame, which is larger than this part of the raw frame, is sent as new keyframe instead.
+    MAX_DELTA_RATIO = 0.5
+
+    MIN_RUN_LENGTH = 3
+    MAX_RUN_LENGTH = 130
+    MAX_LITERAL_LENGTH = 128
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self._keyframe_interval = keyframe_interval
+        self._keyframe = None
+        self._keyframe_id = 0
+        self._keyframe_length = 0
+        self._keyframe_time = 0.0
+        self._delta = None
+
+    def encode(self, packet, now=None):
+        """
+        Encode the uint8 array (led_count, bytes_per_led) of a frame, like OutputUDP.pack_frame returns it.
+        now is the time of the frame in seconds, the current time if it is not set.
+        Returns the payload and the flags of the frame.
+        """
+        if now is None:
+            now = perf_counter()
+
+        if self._keyframe is None or self._keyframe.shape != packet.shape \
+                or now - self._keyframe_time >= self._keyframe_interval:
+            return self.encode_keyframe(packet, now)
+
+        np.bitwise_xor(packet, self._keyframe, out=self._delta)
+        leds, flags = self.encode_leds(self._delta)
+        # A large delta frame means, that the frame moved away from the keyframe.
+        if len(leds) >= self._keyframe_length or len(leds) > packet.nbytes * self.MAX_DELTA_RATIO:
+            return self.encode_keyframe(packet, now)
+
+        return self.KEYFRAME_ID.pack(self._keyframe_id) + leds, flags | self.FLAG_DELTA
+
+    def encode_keyframe(self, packet, now):
+        if self._keyframe is None or self._keyframe.shape != packet.shape:
+            self._keyframe = np.zeros(packet.shape, dtype=np.uint8)
+            self._delta = np.zeros(packet.shape, dtype=np.uint8)
+        self._keyframe[:] = packet
+        self._keyframe_id = (self._keyframe_id + 1) & 0xFFFFFFFF
+        self._keyframe_time = now
+
+        leds, flags = self.encode_leds(packet)
+        self._keyframe_length = len(leds)
+        return self.KEYFRAME_ID.pack(self._keyframe_id) + leds, flags | self.FLAG_KEYFRAME
+
+    def encode_leds(self, leds):
+        """
+        Return the run-length encoded LEDs and FLAG_RUN_LENGTH, or the raw LEDs and 0, if they are smaller.
+        """
+        led_count, bytes_per_led = leds.shape
+        raw_leds = leds.tobytes()
+        if led_count == 0:
+            return raw_leds, 0
+
+        # The runs are found with array operations instead of a loop over the LEDs, because the output runs
+        # once per frame and a strip has up to a few thousand LEDs.
+        led_indexes = np.arange(led_count)
+        run_starts = np.concatenate(([0], np.flatnonzero(np.any(leds[1:] != leds[:-1], axis=1)) + 1))
+        run_lengths = np.diff(np.append(run_starts, led_count))
+        long_runs = run_lengths >= self.MIN_RUN_LENGTH
+        if not long_runs.any():
+            return raw_leds, 0
+        run_starts = run_starts[long_runs]
+        run_lengths = run_lengths[long_runs]
+
+        # Split the long runs into repeats of up to MAX_RUN_LENGTH LEDs. A rest, which is too short, becomes a literal.
+        repeat_counts = run_lengths // self.MAX_RUN_LENGTH + (run_lengths % self.MAX_RUN_LENGTH >= self.MIN_RUN_LENGTH)
+        repeat_runs = np.repeat(np.arange(len(run_starts)), repeat_counts)
+        repeat_indexes = np.arange(len(repeat_runs)) - np.repeat(np.cumsum(repeat_counts) - repeat_counts, repeat_counts)
+        repeat_starts = run_starts[repeat_runs] + repeat_indexes * self.MAX_RUN_LENGTH
+        repeat_lengths = np.minimum(run_lengths[repeat_runs] - repeat_indexes * self.MAX_RUN_LENGTH, self.MAX_RUN_LENGTH)
+
+        coverage = np.zeros(led_count + 1, dtype=np.int32)
+        coverage[repeat_starts] += 1
+        coverage[repeat_starts + repeat_lengths] -= 1
+        literals = np.cumsum(coverage[:-1]) == 0
+
+        # The remaining LEDs are split into literals of up to MAX_LITERAL_LENGTH LEDs.
+        literal_starts = literals.copy()
+        literal_starts[1:] &= ~literals[:-1]
+        literal_offsets = led_indexes - np.maximum.accumulate(np.where(literal_starts, led_indexes, 0))
+        token_starts = literals & (literal_offsets % self.MAX_LITERAL_LENGTH == 0)
+        token_starts[repeat_starts] = True
+
+        # A literal sends all of its LEDs, a repeat only its first LED.
+        sent_leds = literals | token_starts
+        token_start_indexes = np.flatnonzero(token_starts)
+        encoded_length = int(np.count_nonzero(sent_leds)) * bytes_per_led + len(token_start_indexes)
+        if encoded_length >= len(raw_leds):
+            return raw_leds, 0
+
+        token_lengths = np.diff(np.append(token_start_indexes, led_count))
+        control_bytes = np.where(literals[token_start_indexes], token_lengths - 1, token_lengths + 125)
+        control_positions = (np.cumsum(sent_leds)[token_start_indexes] - 1) * bytes_per_led \
+            + np.arange(len(token_start_indexes))
+
+        encoded_leds = np.empty(encoded_length, dtype=np.uint8)
+        led_positions = np.ones(encoded_length, dtype=bool)
+        led_positions[control_positions] = False
+        encoded_leds[control_positions] = control_bytes
+        encoded_leds[led_positions] = leds[sent_leds].ravel()
+        return encoded_leds.tobytes(), self.FLAG_RUN_LENGTH
+
+
+class UDPFrameDecoder():
+    """
+    Reference decoder of the frames of UDPFrameEncoder. Plain frames are returned unchanged.
+    """
+
+    def __init__(self, bytes_per_led=3):
+        self._bytes_per_led = bytes_per_led
+        self._keyframe = None
+        self._keyframe_id = None
+
+    def decode(self, payload, flags):
+        """
+        Return the frame as bytes, or None if it cannot be decoded, e.g. a delta frame of a lost keyframe.
+        """
+        if not flags & (UDPFrameEncoder.FLAG_KEYFRAME | UDPFrameEncoder.FLAG_DELTA):
+            return bytes(payload)
+
+        if len(payload) < UDPFrameEncoder.KEYFRAME_ID.size:
+            return None
+        keyframe_id, = UDPFrameEncoder.KEYFRAME_ID.unpack_from(payload)
+        leds = payload[UDPFrameEncoder.KEYFRAME_ID.size:]
+        if flags & UDPFrameEncoder.FLAG_RUN_LENGTH:
+            leds = self.decode_run_length(leds)
+            if leds is None:
+                return None
+
+        if flags & UDPFrameEncoder.FLAG_KEYFRAME:
+            self._keyframe = np.frombuffer(bytes(leds), dtype=np.uint8)
+            self._keyframe_id = keyframe_id
+            return self._keyframe.tobytes()
+
+        if keyframe_id != self._keyframe_id or len(leds) != len(self._keyframe):
+            return None
+        return np.bitwise_xor(np.frombuffer(bytes(leds), dtype=np.uint8), self._keyframe).tobytes()
+
+    def decode_run_length(self, encoded_leds):
+        """
+        Return the decoded LEDs, or None if the runs are truncated.
+        """
+        leds = bytearray()
+        position = 0
+        while position < len(encoded_leds):
+            control = encoded_leds[position]
+            position += 1
+            if control < 128:
+                length = (control + 1) * self._bytes_per_led
+                if position + length > len(encoded_leds):
+                    return None
+                leds += encoded_leds[position:position + length]
+            else:
+                length = self._bytes_per_led
+                if position + length > len(encoded_leds):
+                    return None
+                leds += encoded_leds[position:position + length] * (control - 125)
+            position += length
+
+        return leds
@@ -1,15 +1,34 @@
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
+
+from multiprocessing.connection import wait
 from multiprocessing import Queue
+from queue import Full
 import logging
 
 
 class QueueWrapper():
-    def __init__(self, queue):
+    def __init__(self, queue, count_drops=True):
+        """
+        count_drops: Count the elements, which put_none_blocking() deletes from a full queue, in queue_drops_total.
+        Disable it for queues, which are only read now and then and drop their old elements by design.
+        """
         self.logger = logging.getLogger(__name__)
         self.queue = queue
+        self._count_drops = count_drops
 
     def put_blocking(self, element):
         self.queue.put(element, block=True)
 
+    def put_blocking_with_timeout(self, element, timeout=1):
+        """
+        Returns False, if the queue stayed full until the timeout.
+        """
+        try:
+            self.queue.put(element, block=True, timeout=timeout)
+            return True
+        except Full:
+            return False
+
     def put_none_blocking(self, element):
         if self.queue.full():
             self.__delete_last_element()
@@ -18,9 +37,9 @@ class QueueWrapper():
     def get_blocking(self):
         return self.queue.get(block=True)
 
-    def get_blocking_with_timeout(self):
+    def get_blocking_with_timeout(self, timeout=1):
         try:
-            return self.queue.get(block=True, timeout=1)
+            return self.queue.get(block=True, timeout=timeout)
         except Exception as e:
             self.logger.debug(f"Could not get item from queue: {str(e)}")
             return None
@@ -34,9 +53,28 @@ class QueueWrapper():
     def full(self):
         return self.queue.full()
 
+    def get_reader(self):
+        """
+        Return the connection the queue reads from. It becomes readable as soon as an item arrives.
+        """
+        return self.queue._reader
+
+    @staticmethod
+    def wait(queue_wrappers, timeout=None):
+        """
+        Block until at least one of the queues contains an item or the timeout is reached.
+        Returns the list of the queues with items. It is empty after a timeout.
+        """
+        readers = {queue_wrapper.get_reader(): queue_wrapper for queue_wrapper in queue_wrappers}
+        return [readers[reader] for reader in wait(list(readers.keys()), timeout)]
+
+    reader = property(get_reader)
+
     def __delete_last_element(self):
         try:
             delete_element = self.get_none_blocking()
             del delete_element
+            if self._count_drops:
+                MetricsRegistry.instance().increment("queue_drops_total")
         except Exception as e:
             pass
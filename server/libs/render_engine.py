@@ -0,0 +1,98 @@
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.output_service import OutputService  # pylint: disable=E0611, E0401
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+from libs.audio_clock import AudioClock  # pylint: disable=E0611, E0401
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+import logging
+
+
+class RenderEngine():
+    """
+    Consolidated engine mode.
+    Instead of one EffectService and one OutputService process per device,
+    this process steps the effects and outputs of all devices inside one scheduler loop.
+    All devices share the audio frames and the ColorService cache of this process.
+    """
+    def start(self, devices, render_workers=1, render_clock="timer"):
+        self.logger = logging.getLogger(__name__)
+        MetricsRegistry.instance().process_name = "render_engine"
+
+        self._render_items = []
+        for device in devices:
+            effect_service = EffectService()
+            effect_service.init_effect_service(device)
+
+            output_service = OutputService()
+            output_service.init_output_service(device)
+
+            self._render_items.append({
+                "device": device,
+                "effect_service": effect_service,
+                "output_service": output_service
+            })
+
+        # With the audio render clock, all devices render once per audio frame.
+        # The scheduler runs with the highest fps of the devices, if there are no audio frames.
+        self._audio_clock = None
+        if render_clock == "audio" and self._render_items:
+            self._audio_clock = AudioClock(devices[0].audio_ring_buffer)
+            self._frame_scheduler = FrameScheduler(max(device.device_config["fps"] for device in devices))
+
+        # Numpy releases the GIL for most array operations, so a small pool helps with many devices.
+        self._executor = None
+        if render_workers > 1 and len(self._render_items) > 1:
+            self._executor = ThreadPoolExecutor(max_workers=render_workers)
+
+        self.logger.info(f"Render engine started. Devices: {len(self._render_items)} | Workers: {render_workers}")
+
+        while True:
+            try:
+                self.engine_routine()
+            except KeyboardInterrupt:
+                break
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def engine_routine(self):
+        if not self._render_items:
+            sleep(1)
+            return
+
+        if self._audio_clock is not None:
+            self._audio_clock.wait(self._frame_scheduler)
+            current_time = perf_counter()
+            due_render_items = self._render_items
+        else:
+            current_time = perf_counter()
+            due_render_items = [item for item in self._render_items
+                                if item["effect_service"].frame_scheduler.next_deadline <= current_time]
+
+        if self._executor is None:
+            for render_item in due_render_items:
+                self.render_device(render_item)
+        else:
+            list(self._executor.map(self.render_device, due_render_items))
+
+        # The scheduler of each effect service keeps the deadlines and skips the frames of a device, which fell behind.
+        for render_item in due_render_items:
+            render_item["effect_service"].frame_scheduler.advance(current_time)
+
+        if self._audio_clock is not None:
+            return
+
+        next_deadline = min(item["effect_service"].frame_scheduler.next_deadline for item in self._render_items)
+        waiting_time = next_deadline - perf_counter()
+        if waiting_time > 0:
+            sleep(waiting_time)
+
+    def render_device(self, render_item):
+        try:
+            render_item["effect_service"].effect_routine()
+            render_item["output_service"].output_routine()
+        except Exception as e:
+            self.logger.exception(
+                f'Could not render device: {render_item["device"].device_config["device_name"]}. Exception: {e}')
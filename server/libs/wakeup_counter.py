@@ -0,0 +1,39 @@
+from time import time
+import logging
+import os
+
+
+class WakeupCounter():
+    """
+    Measurement mode for the main loops.
+    Counts how often a loop woke up and logs the wakeups per second of the process every ten seconds.
+    Enable it with general_settings.measure_wakeups.
+    """
+    def __init__(self, name, enabled=False, interval=10):
+        self.logger = logging.getLogger(__name__)
+
+        self._name = name
+        self._enabled = enabled
+        self._interval = interval
+        self._wakeups = 0
+        self._start_time = time()
+
+    def count(self):
+        if not self._enabled:
+            return
+
+        self._wakeups += 1
+
+        time_dif = time() - self._start_time
+        if time_dif >= self._interval:
+            self.logger.info(f"Wakeups per second: {self._wakeups / time_dif:.2f} | {self._name} | PID: {os.getpid()}")
+            self._wakeups = 0
+            self._start_time = time()
+
+    def set_enabled(self, enabled):
+        self._enabled = enabled
+
+    def get_enabled(self):
+        return self._enabled
+
+    enabled = property(get_enabled, set_enabled)
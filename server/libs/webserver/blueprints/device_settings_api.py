@@ -209,7 +209,7 @@ def set_output_type_device_settings():  # pylint: disable=E0211
                        If `output_type_key` is output_raspi, the following keys are\n
                        allowed inside `settings` - led_channel, led_dma, led_freq_hz, led_invert, led_pin\n\n
                        If `output_type_key` is output_udp, the following keys are\n
-                       allowed inside `settings` - udp_client_ip, udp_client_port\n\n
+                       allowed inside `settings` - udp_client_ip, udp_client_port, udp_protocol\n\n
                        It is not required to include all above keys inside `settings`
 
           schema:
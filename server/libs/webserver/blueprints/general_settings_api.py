@@ -21,8 +21,9 @@ def get_general_settings():  # pylint: disable=E0211
           in: query
           type: string
           required: false
-          enum: ['default_sample_rate', 'device_id', 'frames_per_buffer', 'log_file_enabled', 'log_level_console', 'log_level_file',
-                 'max_frequency', 'min_frequency', 'min_volume_threshold', 'n_fft_bins', 'n_rolling_history', webserver_port]
+          enum: ['audio_replay_speed', 'config_write_delay', 'default_sample_rate', 'device_id', 'effect_cache_size', 'engine_mode', 'frames_per_buffer', 'log_file_enabled', 'log_level_console', 'log_level_file',
+                 'max_frequency', 'measure_wakeups', 'min_frequency', 'min_volume_threshold', 'n_fft_bins', 'n_rolling_history', 'output_keep_alive_interval', 'output_phase_lock', 'render_clock',
+                 'render_interpolation', 'render_workers', webserver_port]
           description: Specific `setting_key` to return from general settings\n
                        Return all settings if not specified
     responses:
@@ -87,17 +88,27 @@ def set_general_settings():  # pylint: disable=E0211
                 example:
                     {
                         settings: {
+                            audio_replay_speed: float,
+                            config_write_delay: float,
                             default_sample_rate: int,
                             device_id: str,
+                            effect_cache_size: int,
+                            engine_mode: str,
                             frames_per_buffer: int,
                             log_file_enabled: bool,
                             log_level_console: str,
                             log_level_file: str,
                             max_frequency: int,
+                            measure_wakeups: bool,
                             min_frequency: int,
                             min_volume_threshold: float,
                             n_fft_bins: int,
                             n_rolling_history: int,
+                            output_keep_alive_interval: float,
+                            output_phase_lock: bool,
+                            render_clock: str,
+                            render_interpolation: bool,
+                            render_workers: int,
                             webserver_port: int
                         }
                     }
@@ -109,17 +120,27 @@ def set_general_settings():  # pylint: disable=E0211
                 example:
                     {
                         settings: {
+                            audio_replay_speed: float,
+                            config_write_delay: float,
                             default_sample_rate: int,
                             device_id: str,
+                            effect_cache_size: int,
+                            engine_mode: str,
                             frames_per_buffer: int,
                             log_file_enabled: bool,
                             log_level_console: str,
                             log_level_file: str,
                             max_frequency: int,
+                            measure_wakeups: bool,
                             min_frequency: int,
                             min_volume_threshold: float,
                             n_fft_bins: int,
                             n_rolling_history: int,
+                            output_keep_alive_interval: float,
+                            output_phase_lock: bool,
+                            render_clock: str,
+                            render_interpolation: bool,
+                            render_workers: int,
                             webserver_port: int
                         }
                     }
@@ -174,6 +195,7 @@ def export_config():  # pylint: disable=E0211
         200:
             description: OK
     """
+    Executer.instance.general_settings_executer.flush_config()
     Executer.instance.logger.debug(f"Send file: {Executer.instance.general_settings_executer.export_config_path}")
     return send_file(Executer.instance.general_settings_executer.export_config_path, as_attachment=True, cache_timeout=-1, mimetype="text/html")
 
@@ -35,6 +35,10 @@ class GeneralSettingsExecuter(ExecuterBase):
         self._config_instance.reset_config()
         self._config = self._config_instance.config
 
+    def flush_config(self):
+        # The config file can lag behind the changes, until the write delay passed.
+        self._config_instance.flush_config()
+
     def import_config(self, imported_config):
         if imported_config is None:
             self.logger.error("Could not import Config. Config is None.")
@@ -1,6 +1,6 @@
 from libs.webserver.executer import Executer
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_login import login_required
 
 system_info_api = Blueprint('system_info_api', __name__)
@@ -65,6 +65,78 @@ def get_performance():  # pylint: disable=E0211
         return jsonify(data_out)
 
 
+@system_info_api.get('/api/system/metrics')
+@login_required
+def get_metrics():  # pylint: disable=E0211
+    """
+    Performance counters of all processes
+    Counters, gauges and summaries (rolling histograms) of every MLSC process.
+    The percentiles of the summaries cover the last report interval, `count` and `sum` the lifetime of the process.
+    Durations are in seconds. Use `format=prometheus` to get the Prometheus text format.
+    ---
+    tags:
+        - System
+    parameters:
+        - name: format
+          in: query
+          type: string
+          required: false
+          enum: ['json', 'prometheus']
+          description: Output format. Default is `json`
+    responses:
+        200:
+            description: OK
+            schema:
+                type: object,
+                example:
+                    {
+                        processes: [
+                            {
+                                process_id: int,
+                                process_name: str,
+                                metrics: [
+                                    {
+                                        name: str,
+                                        type: str,
+                                        labels: {
+                                            device: str
+                                        },
+                                        value: float
+                                    },
+                                    {
+                                        name: str,
+                                        type: "summary",
+                                        labels: {},
+                                        count: int,
+                                        sum: float,
+                                        p50: float,
+                                        p95: float,
+                                        p99: float,
+                                        max: float
+                                    },
+                                    ...
+                                ]
+                            },
+                            ...
+                        ]
+                    }
+        403:
+            description: Could not find data value
+    """
+    if request.args.get("format") == "prometheus":
+        data = Executer.instance.system_info_executer.get_system_info_metrics_prometheus()
+        return Response(data, mimetype="text/plain; version=0.0.4")
+
+    data_out = dict()
+    data = Executer.instance.system_info_executer.get_system_info_metrics()
+    data_out["processes"] = data
+
+    if data is None:
+        return "Could not find data value: data", 403
+    else:
+        return jsonify(data_out)
+
+
 @system_info_api.get('/api/system/temperature')
 @login_required
 def get_temperature():  # pylint: disable=E0211
@@ -211,6 +283,62 @@ def get_devices_status():  # pylint: disable=E0211
         return jsonify(data_out)
 
 
+@system_info_api.get('/api/system/latency')
+@login_required
+def get_latency():  # pylint: disable=E0211
+    """
+    Latency from the microphone to the LED strip
+    Percentiles of the last report interval of every device, in milliseconds.
+    The audio stages and the total latency are only measured for audio effects.
+    `latency` is null until the device sent its first report.
+    ---
+    tags:
+        - System
+    responses:
+        200:
+            description: OK
+            schema:
+                type: object,
+                example:
+                    {
+                        devices: [
+                            {
+                                id: str,
+                                name: str,
+                                latency: {
+                                    window: float,
+                                    stages: {
+                                        capture_to_dsp: {
+                                            count: int,
+                                            p50: float,
+                                            p95: float,
+                                            p99: float,
+                                            max: float
+                                        },
+                                        dsp_to_effect: {...},
+                                        effect: {...},
+                                        effect_to_output: {...},
+                                        output_write: {...},
+                                        total: {...}
+                                    }
+                                }
+                            },
+                            ...
+                        ]
+                    }
+        403:
+            description: Could not find data value
+    """
+    data_out = dict()
+    data = Executer.instance.system_info_executer.get_system_info_latency()
+    data_out["devices"] = data
+
+    if data is None:
+        return "Could not find data value: data", 403
+    else:
+        return jsonify(data_out)
+
+
 @system_info_api.get('/api/system/version')
 @login_required
 def get_version():  # pylint: disable=E0211
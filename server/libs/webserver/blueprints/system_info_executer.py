@@ -1,7 +1,10 @@
 from libs.webserver.executer_base import ExecuterBase
+from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
 
 from flask import __version__ as flask_version
 from icmplib import ping
+from time import time
 import subprocess
 import platform
 import psutil
@@ -13,6 +16,16 @@ __version__ = "2.2 Stable"
 
 
 class SystemInfoExecuter(ExecuterBase):
+    def __init__(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio, stats_queue=None):
+        # Call the constructor of the base class.
+        super(SystemInfoExecuter, self).__init__(config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio)
+
+        self._stats_queue = QueueWrapper(stats_queue) if stats_queue is not None else None
+        # The latest statistics of every device.
+        self._device_stats = {}
+        # The latest metrics of every process.
+        self._process_metrics = {}
+        MetricsRegistry.instance().process_name = "webserver"
 
     def get_system_info_performance(self):
         data = dict()
@@ -127,6 +140,66 @@ class SystemInfoExecuter(ExecuterBase):
         host = ping(address, count=1, interval=0.2)
         return host.is_alive
 
+    def get_system_info_latency(self):
+        self.read_stats_queue()
+
+        devices = []
+        for device_id, device_config in self._config["device_configs"].items():
+            device_stats = self._device_stats.get(device_id, {})
+            devices.append({
+                "id": device_id,
+                "name": device_config["device_name"],
+                "latency": device_stats.get("latency")
+            })
+        return devices
+
+    def read_stats_queue(self):
+        """
+        Keep the latest statistics of every device. The devices send them every few seconds.
+        """
+        if self._stats_queue is None:
+            return
+
+        while not self._stats_queue.empty():
+            stats = self._stats_queue.get_blocking_with_timeout(0)
+            if stats is None:
+                break
+
+            if "metrics" in stats:
+                stats["received"] = time()
+                self._process_metrics[stats["process_id"]] = stats
+            else:
+                self._device_stats.setdefault(stats["device_id"], {}).update(stats)
+
+    def get_system_info_metrics(self):
+        """
+        Return the latest metrics of every process, including the webserver.
+        Processes, which did not report for three intervals, are removed, e.g. the processes of a restarted device.
+        """
+        self.read_stats_queue()
+
+        max_age = 3 * MetricsRegistry.REPORT_INTERVAL
+        for process_id in list(self._process_metrics.keys()):
+            if time() - self._process_metrics[process_id]["received"] > max_age:
+                del self._process_metrics[process_id]
+
+        metrics_registry = MetricsRegistry.instance()
+        processes = [{
+            "process_id": metrics_registry.process_id,
+            "process_name": metrics_registry.process_name,
+            "metrics": metrics_registry.get_snapshot(reset=False)
+        }]
+        for process_metrics in self._process_metrics.values():
+            processes.append({
+                "process_id": process_metrics["process_id"],
+                "process_name": process_metrics["process_name"],
+                "metrics": process_metrics["metrics"]
+            })
+        return processes
+
+    def get_system_info_metrics_prometheus(self):
+        return MetricsRegistry.format_prometheus(self.get_system_info_metrics())
+
     def get_system_version(self):
         versions = [
             {
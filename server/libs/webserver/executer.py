@@ -12,7 +12,7 @@ import logging
 
 
 class Executer():
-    def __init__(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio):
+    def __init__(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio, stats_queue=None):
         self.logger = logging.getLogger(__name__)
 
         self.authentication_executer = AuthenticationExecuter(
@@ -30,7 +30,7 @@ class Executer():
         self.general_settings_executer = GeneralSettingsExecuter(
             config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio)
         self.system_info_executer = SystemInfoExecuter(
-            config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio)
+            config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio, stats_queue)
         self.microphone_settings_executer = MicrophoneSettingsExecuter(
             config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio)
 
@@ -45,17 +45,19 @@ class ExecuterBase():
             self.effects_queue.put(effect_item)
         self.logger.debug("EnumItem put into queue.")
 
-    def put_into_notification_queue(self, notificication, device):
+    def put_into_notification_queue(self, notificication, device, payload=None):
         self.logger.debug("Preparing new Notification...")
-        notification_item = NotificationItem(notificication, device)
+        notification_item = NotificationItem(notificication, device, payload)
         self.logger.debug(
             f"Notification Item prepared: {notification_item.notification_enum} {notification_item.device_id}")
         self.notification_queue_out.put(notification_item)
         self.logger.debug("Notification Item put into queue.")
 
     def refresh_device(self, deviceId):
+        # The config file is written with a delay, so the other processes get the current config with the notification.
+        # The request threads keep changing the config, so a snapshot is sent.
         self.put_into_notification_queue(
-            NotificationEnum.config_refresh, deviceId)
+            NotificationEnum.config_refresh, deviceId, self._config_instance.get_config_snapshot())
 
     def validate_data_in(self, dictionary, keys):
         if not (type(dictionary) is dict):
@@ -20,7 +20,7 @@ DEBUG = False
 
 
 class Webserver():
-    def start(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio):
+    def start(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio, stats_queue=None):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
@@ -28,9 +28,10 @@ class Webserver():
         self.notification_queue_out = notification_queue_out
         self.effects_queue = effects_queue
         self._py_audio = py_audio
+        self._stats_queue = stats_queue
 
         self.webserver_executer = Executer(
-            config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio)
+            config_lock, notification_queue_in, notification_queue_out, effects_queue, py_audio, stats_queue)
         Webserver.instance = self
 
         self.server = create_app()
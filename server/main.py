@@ -11,6 +11,7 @@ if version_info < (3, 6):
     sys.exit("\033[91mError: MLSC requires Python 3.6 or greater.")
 
 from libs.audio_process_service import AudioProcessService
+from libs.audio_ring_buffer import AudioRingBuffer
 from libs.notification_service import NotificationService
 from libs.webserver.webserver import Webserver
 from libs.device_manager import DeviceManager
@@ -87,7 +88,12 @@ class Main():
         # Prepare the queue for the output
         self._output_queue = Queue(2)
         self._effects_queue = Queue(100)
-        self._audio_queue = Queue(2)
+
+        # Shared memory for the audio frames. Every effect reads the latest frame from here.
+        self._audio_ring_buffer = AudioRingBuffer()
+
+        # The devices report their statistics to the webserver.
+        self._stats_queue = Queue(100)
 
         # Prepare all notification queues
         self._notification_queue_audio_in = Queue(100)
@@ -108,7 +114,8 @@ class Main():
                 self._notification_queue_device_manager_in,
                 self._notification_queue_device_manager_out,
                 self._effects_queue,
-                self._audio_queue,
+                self._audio_ring_buffer,
+                self._stats_queue,
             ))
         self._device_manager_process.start()
 
@@ -136,7 +143,8 @@ class Main():
                 self._notification_queue_webserver_in,
                 self._notification_queue_webserver_out,
                 self._effects_queue,
-                self._py_audio
+                self._py_audio,
+                self._stats_queue
             ))
         self._webserver_process.start()
 
@@ -148,8 +156,9 @@ class Main():
                 self._config_lock,
                 self._notification_queue_audio_in,
                 self._notification_queue_audio_out,
-                self._audio_queue,
-                self._py_audio
+                self._audio_ring_buffer,
+                self._py_audio,
+                self._stats_queue
             ))
         self._audio_process.start()
 
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The modules import each other as "libs.<module>", like main.py runs them from the server directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libs.benchmarks.benchmark_device import BenchmarkDevice  # pylint: disable=E0611, E0401
+
+
+@pytest.fixture
+def config_template():
+    """
+    The config template with one device. Its device config is config_template["device_configs"]["benchmark_device"].
+    """
+    return BenchmarkDevice.load_config_template()
+
+
+@pytest.fixture
+def device_config(config_template):
+    return config_template["device_configs"][BenchmarkDevice.DEVICE_ID]
@@ -0,0 +1,37 @@
+from libs.audio_replay import AudioReplay  # pylint: disable=E0611, E0401
+from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+
+from multiprocessing import Queue
+import numpy as np
+import time
+import wave
+
+
+def write_wav(path, sample_rate=48000):
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.zeros(sample_rate, dtype=np.int16).tobytes())
+
+
+def test_close_stops_a_replay_waiting_for_a_full_queue(tmp_path):
+    wav_path = tmp_path / "silence.wav"
+    write_wav(wav_path)
+
+    # Nobody reads the queue, like after the audio service replaced it with a new one.
+    audio_buffer_queue = QueueWrapper(Queue(1))
+    passed_buffers = []
+
+    def buffer_callback(in_data, blocking):
+        passed_buffers.append(blocking)
+        return audio_buffer_queue.put_blocking_with_timeout(in_data, 0.05)
+
+    audio_replay = AudioReplay(f"file:{wav_path}", 48000, 512, 0, buffer_callback)
+    time.sleep(0.3)
+    audio_replay.close()
+
+    assert not audio_replay._thread.is_alive()
+    # The first buffer was queued, the second one was passed again, until the replay stopped.
+    assert len(passed_buffers) > 2
+    assert all(passed_buffers)
@@ -0,0 +1,139 @@
+from libs.audio_ring_buffer import AudioRingBuffer  # pylint: disable=E0611, E0401
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
+
+from multiprocessing import Process, Queue
+from threading import Thread
+import numpy as np
+import time
+
+
+def wait_for_frames(audio_ring_buffer):
+    while True:
+        audio_ring_buffer.wait_for_frame(audio_ring_buffer.sequence, 1)
+
+
+def read_frames(audio_ring_buffer, frame_count, result_queue):
+    """
+    Read the latest frames like an effect and report the sequences of the frames, which were not consistent.
+    """
+    last_sequence = 0
+    read_frames = 0
+    inconsistent_frames = []
+    record_buffer = audio_ring_buffer.create_record_buffer()
+    while last_sequence < frame_count and audio_ring_buffer.wait_for_frame(last_sequence, 5):
+        audio_data = audio_ring_buffer.read_latest(last_sequence, record_buffer)
+        if audio_data is None:
+            continue
+        if audio_data["sequence"] <= last_sequence or audio_data["vol"] != audio_data["sequence"] \
+                or audio_data["timestamp"] != audio_data["sequence"] or not np.all(audio_data["mel"] == audio_data["sequence"]):
+            inconsistent_frames.append(audio_data["sequence"])
+        last_sequence = audio_data["sequence"]
+        read_frames += 1
+    result_queue.put((last_sequence, read_frames, inconsistent_frames))
+
+
+def test_latest_frame_after_wraparound():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24, slots=4)
+    assert audio_ring_buffer.read_latest() is None
+
+    for sequence in range(1, 11):
+        freq_detects = {detection_type: sequence == 3 for detection_type in BeatDetector.DETECTION_TYPES}
+        freq_strengths = {detection_type: sequence / 10 for detection_type in BeatDetector.DETECTION_TYPES}
+        audio_ring_buffer.write(np.full(24, sequence), sequence, sequence, freq_detects, freq_strengths)
+
+    audio_data = audio_ring_buffer.read_latest(5)
+    assert audio_data["sequence"] == 10
+    assert audio_data["vol"] == 10
+    assert audio_data["timestamp"] == 10
+    assert np.all(audio_data["mel"] == 10)
+    assert np.all(audio_data["freq_strengths"] == 1)
+    # The beat of frame 3 is still reported, although its slot was overwritten twice.
+    assert np.all(audio_data["freq_detect_sequences"] == 3)
+    assert audio_ring_buffer.read_latest(10) is None
+
+
+def test_mel_is_cut_to_the_maximum_bins():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24)
+    audio_ring_buffer.write(np.arange(30), 0)
+
+    assert np.array_equal(audio_ring_buffer.read_latest()["mel"], np.arange(24))
+
+    audio_ring_buffer.write(np.arange(12), 0)
+    assert np.array_equal(audio_ring_buffer.read_latest()["mel"], np.arange(12))
+
+
+def test_read_frame_is_not_changed_by_the_writer():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24, slots=2)
+    record_buffer = audio_ring_buffer.create_record_buffer()
+    audio_ring_buffer.write(np.full(24, 1), 1, 1, None, {detection_type: 0.1 for detection_type in BeatDetector.DETECTION_TYPES})
+    audio_data = audio_ring_buffer.read_latest(0, record_buffer)
+
+    # The writer wraps around the ring, while the effect still uses the frame.
+    for sequence in range(2, 6):
+        audio_ring_buffer.write(np.full(24, sequence), sequence, sequence, None, {detection_type: sequence / 10 for detection_type in BeatDetector.DETECTION_TYPES})
+
+    assert np.all(audio_data["mel"] == 1)
+    assert np.all(audio_data["freq_strengths"] == 0.1)
+
+    # The next read reuses the buffer.
+    assert np.all(audio_ring_buffer.read_latest(1, record_buffer)["mel"] == 5)
+    assert np.all(audio_data["mel"] == 5)
+
+
+def test_reader_process_reads_consistent_frames():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24)
+    frame_count = 300
+    result_queue = Queue()
+    reader_process = Process(target=read_frames, args=(audio_ring_buffer, frame_count, result_queue))
+    reader_process.start()
+
+    for sequence in range(1, frame_count + 1):
+        audio_ring_buffer.write(np.full(24, sequence), sequence, sequence)
+        time.sleep(0.001)
+
+    last_sequence, read_frame_count, inconsistent_frames = result_queue.get(timeout=10)
+    reader_process.join(5)
+
+    assert last_sequence == frame_count
+    assert read_frame_count > 0
+    assert inconsistent_frames == []
+
+
+def test_wait_for_frame_returns_when_a_frame_is_published():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24)
+    audio_ring_buffer.write(np.zeros(24), 0)
+
+    writer_thread = Thread(target=lambda: (time.sleep(0.1), audio_ring_buffer.write(np.ones(24), 1)))
+    writer_thread.start()
+    assert audio_ring_buffer.wait_for_frame(1, timeout=5)
+    writer_thread.join()
+
+    assert audio_ring_buffer.read_latest(1)["vol"] == 1
+
+
+def test_wait_for_frame_times_out_without_a_frame():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24)
+
+    start_time = time.perf_counter()
+    assert not audio_ring_buffer.wait_for_frame(0, timeout=0.1)
+    assert time.perf_counter() - start_time >= 0.1
+
+
+def test_terminated_reader_does_not_block_the_writer():
+    audio_ring_buffer = AudioRingBuffer(max_mel_bins=24)
+    reader_process = Process(target=wait_for_frames, args=(audio_ring_buffer,))
+    reader_process.start()
+
+    # Terminate the reader while it waits for the next frame.
+    for sequence in range(10):
+        audio_ring_buffer.write(np.zeros(24), sequence)
+        time.sleep(0.01)
+    reader_process.terminate()
+    reader_process.join(5)
+
+    writer_thread = Thread(target=lambda: [audio_ring_buffer.write(np.zeros(24), 0) for i in range(10)], daemon=True)
+    writer_thread.start()
+    writer_thread.join(5)
+
+    assert not writer_thread.is_alive()
+    assert audio_ring_buffer.sequence == 20
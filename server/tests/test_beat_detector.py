@@ -0,0 +1,92 @@
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
+import libs.beat_detector  # pylint: disable=E0611, E0401
+
+from collections import deque
+import numpy as np
+import pytest
+
+
+class PerBinBeatDetector():
+    """
+    The detection of the effects before the BeatDetector, with a deque per fft bin and a loop over the bins.
+    """
+    def __init__(self, n_fft_bins, clock, history=40):
+        self.clock = clock
+        self.n_fft_bins = n_fft_bins
+        self.freq_channel_history = history
+        self.freq_channels = [deque(maxlen=history) for i in range(n_fft_bins)]
+        self.current_freq_detects = {"beat": False, "low": False, "mid": False, "high": False}
+        self.prev_freq_detects = {"beat": 0, "low": 0, "mid": 0, "high": 0}
+
+        beat_detector = BeatDetector(n_fft_bins)
+        self.detection_ranges = beat_detector.detection_ranges
+        self.min_detect_amplitude = beat_detector.min_detect_amplitude
+        self.min_percent_diff = beat_detector.min_percent_diff
+
+    def update_freq_channels(self, y):
+        for i in range(len(y)):
+            self.freq_channels[i].appendleft(y[i])
+
+    def detect_freqs(self):
+        channel_avgs = []
+        differences = []
+
+        for i in range(self.n_fft_bins):
+            channel_avgs.append(sum(self.freq_channels[i]) / len(self.freq_channels[i]))
+            if channel_avgs[i] != 0:
+                differences.append(((self.freq_channels[i][0] - channel_avgs[i]) * 100) // channel_avgs[i])
+            else:
+                differences.append(0)
+        for i in ["beat", "low", "mid", "high"]:
+            if (any(differences[j] >= self.min_percent_diff[i]
+                    and self.freq_channels[j][0] >= self.min_detect_amplitude[i]
+                    for j in range(*self.detection_ranges[i]))
+                and (self.clock() - self.prev_freq_detects[i] > 0.2)
+                    and len(self.freq_channels[0]) == self.freq_channel_history):
+                self.prev_freq_detects[i] = self.clock()
+                self.current_freq_detects[i] = True
+            else:
+                self.current_freq_detects[i] = False
+
+
+@pytest.mark.parametrize("n_fft_bins", [5, 24, 64])
+def test_detections_match_the_per_bin_logic(n_fft_bins, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(libs.beat_detector, "time", lambda: now[0])
+    per_bin_beat_detector = PerBinBeatDetector(n_fft_bins, lambda: now[0])
+    beat_detector = BeatDetector(n_fft_bins)
+    random_generator = np.random.default_rng(n_fft_bins)
+
+    detections = 0
+    for frame in range(2000):
+        now[0] += 0.05
+        # Mostly silence with loud frames in between, like a drum loop.
+        y = random_generator.random(n_fft_bins) ** 3 * (random_generator.random() < 0.3) * 2
+
+        per_bin_beat_detector.update_freq_channels(y)
+        per_bin_beat_detector.detect_freqs()
+        beat_detector.update(y)
+        beat_detector.detect()
+
+        assert beat_detector.current_freq_detects == per_bin_beat_detector.current_freq_detects, frame
+        detections += sum(beat_detector.current_freq_detects.values())
+
+    assert detections > 0
+
+
+def test_strengths_of_a_detected_beat(monkeypatch):
+    monkeypatch.setattr(libs.beat_detector, "time", lambda: 100.0)
+    beat_detector = BeatDetector(24)
+    for frame in range(40):
+        beat_detector.update(np.full(24, 0.5))
+    assert beat_detector.history_full
+    assert not any(beat_detector.detect().values())
+
+    # The beat bins jump from 0.5 to 1.5. The average rises to 0.525, so the difference is 185 percent.
+    y = np.full(24, 0.5)
+    y[:3] = 1.5
+    beat_detector.update(y)
+
+    assert beat_detector.detect()["beat"]
+    assert beat_detector.current_freq_strengths["beat"] == pytest.approx(185 / 70)
+    assert beat_detector.current_freq_strengths["mid"] == 0
@@ -0,0 +1,89 @@
+from libs.benchmarks.benchmark_device import BenchmarkDevice  # pylint: disable=E0611, E0401
+from libs.audio_ring_buffer import AudioRingBuffer  # pylint: disable=E0611, E0401
+from libs.beat_detector import BeatDetector  # pylint: disable=E0611, E0401
+from libs.effects.effect_beat import EffectBeat  # pylint: disable=E0611, E0401
+
+import numpy as np
+import copy
+
+
+def get_device(config_template, audio_ring_buffer):
+    config = copy.deepcopy(config_template)
+    return BenchmarkDevice(config, config["device_configs"][BenchmarkDevice.DEVICE_ID], audio_ring_buffer)
+
+
+def write_frame(audio_ring_buffer, beat=False, strength=0.0):
+    freq_detects = {detection_type: False for detection_type in BeatDetector.DETECTION_TYPES}
+    freq_strengths = {detection_type: 0.0 for detection_type in BeatDetector.DETECTION_TYPES}
+    freq_detects["beat"] = beat
+    freq_strengths["beat"] = strength
+    audio_ring_buffer.write(np.full(24, 0.5), 0.5, None, freq_detects, freq_strengths)
+
+
+def detect(effect):
+    effect.get_audio_data()
+    effect.detect_freqs()
+    return effect.current_freq_detects["beat"]
+
+
+def test_all_effects_show_the_same_beats(config_template):
+    audio_ring_buffer = AudioRingBuffer()
+    effects = [EffectBeat(get_device(config_template, audio_ring_buffer)) for i in range(2)]
+
+    for frame in range(10):
+        beat = frame in (3, 7)
+        write_frame(audio_ring_buffer, beat, 1.5 if beat else 0.5)
+        for effect in effects:
+            assert detect(effect) == beat
+            assert effect.current_freq_strengths["beat"] == (1.5 if beat else 0.5)
+
+
+def test_beat_of_a_skipped_frame_is_shown_once(config_template):
+    audio_ring_buffer = AudioRingBuffer()
+    effect = EffectBeat(get_device(config_template, audio_ring_buffer))
+    write_frame(audio_ring_buffer)
+    assert not detect(effect)
+
+    # The effect was too slow and skipped the frame with the beat.
+    write_frame(audio_ring_buffer, beat=True)
+    write_frame(audio_ring_buffer)
+    assert detect(effect)
+
+    write_frame(audio_ring_buffer)
+    assert not detect(effect)
+
+
+def test_reset_effect_does_not_show_old_beats(config_template):
+    audio_ring_buffer = AudioRingBuffer()
+    effect = EffectBeat(get_device(config_template, audio_ring_buffer))
+    write_frame(audio_ring_buffer)
+    detect(effect)
+
+    # A beat is detected, while another effect is shown. The cached effect is reused afterwards.
+    write_frame(audio_ring_buffer, beat=True)
+    write_frame(audio_ring_buffer)
+    effect.reset()
+
+    assert not detect(effect)
+
+
+def test_local_detector_is_only_fed_while_enabled(config_template):
+    effect = EffectBeat(get_device(config_template, AudioRingBuffer()))
+    quiet = np.full(effect.n_fft_bins, 0.1)
+    loud = np.full(effect.n_fft_bins, 1.0)
+
+    for frame in range(5):
+        effect.update_freq_channels(quiet)
+    assert effect._beat_detector is None
+
+    # The detector starts with a fresh history, when the local detection is switched on.
+    for frame in range(effect.freq_channel_history - 1):
+        effect.update_freq_channels(quiet, True)
+    assert not effect._beat_detector.history_full
+    effect.update_freq_channels(loud, True)
+    effect.detect_freqs(True)
+    assert effect.current_freq_detects["beat"]
+
+    # Switching it off drops the history.
+    effect.update_freq_channels(quiet, False)
+    assert effect._beat_detector is None
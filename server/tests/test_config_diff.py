@@ -0,0 +1,162 @@
+from libs.config_diff import ConfigDiff  # pylint: disable=E0611, E0401
+from libs.device_manager import DeviceManager  # pylint: disable=E0611, E0401
+from libs.device import Device  # pylint: disable=E0611, E0401
+
+import copy
+
+
+def get_config():
+    return {
+        "general_settings": {"log_level": "info", "render_workers": 1},
+        "device_configs": {
+            "device_0": {
+                "device_name": "Device 0",
+                "led_count": 60,
+                "led_brightness": 100,
+                "led_strip": "ws2812_strip",
+                "output": {"output_udp": {"udp_client_ip": "127.0.0.1", "udp_client_port": "7777"}},
+                "effects": {"effect_bars": {"speed": 5, "colors": [1, 2, 3]}}
+            }
+        }
+    }
+
+
+def test_create_contains_only_the_changed_nested_keys():
+    old_config = get_config()
+    new_config = get_config()
+    new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["speed"] = 10
+
+    assert ConfigDiff.create(old_config, new_config) == {
+        "device_configs": {"device_0": {"effects": {"effect_bars": {"speed": 10}}}}}
+
+
+def test_create_returns_an_empty_diff_for_equal_configs():
+    assert ConfigDiff.create(get_config(), get_config()) == {}
+
+
+def test_create_handles_lists_like_values():
+    old_config = get_config()
+    new_config = get_config()
+    new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["colors"].append(4)
+
+    config_diff = ConfigDiff.create(old_config, new_config)
+
+    assert config_diff == {"device_configs": {"device_0": {"effects": {"effect_bars": {"colors": [1, 2, 3, 4]}}}}}
+    # The diff is a copy, so later changes of the config do not change it.
+    new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["colors"].append(5)
+    assert config_diff["device_configs"]["device_0"]["effects"]["effect_bars"]["colors"] == [1, 2, 3, 4]
+
+
+def test_create_contains_added_keys():
+    old_config = get_config()
+    new_config = get_config()
+    new_config["device_configs"]["device_0"]["effects"]["effect_beat"] = {"speed": 1}
+
+    assert ConfigDiff.create(old_config, new_config) == {
+        "device_configs": {"device_0": {"effects": {"effect_beat": {"speed": 1}}}}}
+
+
+def test_create_returns_none_for_removed_keys():
+    old_config = get_config()
+    new_config = get_config()
+    del new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["speed"]
+
+    assert ConfigDiff.create(old_config, new_config) is None
+
+
+def test_create_returns_none_for_a_dict_replaced_with_a_value():
+    old_config = get_config()
+    new_config = get_config()
+    new_config["device_configs"]["device_0"]["output"] = "none"
+
+    assert ConfigDiff.create(old_config, new_config) is None
+
+
+def test_apply_changes_the_config_in_place():
+    config = get_config()
+    device_config = config["device_configs"]["device_0"]
+    old_config = get_config()
+    new_config = get_config()
+    new_config["device_configs"]["device_0"]["led_brightness"] = 50
+    new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["speed"] = 10
+
+    ConfigDiff.apply(config, ConfigDiff.create(old_config, new_config))
+
+    assert config == new_config
+    # References to a part of the config see the change.
+    assert device_config["led_brightness"] == 50
+
+
+def test_apply_adds_nested_keys():
+    config = get_config()
+    ConfigDiff.apply(config, {"device_configs": {"device_0": {"effects": {"effect_beat": {"speed": 1}}}}})
+
+    assert config["device_configs"]["device_0"]["effects"]["effect_beat"] == {"speed": 1}
+    assert config["device_configs"]["device_0"]["effects"]["effect_bars"]["speed"] == 5
+
+
+def test_contains():
+    config_diff = {"device_configs": {"device_0": {"led_count": 100}}}
+
+    assert ConfigDiff.contains(config_diff, "device_configs", "device_0", "led_count")
+    assert not ConfigDiff.contains(config_diff, "device_configs", "device_0", "led_strip")
+    assert not ConfigDiff.contains(config_diff, "device_configs", "device_0", "led_count", "value")
+    assert not ConfigDiff.contains(config_diff, "general_settings")
+
+
+def test_output_changes_restart_the_device():
+    device_manager = DeviceManager()
+    for key in DeviceManager.RESTART_DEVICE_KEYS:
+        old_config = get_config()
+        new_config = get_config()
+        if key == "output":
+            new_config["device_configs"]["device_0"]["output"]["output_udp"]["udp_client_port"] = "7778"
+        else:
+            new_config["device_configs"]["device_0"][key] = "changed"
+
+        config_diff = ConfigDiff.create(old_config, new_config)
+        assert device_manager.device_needs_restart("device_0", config_diff), key
+        assert not device_manager.device_needs_restart("device_1", config_diff), key
+
+
+def test_effect_and_brightness_changes_do_not_restart_the_device():
+    device_manager = DeviceManager()
+    old_config = get_config()
+    new_config = get_config()
+    new_config["general_settings"]["log_level"] = "debug"
+    new_config["device_configs"]["device_0"]["led_brightness"] = 50
+    new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["speed"] = 10
+
+    assert not device_manager.device_needs_restart("device_0", ConfigDiff.create(old_config, new_config))
+
+
+def test_device_merges_the_updates_the_services_did_not_take():
+    config = get_config()
+    device = Device(config, config["device_configs"]["device_0"], None, None, device_id="device_0")
+
+    # The queues hold two updates. The next ones must not block, they are merged instead.
+    for speed in range(1, 6):
+        new_config = copy.deepcopy(config)
+        new_config["device_configs"]["device_0"]["effects"]["effect_bars"]["speed"] = speed
+        new_config["device_configs"]["device_0"]["led_brightness"] = 100 - speed
+        if speed == 3:
+            new_config["general_settings"]["log_level"] = "debug"
+        device.update_config(new_config, new_config["device_configs"]["device_0"],
+                             ConfigDiff.create(config, new_config), "device_0")
+        config = new_config
+
+    assert device.pending_config_updates
+
+    for notification_queue in (device.effect_notification_queue_in, device.output_notification_queue_in):
+        config_diffs = [notification_queue.get_blocking_with_timeout().payload for i in range(2)]
+        device.send_config_updates()
+        config_diffs.append(notification_queue.get_blocking_with_timeout().payload)
+
+        applied_config = get_config()
+        for config_diff in config_diffs:
+            ConfigDiff.apply(applied_config, config_diff)
+        assert applied_config == config
+        assert config_diffs[2]["general_settings"] == {"log_level": "debug"}
+
+    assert not device.pending_config_updates
+    assert device.effect_notification_queue_in.get_blocking_with_timeout(0.1) is None
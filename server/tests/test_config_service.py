@@ -0,0 +1,102 @@
+from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
+
+from multiprocessing import Lock
+import subprocess
+import signal
+import json
+import time
+import sys
+import os
+
+import pytest
+
+
+@pytest.fixture
+def config_service(tmp_path, monkeypatch):
+    # The config folder is relative to the working directory: ../../.mlsc/
+    working_directory = tmp_path / "mlsc" / "server"
+    working_directory.mkdir(parents=True)
+    monkeypatch.chdir(working_directory)
+
+    previous_terminate_handler = signal.getsignal(signal.SIGTERM)
+    config_service = ConfigService(Lock())
+    yield config_service
+
+    config_service.flush_config()
+    signal.signal(signal.SIGTERM, previous_terminate_handler)
+
+
+def read_config_file(config_service):
+    with open(config_service.get_config_path(), "r") as read_file:
+        return json.load(read_file)
+
+
+def test_save_writes_a_snapshot_after_the_delay(config_service):
+    config_service.config["general_settings"]["log_level_console"] = "debug"
+    config_service.save_config(write_delay=60)
+
+    # The request threads keep changing the config, while the write waits.
+    config_service.config["general_settings"]["log_level_console"] = "error"
+    assert read_config_file(config_service)["general_settings"]["log_level_console"] == "info"
+
+    config_service.flush_config()
+    assert read_config_file(config_service)["general_settings"]["log_level_console"] == "debug"
+
+
+def test_save_without_delay_writes_immediately(config_service):
+    config_service.config["general_settings"]["log_level_console"] = "debug"
+    config_service.save_config(write_delay=0)
+
+    assert read_config_file(config_service)["general_settings"]["log_level_console"] == "debug"
+
+
+def test_failed_write_is_tried_again(config_service, monkeypatch):
+    failed_writes = []
+
+    def replace_once(source, destination, replace=os.replace):
+        if not failed_writes:
+            failed_writes.append(source)
+            raise OSError("Disk full")
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", replace_once)
+    config_service.WRITE_RETRY_DELAY = 0.1
+    config_service.config["general_settings"]["log_level_console"] = "debug"
+    config_service.save_config(write_delay=0)
+
+    assert failed_writes
+    assert read_config_file(config_service)["general_settings"]["log_level_console"] == "info"
+
+    time.sleep(0.5)
+    assert read_config_file(config_service)["general_settings"]["log_level_console"] == "debug"
+
+
+def test_terminate_writes_the_pending_config(tmp_path):
+    working_directory = tmp_path / "mlsc" / "server"
+    working_directory.mkdir(parents=True)
+    server_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import os, signal, sys\n"
+        f"sys.path.insert(0, {server_directory!r})\n"
+        "from multiprocessing import Lock\n"
+        "from libs.config_service import ConfigService\n"
+        "config_service = ConfigService(Lock())\n"
+        "config_service.config['general_settings']['log_level_console'] = 'debug'\n"
+        "config_service.save_config(write_delay=60)\n"
+        "os.kill(os.getpid(), signal.SIGTERM)\n"
+    )
+
+    process = subprocess.run([sys.executable, "-c", script], cwd=working_directory, timeout=30)
+
+    assert process.returncode == -signal.SIGTERM
+    with open(tmp_path / ".mlsc" / "config.json", "r") as read_file:
+        assert json.load(read_file)["general_settings"]["log_level_console"] == "debug"
+
+
+def test_snapshot_does_not_change_with_the_config(config_service):
+    config_snapshot = config_service.get_config_snapshot()
+    config_service.config["general_settings"]["log_level_console"] = "debug"
+    config_service.config["device_configs"]["new_device"] = {}
+
+    assert config_snapshot["general_settings"]["log_level_console"] == "info"
+    assert "new_device" not in config_snapshot["device_configs"]
@@ -0,0 +1,38 @@
+from libs.benchmarks.benchmark_device import BenchmarkDevice  # pylint: disable=E0611, E0401
+from libs.audio_ring_buffer import AudioRingBuffer  # pylint: disable=E0611, E0401
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
+from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+
+from multiprocessing import Queue
+from time import sleep
+
+
+class EffectTestDevice(BenchmarkDevice):
+    """
+    Device without processes, which provides the notification queue of the EffectService.
+    """
+    def __init__(self, config, device_config, audio_ring_buffer):
+        # Call the constructor of the base class.
+        super(EffectTestDevice, self).__init__(config, device_config, audio_ring_buffer)
+        self.device_notification_queue_out = QueueWrapper(Queue(2))
+
+
+def get_effect_service(config_template, device_config):
+    effect_service = EffectService()
+    effect_service.init_effect_service(EffectTestDevice(config_template, device_config, AudioRingBuffer()))
+    return effect_service
+
+
+def test_only_the_config_refresh_is_answered(config_template, device_config):
+    effect_service = get_effect_service(config_template, device_config)
+    queue_out = effect_service._device.device_notification_queue_out
+
+    effect_service.update_config({"device_configs": {BenchmarkDevice.DEVICE_ID: {"fps": 30}}})
+    assert effect_service.frame_scheduler.fps == 30
+    sleep(0.1)
+    assert queue_out.empty()
+
+    effect_service.refresh()
+    sleep(0.1)
+    assert queue_out.get_blocking() == NotificationEnum.config_refresh_finished
@@ -0,0 +1,96 @@
+from libs.frame_buffer import FrameBuffer  # pylint: disable=E0611, E0401
+
+from multiprocessing.connection import wait
+from multiprocessing import Process, Queue
+import numpy as np
+import time
+
+
+def read_frames(frame_buffer, frame_count, result_queue):
+    """
+    Wait for the frames like the OutputService and report the sequences of the frames, which were not consistent.
+    """
+    last_sequence = 0
+    read_frame_count = 0
+    inconsistent_frames = []
+    while last_sequence < frame_count and wait([frame_buffer.signal], 5):
+        frame_buffer.clear_signal()
+        frame_data = frame_buffer.read_latest(last_sequence)
+        if frame_data is None:
+            continue
+        frame = frame_data["frame"].copy()
+        timestamps = frame_data["timestamps"].copy()
+        sequence = frame_data["sequence"]
+        if sequence <= last_sequence or not np.all(frame == sequence % 256) or not np.all(timestamps == sequence):
+            inconsistent_frames.append(sequence)
+        last_sequence = sequence
+        read_frame_count += 1
+    result_queue.put((last_sequence, read_frame_count, inconsistent_frames))
+
+
+def test_latest_frame_after_wraparound():
+    frame_buffer = FrameBuffer(3, 10)
+    assert frame_buffer.read_latest() is None
+
+    for sequence in range(1, 8):
+        frame_buffer.publish(np.full((3, 10), sequence), [sequence] * 4)
+
+    frame_data = frame_buffer.read_latest(3)
+    assert frame_data["sequence"] == 7
+    assert np.all(frame_data["frame"] == 7)
+    assert np.all(frame_data["timestamps"] == 7)
+    assert not frame_data["frame"].flags.writeable
+    assert frame_buffer.read_latest(7) is None
+
+
+def test_publish_clips_and_fills_the_frame():
+    frame_buffer = FrameBuffer(4, 10)
+
+    # An RGB effect on a RGBW strip with less LEDs than the strip. The white channel and the rest stay dark.
+    frame_buffer.publish(np.array([[-10.0] * 5, [100.7] * 5, [300.0] * 5]))
+    frame = frame_buffer.read_latest()["frame"]
+
+    assert frame.dtype == np.uint8
+    assert np.all(frame[0, :5] == 0)
+    assert np.all(frame[1, :5] == 100)
+    assert np.all(frame[2, :5] == 255)
+    assert np.all(frame[3] == 0)
+    assert np.all(frame[:, 5:] == 0)
+
+    # Additional LEDs are ignored.
+    frame_buffer.publish(np.full((3, 20), 1))
+    assert frame_buffer.read_latest(1)["frame"].shape == (4, 10)
+
+
+def test_signal_is_sent_once_until_it_is_cleared():
+    frame_buffer = FrameBuffer(3, 10)
+    assert not frame_buffer.signal.poll()
+
+    for sequence in range(3):
+        frame_buffer.publish(np.zeros((3, 10)))
+    assert frame_buffer.signal.poll()
+
+    frame_buffer.clear_signal()
+    assert not frame_buffer.signal.poll()
+
+    frame_buffer.publish(np.zeros((3, 10)))
+    assert frame_buffer.signal.poll()
+
+
+def test_reader_process_reads_consistent_frames():
+    frame_buffer = FrameBuffer(3, 60)
+    frame_count = 300
+    result_queue = Queue()
+    reader_process = Process(target=read_frames, args=(frame_buffer, frame_count, result_queue))
+    reader_process.start()
+
+    for sequence in range(1, frame_count + 1):
+        frame_buffer.publish(np.full((3, 60), sequence % 256), [sequence] * 4)
+        time.sleep(0.001)
+
+    last_sequence, read_frame_count, inconsistent_frames = result_queue.get(timeout=10)
+    reader_process.join(5)
+
+    assert last_sequence == frame_count
+    assert read_frame_count > 0
+    assert inconsistent_frames == []
@@ -0,0 +1,74 @@
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+
+from time import perf_counter
+import pytest
+
+
+def test_deadlines_do_not_drift_with_the_work_time():
+    frame_scheduler = FrameScheduler(100)
+    start = frame_scheduler.next_deadline
+
+    # Every frame starts a bit late, but the deadlines stay on the grid of the start time.
+    for frame in range(1, 101):
+        frame_scheduler.advance(frame_scheduler.next_deadline + 0.004)
+        assert frame_scheduler.next_deadline == pytest.approx(start + frame * 0.01, abs=1e-9)
+
+    assert frame_scheduler.skipped_frames == 0
+
+
+def test_late_frame_skips_the_missed_deadlines():
+    frame_scheduler = FrameScheduler(100)
+    start = frame_scheduler.next_deadline
+    frame_scheduler.advance(start)
+
+    # The next frame starts 3.5 frames after its deadline. The missed deadlines are skipped, not rendered in a burst.
+    frame_scheduler.advance(start + 0.045)
+
+    assert frame_scheduler.skipped_frames == 3
+    assert frame_scheduler.next_deadline == pytest.approx(start + 0.05, abs=1e-9)
+
+    frame_scheduler.advance(start + 0.075)
+    assert frame_scheduler.skipped_frames == 5
+    assert frame_scheduler.next_deadline == pytest.approx(start + 0.08, abs=1e-9)
+
+
+def test_fps_change_keeps_the_next_deadline():
+    frame_scheduler = FrameScheduler(100)
+    start = frame_scheduler.next_deadline
+    frame_scheduler.advance(start)
+
+    frame_scheduler.set_fps(50)
+    assert frame_scheduler.next_deadline == pytest.approx(start + 0.01, abs=1e-9)
+
+    frame_scheduler.advance(start + 0.01)
+    assert frame_scheduler.next_deadline == pytest.approx(start + 0.03, abs=1e-9)
+    assert frame_scheduler.fps == 50
+
+
+def test_statistics_of_the_intervals():
+    frame_scheduler = FrameScheduler(100)
+    start = frame_scheduler.next_deadline
+    for frame_start in (0, 0.01, 0.02, 0.045):
+        frame_scheduler.advance(start + frame_start)
+
+    statistics = frame_scheduler.get_statistics()
+    assert statistics["target_fps"] == 100
+    assert statistics["interval_mean"] == pytest.approx(0.045 / 3)
+    assert statistics["interval_max"] == pytest.approx(0.025)
+    assert statistics["jitter"] > 0
+    assert statistics["skipped_frames"] == 1
+
+    # The intervals start again after a reset, the skipped frames are counted since the start.
+    assert frame_scheduler.get_statistics()["fps"] == 0
+    assert frame_scheduler.get_statistics()["skipped_frames"] == 1
+
+
+def test_wait_sleeps_until_the_deadline():
+    frame_scheduler = FrameScheduler(20)
+    frame_scheduler.wait()
+
+    start = perf_counter()
+    for frame in range(3):
+        frame_scheduler.wait()
+
+    assert 0.14 <= perf_counter() - start < 0.3
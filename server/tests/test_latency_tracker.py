@@ -0,0 +1,69 @@
+from libs.latency_tracker import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.log_histogram import LogHistogram  # pylint: disable=E0611, E0401
+
+import pytest
+
+
+def get_timestamps(capture, audio_publish, effect_start, effect_publish):
+    timestamps = [0.0] * LatencyTracker.TIMESTAMP_COUNT
+    timestamps[LatencyTracker.TIMESTAMP_CAPTURE] = capture
+    timestamps[LatencyTracker.TIMESTAMP_AUDIO_PUBLISH] = audio_publish
+    timestamps[LatencyTracker.TIMESTAMP_EFFECT_START] = effect_start
+    timestamps[LatencyTracker.TIMESTAMP_EFFECT_PUBLISH] = effect_publish
+    return timestamps
+
+
+def test_stage_latencies_of_a_frame():
+    latency_tracker = LatencyTracker()
+    latency_tracker.add_frame(get_timestamps(100.0, 100.002, 100.005, 100.006), 100.010, 100.011)
+
+    stages = latency_tracker.get_summary()["stages"]
+    expected_latencies = {
+        "capture_to_dsp": 2,
+        "dsp_to_effect": 3,
+        "effect": 1,
+        "effect_to_output": 4,
+        "output_write": 1,
+        "total": 11
+    }
+    for stage, latency in expected_latencies.items():
+        assert stages[stage]["count"] == 1
+        # The histograms are accurate to about 3 percent.
+        assert stages[stage]["max"] == pytest.approx(latency, rel=1e-6)
+        assert stages[stage]["p50"] == pytest.approx(latency, rel=0.03)
+
+
+def test_frames_without_audio_skip_the_audio_stages():
+    latency_tracker = LatencyTracker()
+    latency_tracker.add_frame(get_timestamps(0, 0, 100.0, 100.001), 100.002, 100.003)
+
+    stages = latency_tracker.get_summary()["stages"]
+    assert stages["effect"]["count"] == 1
+    assert stages["output_write"]["count"] == 1
+    for stage in ("capture_to_dsp", "dsp_to_effect", "total"):
+        assert stages[stage] == {"count": 0}
+
+
+def test_summary_resets_the_window():
+    latency_tracker = LatencyTracker()
+    for frame in range(100):
+        latency_tracker.add_frame(get_timestamps(0, 0, 0, 0), 0, 0.001 if frame < 90 else 0.1)
+
+    stages = latency_tracker.get_summary()["stages"]
+    assert stages["output_write"]["count"] == 100
+    assert stages["output_write"]["p50"] == pytest.approx(1, rel=0.03)
+    assert stages["output_write"]["p95"] == pytest.approx(100, rel=0.03)
+    assert stages["output_write"]["max"] == pytest.approx(100)
+
+    assert latency_tracker.get_summary()["stages"]["output_write"] == {"count": 0}
+
+
+def test_histogram_clamps_the_values():
+    histogram = LogHistogram()
+    histogram.add(0)
+    histogram.add(100)
+
+    assert histogram.count == 2
+    assert histogram.max == 100
+    assert histogram.get_percentile(0.5) <= LogHistogram.MIN_VALUE * 1.1
+    assert histogram.get_percentile(1) <= 100
@@ -0,0 +1,42 @@
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
+
+from threading import Thread
+
+
+def update_metrics(metrics_registry, worker, update_count):
+    for i in range(update_count):
+        labels = {"worker": worker, "device": i % 50}
+        metrics_registry.increment("frames_total")
+        metrics_registry.observe("frame_duration_seconds", 0.01, labels)
+        metrics_registry.set_gauge("fps", i, labels)
+
+
+def test_render_workers_share_the_registry():
+    metrics_registry = MetricsRegistry()
+    worker_count = 4
+    update_count = 5000
+    snapshot_errors = []
+
+    def take_snapshots():
+        try:
+            while any(worker_thread.is_alive() for worker_thread in worker_threads):
+                metrics_registry.get_snapshot()
+        except Exception as e:
+            snapshot_errors.append(e)
+
+    worker_threads = [Thread(target=update_metrics, args=(metrics_registry, worker, update_count)) for worker in range(worker_count)]
+    snapshot_thread = Thread(target=take_snapshots)
+    for worker_thread in worker_threads:
+        worker_thread.start()
+    snapshot_thread.start()
+    for worker_thread in worker_threads:
+        worker_thread.join()
+    snapshot_thread.join()
+
+    assert snapshot_errors == []
+    snapshot = metrics_registry.get_snapshot()
+    counters = [metric for metric in snapshot if metric["type"] == "counter"]
+    assert counters[0]["value"] == worker_count * update_count
+    summaries = [metric for metric in snapshot if metric["type"] == "summary"]
+    assert len(summaries) == worker_count * 50
+    assert sum(summary["count"] for summary in summaries) == worker_count * update_count
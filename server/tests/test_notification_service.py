@@ -0,0 +1,103 @@
+from libs.notification_service import NotificationService  # pylint: disable=E0611, E0401
+from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
+from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
+from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+
+from multiprocessing import Queue
+from threading import Thread
+import logging
+import time
+
+
+def get_notification_service():
+    notification_service = NotificationService()
+    notification_service.logger = logging.getLogger(__name__)
+    notification_service._notification_queue_device_manager_in = QueueWrapper(Queue(100))
+    notification_service._notification_queue_device_manager_out = QueueWrapper(Queue(100))
+    notification_service._notification_queue_audio_in = QueueWrapper(Queue(100))
+    notification_service._notification_queue_audio_out = QueueWrapper(Queue(100))
+    notification_service._refresh_id = 0
+    return notification_service
+
+
+def answer_refresh(notification_queue_in, notification_queue_out):
+    """
+    Answer the config refresh like the DeviceManager and the AudioProcessService.
+    """
+    while True:
+        notification_item = notification_queue_in.get_blocking()
+        if notification_item.notification_enum is NotificationEnum.config_refresh:
+            notification_queue_out.put_blocking(NotificationItem(
+                NotificationEnum.config_refresh_finished, notification_item.device_id,
+                refresh_id=notification_item.refresh_id))
+            return
+
+
+def get_notification_enums(notification_queue):
+    notification_enums = []
+    while True:
+        notification_item = notification_queue.get_blocking_with_timeout(0.1)
+        if notification_item is None:
+            return notification_enums
+        notification_enums.append(notification_item.notification_enum)
+
+
+def test_config_refresh_waits_for_both_replies():
+    notification_service = get_notification_service()
+    notification_service.REFRESH_TIMEOUT = 5
+
+    # The audio process answers later than the device manager.
+    notification_service._notification_queue_device_manager_out.put_blocking(
+        NotificationItem(NotificationEnum.config_refresh_finished, "all_devices", refresh_id=1))
+
+    def answer_audio_later():
+        time.sleep(0.2)
+        answer_refresh(notification_service._notification_queue_audio_in, notification_service._notification_queue_audio_out)
+
+    answer_thread = Thread(target=answer_audio_later)
+    answer_thread.start()
+
+    start_time = time.time()
+    notification_service.config_refresh(NotificationItem(NotificationEnum.config_refresh, "all_devices"))
+    answer_thread.join()
+
+    assert 0.2 <= time.time() - start_time < notification_service.REFRESH_TIMEOUT
+    assert get_notification_enums(notification_service._notification_queue_device_manager_in) == [
+        NotificationEnum.process_pause, NotificationEnum.config_refresh, NotificationEnum.process_continue]
+
+
+def test_config_refresh_ignores_the_late_reply_of_a_timed_out_refresh():
+    notification_service = get_notification_service()
+    notification_service.REFRESH_TIMEOUT = 0.2
+
+    # The first refresh times out, because nobody answers.
+    notification_service.config_refresh(NotificationItem(NotificationEnum.config_refresh, "all_devices"))
+    get_notification_enums(notification_service._notification_queue_device_manager_in)
+    get_notification_enums(notification_service._notification_queue_audio_in)
+
+    # The late replies of the first refresh arrive before the second refresh.
+    for notification_queue_out in (notification_service._notification_queue_device_manager_out,
+                                   notification_service._notification_queue_audio_out):
+        notification_queue_out.put_blocking(
+            NotificationItem(NotificationEnum.config_refresh_finished, "all_devices", refresh_id=1))
+
+    notification_service.REFRESH_TIMEOUT = 5
+    answer_threads = [
+        Thread(target=answer_refresh, args=(notification_service._notification_queue_device_manager_in,
+                                            notification_service._notification_queue_device_manager_out)),
+        Thread(target=answer_refresh, args=(notification_service._notification_queue_audio_in,
+                                            notification_service._notification_queue_audio_out))
+    ]
+
+    # The second refresh may only finish with the replies to itself. They are sent after it started.
+    start_time = time.time()
+    for answer_thread in answer_threads:
+        answer_thread.start()
+    notification_service.config_refresh(NotificationItem(NotificationEnum.config_refresh, "all_devices"))
+    for answer_thread in answer_threads:
+        answer_thread.join(5)
+
+    assert not any(answer_thread.is_alive() for answer_thread in answer_threads)
+    assert time.time() - start_time < notification_service.REFRESH_TIMEOUT
+    assert notification_service._notification_queue_device_manager_out.empty()
+    assert notification_service._notification_queue_audio_out.empty()
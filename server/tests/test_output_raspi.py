@@ -0,0 +1,94 @@
+from libs.benchmarks.benchmark_device import BenchmarkDevice  # pylint: disable=E0611, E0401
+from libs.outputs.output_raspi import OutputRaspi  # pylint: disable=E0611, E0401
+
+import numpy as np
+import ctypes
+import types
+import copy
+import sys
+
+import pytest
+
+
+class FakeWS281x(types.ModuleType):
+    """
+    Stands in for the _rpi_ws281x module of the Raspberry Pi. The LED buffer is a ctypes array.
+    """
+    def __init__(self, led_count, map_led_buffer=True):
+        super(FakeWS281x, self).__init__("_rpi_ws281x")
+        self.led_buffer = (ctypes.c_uint32 * led_count)()
+        self.set_leds = {}
+        self.map_led_buffer = map_led_buffer
+        self.renders = 0
+
+    def __getattr__(self, name):
+        # The strip types and the return codes.
+        if name.isupper():
+            return 0
+        return lambda *args: 0
+
+    def ws2811_channel_t_leds_get(self, channel):
+        return ctypes.addressof(self.led_buffer) if self.map_led_buffer else 0
+
+    def ws2811_led_set(self, channel, index, value):
+        self.set_leds[index] = value
+
+    def ws2811_render(self, leds):
+        self.renders += 1
+        return 0
+
+
+def get_output(monkeypatch, config_template, led_strip, led_count, map_led_buffer=True):
+    fake_ws281x = FakeWS281x(led_count, map_led_buffer)
+    monkeypatch.setitem(sys.modules, "_rpi_ws281x", fake_ws281x)
+
+    config = copy.deepcopy(config_template)
+    device_config = config["device_configs"][BenchmarkDevice.DEVICE_ID]
+    device_config["led_count"] = led_count
+    device_config["led_strip"] = led_strip
+    device = types.SimpleNamespace(config=config, device_config=device_config)
+
+    return OutputRaspi(device), fake_ws281x
+
+
+def pack_per_led(output_array, led_strip):
+    """
+    The packing of OutputRaspi before the LED buffer was written in one copy.
+    """
+    output_array = np.clip(output_array, 0, 255).astype(int)
+    r, g, b = output_array[0], output_array[1], output_array[2]
+    if len(output_array) == 4 and "SK6812" in led_strip:
+        w = output_array[3]
+        return [int((g[i] << 24) | (r[i] << 16) | (b[i] << 8) | w[i]) for i in range(len(r))]
+    return [int((g[i] << 16) | (r[i] << 8) | b[i]) for i in range(len(r))]
+
+
+@pytest.mark.parametrize("led_strip, channels", [("ws2812_strip", 3), ("sk6812_strip", 3), ("SK6812_strip_rgbw", 4)])
+def test_leds_are_packed_like_before(monkeypatch, config_template, led_strip, channels):
+    output, fake_ws281x = get_output(monkeypatch, config_template, led_strip, 300)
+    output_array = np.random.default_rng(channels).uniform(-50, 300, (channels, 300))
+
+    output.show(output_array)
+
+    assert list(fake_ws281x.led_buffer) == pack_per_led(output_array, led_strip)
+    assert fake_ws281x.set_leds == {}
+    assert fake_ws281x.renders == 1
+
+
+def test_channel_order_of_a_single_led(monkeypatch, config_template):
+    output, fake_ws281x = get_output(monkeypatch, config_template, "SK6812_strip_rgbw", 1)
+    output.show(np.array([[0x11], [0x22], [0x33], [0x44]]))
+    assert fake_ws281x.led_buffer[0] == 0x22113344
+
+    output, fake_ws281x = get_output(monkeypatch, config_template, "ws2812_strip", 1)
+    output.show(np.array([[0x11], [0x22], [0x33]]))
+    assert fake_ws281x.led_buffer[0] == 0x221133
+
+
+def test_leds_are_set_one_by_one_without_the_led_buffer(monkeypatch, config_template):
+    output, fake_ws281x = get_output(monkeypatch, config_template, "ws2812_strip", 50, map_led_buffer=False)
+    output_array = np.random.default_rng(1).uniform(0, 255, (3, 50))
+
+    output.show(output_array)
+
+    assert [fake_ws281x.set_leds[index] for index in range(50)] == pack_per_led(output_array, "ws2812_strip")
@@ -0,0 +1,76 @@
+from libs.benchmarks.benchmark_device import BenchmarkDevice  # pylint: disable=E0611, E0401
+from libs.audio_ring_buffer import AudioRingBuffer  # pylint: disable=E0611, E0401
+from libs.latency_tracker import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.output_service import OutputService  # pylint: disable=E0611, E0401
+from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+
+from multiprocessing import Queue
+from threading import Thread
+from time import perf_counter, sleep
+import numpy as np
+
+
+class OutputTestDevice(BenchmarkDevice):
+    """
+    Device without processes, which provides the notification queues of the OutputService.
+    """
+    def __init__(self, config, device_config, audio_ring_buffer):
+        # Call the constructor of the base class.
+        super(OutputTestDevice, self).__init__(config, device_config, audio_ring_buffer)
+        self.output_notification_queue_in = QueueWrapper(Queue(2))
+        self.device_notification_queue_out = QueueWrapper(Queue(2))
+
+
+def get_output_service(config_template, device_config):
+    device_config["output_type"] = "output_dummy"
+    device_config["led_count"] = 10
+
+    output_service = OutputService()
+    output_service.init_output_service(OutputTestDevice(config_template, device_config, AudioRingBuffer()))
+    return output_service
+
+
+def get_output_frames(output_service):
+    for metric in output_service._metrics.get_snapshot(reset=False):
+        if metric["name"] == "output_frames_total" and metric["labels"] == output_service._metric_labels:
+            return metric["value"]
+    return 0
+
+
+def test_unchanged_frames_are_not_counted_as_shown(config_template, device_config):
+    output_service = get_output_service(config_template, device_config)
+    frame_buffer = output_service._device.frame_buffer
+    output_frames = get_output_frames(output_service)
+    frame = np.full((3, 10), 100)
+
+    # The effect publishes the same frame twice. Only the first one is written to the strip.
+    for i in range(2):
+        now = perf_counter()
+        frame_buffer.publish(frame, [now, now, now, now])
+        output_service.output_routine()
+
+    summary = output_service._latency_tracker.get_summary()
+    assert summary["stages"][LatencyTracker.STAGES[LatencyTracker.OUTPUT_WRITE]]["count"] == 1
+    assert summary["stages"][LatencyTracker.STAGES[LatencyTracker.TOTAL]]["count"] == 1
+    assert get_output_frames(output_service) == output_frames + 1
+
+    # A changed frame is shown again.
+    frame_buffer.publish(frame + 1, [now, now, now, now])
+    output_service.output_routine()
+    assert get_output_frames(output_service) == output_frames + 2
+
+
+def test_output_wakes_up_on_a_published_frame(config_template, device_config):
+    output_service = get_output_service(config_template, device_config)
+    frame_buffer = output_service._device.frame_buffer
+
+    publish_thread = Thread(target=lambda: (sleep(0.1), frame_buffer.publish(np.zeros((3, 10)))))
+    publish_thread.start()
+    start_time = perf_counter()
+    output_service.wait_for_event()
+    publish_thread.join()
+
+    # The output sleeps on the frame signal instead of waiting for the idle timeout.
+    assert 0.05 <= perf_counter() - start_time < OutputService.IDLE_TIMEOUT
+    assert not frame_buffer.signal.poll()
+    assert frame_buffer.read_latest()["sequence"] == 1
@@ -0,0 +1,51 @@
+from libs.outputs.output_udp import OutputUDP  # pylint: disable=E0611, E0401
+
+import numpy as np
+import types
+
+import pytest
+
+
+def get_output(led_strip, led_brightness=100):
+    device_config = {
+        "led_strip": led_strip,
+        "led_brightness": led_brightness,
+        "output": {"output_udp": {"udp_client_ip": "127.0.0.1", "udp_client_port": "7777", "udp_protocol": "raw"}}
+    }
+    return OutputUDP(types.SimpleNamespace(device_config=device_config))
+
+
+# The channels of an LED in the packet, if the frame has the colors r=1, g=2, b=3 and w=4.
+@pytest.mark.parametrize("led_strip, channels, expected_led", [
+    ("ws2812_strip", 3, [1, 2, 3]),
+    ("ws2811_strip_rgb", 3, [1, 2, 3]),
+    ("ws2811_strip_bgr", 3, [3, 2, 1]),
+    ("ws2811_strip_brg", 3, [3, 1, 2]),
+    ("ws2811_strip_gbr", 3, [2, 3, 1]),
+    ("ws2811_strip_grb", 3, [2, 1, 3]),
+    ("ws2811_strip_rbg", 3, [1, 3, 2]),
+    # A strip with three channels drops the white channel, a strip in the frame order keeps it.
+    ("ws2811_strip_grb", 4, [2, 1, 3]),
+    ("ws2812_strip", 4, [1, 2, 3, 4])
+])
+def test_channel_order(led_strip, channels, expected_led):
+    output = get_output(led_strip)
+    output_array = np.repeat(np.arange(1, channels + 1).reshape(channels, 1), 5, axis=1)
+
+    packet = output.pack_frame(output_array)
+
+    assert packet.dtype == np.uint8
+    assert packet.tolist() == [expected_led] * 5
+    # The packet is sent with the channels of an LED next to each other.
+    assert packet.tobytes() == bytes(expected_led * 5)
+
+
+def test_brightness_scales_and_clips_the_channels():
+    output = get_output("ws2811_strip_grb", led_brightness=50)
+    output_array = np.array([[100.0, 600.0], [-20.0, 255.0], [3.0, 51.0]])
+
+    assert output.pack_frame(output_array).tolist() == [[0, 50, 1], [127, 255, 25]]
+
+    output._device_config["led_brightness"] = 100
+    output.update_config()
+    assert output.pack_frame(output_array).tolist() == [[0, 100, 3], [255, 255, 51]]
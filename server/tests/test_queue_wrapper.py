@@ -0,0 +1,54 @@
+from libs.metrics_registry import MetricsRegistry  # pylint: disable=E0611, E0401
+from libs.queue_wrapper import QueueWrapper  # pylint: disable=E0611, E0401
+
+from multiprocessing import Queue
+import time
+
+
+def get_queue_drops():
+    for metric in MetricsRegistry.instance().get_snapshot(reset=False):
+        if metric["name"] == "queue_drops_total":
+            return metric["value"]
+    return 0
+
+
+def fill_and_overflow(queue_wrapper):
+    for element in range(3):
+        queue_wrapper.put_none_blocking(element)
+        # Wait until the feeder thread of the queue wrote the element, so full() sees it.
+        time.sleep(0.05)
+
+
+def test_full_queue_counts_the_dropped_elements():
+    queue_drops = get_queue_drops()
+    queue_wrapper = QueueWrapper(Queue(2))
+
+    fill_and_overflow(queue_wrapper)
+
+    assert get_queue_drops() == queue_drops + 1
+    assert queue_wrapper.get_blocking_with_timeout() == 1
+
+
+def test_stats_queue_drops_are_not_counted():
+    queue_drops = get_queue_drops()
+    queue_wrapper = QueueWrapper(Queue(2), count_drops=False)
+
+    fill_and_overflow(queue_wrapper)
+
+    assert get_queue_drops() == queue_drops
+    assert queue_wrapper.get_blocking_with_timeout() == 1
+
+
+def test_wait_returns_the_queues_with_items():
+    queue_wrappers = [QueueWrapper(Queue(2)) for i in range(3)]
+    queue_wrappers[1].put_blocking("item")
+
+    assert QueueWrapper.wait(queue_wrappers, 5) == [queue_wrappers[1]]
+
+
+def test_wait_times_out_without_items():
+    queue_wrappers = [QueueWrapper(Queue(2)) for i in range(2)]
+
+    start_time = time.perf_counter()
+    assert QueueWrapper.wait(queue_wrappers, 0.1) == []
+    assert time.perf_counter() - start_time >= 0.1
@@ -0,0 +1,240 @@
+from libs.outputs.udp_frame_protocol import UDPFramePacker, UDPFrameReceiver  # pylint: disable=E0611, E0401
+from libs.outputs.udp_frame_protocol import UDPFrameEncoder, UDPFrameDecoder  # pylint: disable=E0611, E0401
+
+import numpy as np
+import random
+
+
+def get_frame(led_count, value, bytes_per_led=3):
+    return bytes((value + index) % 256 for index in range(led_count * bytes_per_led))
+
+
+def test_frame_is_split_into_chunks_of_whole_leds():
+    frame_packer = UDPFramePacker(4)
+    datagrams = frame_packer.pack(get_frame(1000, 0, 4))
+
+    assert len(datagrams) == 3
+    assert frame_packer.chunk_length % 4 == 0
+    assert all(len(datagram) <= UDPFramePacker.MAX_DATAGRAM_LENGTH for datagram in datagrams)
+    assert all(UDPFramePacker.is_chunk(datagram) for datagram in datagrams)
+
+
+def test_reordered_chunks_complete_the_frame():
+    frame_packer = UDPFramePacker()
+    frame_receiver = UDPFrameReceiver()
+    frame = get_frame(1000, 1)
+    datagrams = frame_packer.pack(frame)
+    random.Random(1).shuffle(datagrams)
+
+    frames = [frame_receiver.receive(datagram) for datagram in datagrams]
+
+    assert frames[:-1] == [None] * (len(datagrams) - 1)
+    assert frames[-1] == frame
+    # Duplicated chunks of a complete frame are ignored.
+    assert frame_receiver.receive(datagrams[0]) is None
+
+
+def test_lost_chunk_drops_the_frame():
+    frame_packer = UDPFramePacker()
+    frame_receiver = UDPFrameReceiver()
+
+    datagrams = frame_packer.pack(get_frame(1000, 1))
+    for datagram in datagrams[1:]:
+        assert frame_receiver.receive(datagram) is None
+
+    frame = get_frame(1000, 2)
+    received_frames = [frame_receiver.receive(datagram) for datagram in frame_packer.pack(frame)]
+
+    assert received_frames[-1] == frame
+    assert frame_receiver.statistics["dropped_frames"] == 1
+    assert frame_receiver.statistics["completed_frames"] == 1
+
+
+def test_chunks_of_an_older_frame_are_ignored():
+    frame_packer = UDPFramePacker()
+    frame_receiver = UDPFrameReceiver()
+    old_datagrams = frame_packer.pack(get_frame(10, 1))
+    new_frame = get_frame(10, 2)
+
+    assert frame_receiver.receive(frame_packer.pack(new_frame)[0]) == new_frame
+    assert frame_receiver.receive(old_datagrams[0]) is None
+    assert frame_receiver.statistics["completed_frames"] == 1
+
+
+def test_sequence_wraps_around():
+    frame_packer = UDPFramePacker()
+    frame_receiver = UDPFrameReceiver()
+    frame_packer._sequence = 0xFFFFFFFF - 2
+
+    old_datagrams = []
+    for value in range(5):
+        frame = get_frame(10, value)
+        datagrams = frame_packer.pack(frame)
+        old_datagrams.append(datagrams[0])
+        assert frame_receiver.receive(datagrams[0]) == frame
+
+    # The sequences 0xFFFFFFFE, 0xFFFFFFFF, 0, 1 and 2 were sent. The frames before the wrap are older now.
+    assert frame_packer.sequence == 2
+    assert frame_receiver.receive(old_datagrams[0]) is None
+    assert frame_receiver.statistics["completed_frames"] == 5
+
+
+def test_restarted_server_is_accepted():
+    frame_packer = UDPFramePacker()
+    frame_receiver = UDPFrameReceiver()
+    frame_packer._sequence = 1000
+    frame_receiver.receive(frame_packer.pack(get_frame(10, 1))[0])
+
+    # A restarted server starts again with the sequence 1, which is far behind the last frame.
+    restarted_frame_packer = UDPFramePacker()
+    frame = get_frame(10, 2)
+    assert frame_receiver.receive(restarted_frame_packer.pack(frame)[0]) == frame
+
+    # A sequence within MAX_LATE_FRAMES is a late chunk instead.
+    late_frame_packer = UDPFramePacker()
+    late_frame_packer._sequence = 1 - UDPFrameReceiver.MAX_LATE_FRAMES - 1
+    assert frame_receiver.receive(late_frame_packer.pack(get_frame(10, 3))[0]) is None
+
+
+def test_raw_frame_starting_with_the_magic_is_not_a_chunk():
+    # The first LED of a raw frame has the color of the magic and the header fields are random.
+    raw_frame = b"ML" + bytes(random.Random(2).randrange(256) for index in range(298))
+    assert not UDPFramePacker.is_chunk(raw_frame)
+    assert not UDPFrameReceiver.is_chunked_datagram(raw_frame)
+
+    # Even with a valid version and flags, the length and the offset of the header must match.
+    datagram = bytearray(UDPFramePacker().pack(get_frame(1000, 1))[1])
+    assert UDPFramePacker.is_chunk(datagram)
+    assert not UDPFramePacker.is_chunk(datagram + b"\0\0\0")
+    datagram[11] += 3
+    assert not UDPFramePacker.is_chunk(datagram)
+
+
+def get_packet(led_count, seed):
+    return np.random.default_rng(seed).integers(0, 256, (led_count, 3), dtype=np.uint8)
+
+
+def test_encoded_frames_are_decoded():
+    frame_encoder = UDPFrameEncoder()
+    frame_decoder = UDPFrameDecoder()
+    packet = get_packet(300, 1)
+    packet[100:250] = 7
+
+    for frame_index in range(20):
+        # The frames change a little, so the encoder sends delta frames between the keyframes.
+        packet[frame_index] = frame_index
+        payload, flags = frame_encoder.encode(packet, frame_index * 0.1)
+        assert frame_decoder.decode(payload, flags) == packet.tobytes()
+
+        if frame_index in (0, 10):
+            assert flags & UDPFrameEncoder.FLAG_KEYFRAME
+        else:
+            assert flags & UDPFrameEncoder.FLAG_DELTA
+
+
+def test_delta_frames_of_a_lost_keyframe_are_not_decoded():
+    frame_encoder = UDPFrameEncoder()
+    frame_decoder = UDPFrameDecoder()
+    packet = get_packet(300, 1)
+
+    payload, flags = frame_encoder.encode(packet, 0)
+    assert frame_decoder.decode(payload, flags) == packet.tobytes()
+
+    # The second keyframe is lost, so the next delta frames refer to a keyframe, which the client does not know.
+    packet = get_packet(300, 2)
+    payload, flags = frame_encoder.encode(packet, 1)
+    assert flags & UDPFrameEncoder.FLAG_KEYFRAME
+
+    packet[0] = 0
+    payload, flags = frame_encoder.encode(packet, 1.5)
+    assert flags & UDPFrameEncoder.FLAG_DELTA
+    assert frame_decoder.decode(payload, flags) is None
+
+    # The client shows frames again after the next keyframe.
+    payload, flags = frame_encoder.encode(packet, 2)
+    assert flags & UDPFrameEncoder.FLAG_KEYFRAME
+    assert frame_decoder.decode(payload, flags) == packet.tobytes()
+
+
+def test_delta_frame_against_a_stale_keyframe_is_not_decoded():
+    frame_encoder = UDPFrameEncoder()
+    frame_decoder = UDPFrameDecoder()
+    packet = get_packet(300, 1)
+
+    payload, flags = frame_encoder.encode(packet, 0)
+    frame_decoder.decode(payload, flags)
+    packet[0] = 0
+    stale_payload, stale_flags = frame_encoder.encode(packet, 0.5)
+
+    payload, flags = frame_encoder.encode(get_packet(300, 2), 1)
+    assert frame_decoder.decode(payload, flags) is not None
+
+    # A late delta frame of the first keyframe arrives after the second keyframe.
+    assert stale_flags & UDPFrameEncoder.FLAG_DELTA
+    assert frame_decoder.decode(stale_payload, stale_flags) is None
+
+
+def get_control_bytes(encoded_leds, bytes_per_led=3):
+    control_bytes = []
+    position = 0
+    while position < len(encoded_leds):
+        control = encoded_leds[position]
+        control_bytes.append(control)
+        position += 1 + ((control + 1) * bytes_per_led if control < 128 else bytes_per_led)
+    return control_bytes
+
+
+def test_run_length_boundaries():
+    frame_decoder = UDPFrameDecoder()
+    frame_encoder = UDPFrameEncoder()
+
+    # A run of the same color between 20 LEDs of different colors on both sides.
+    # A repeat covers 3 to 130 LEDs. A rest, which is too short for a repeat, is sent with the following literal.
+    expected_control_bytes = {
+        3: [19, 128, 19],
+        128: [19, 253, 19],
+        129: [19, 254, 19],
+        130: [19, 255, 19],
+        131: [19, 255, 20],
+        132: [19, 255, 21],
+        133: [19, 255, 128, 19],
+        260: [19, 255, 255, 19],
+        261: [19, 255, 255, 20]
+    }
+    for run_length, control_bytes in expected_control_bytes.items():
+        packet = get_packet(run_length + 40, run_length)
+        packet[20:20 + run_length] = 42
+
+        encoded_leds, flags = frame_encoder.encode_leds(packet)
+        assert flags == UDPFrameEncoder.FLAG_RUN_LENGTH
+        assert get_control_bytes(encoded_leds) == control_bytes, run_length
+        assert frame_decoder.decode_run_length(encoded_leds) == packet.tobytes(), run_length
+
+    # Two LEDs of the same color are no run. The raw LEDs are smaller then.
+    packet = get_packet(42, 2)
+    packet[20:22] = 42
+    assert frame_encoder.encode_leds(packet) == (packet.tobytes(), 0)
+
+
+def test_run_length_control_bytes():
+    frame_encoder = UDPFrameEncoder()
+
+    packet = np.zeros((3, 3), dtype=np.uint8)
+    assert get_control_bytes(frame_encoder.encode_leds(packet)[0]) == [128]
+
+    packet = np.zeros((130, 3), dtype=np.uint8)
+    assert get_control_bytes(frame_encoder.encode_leds(packet)[0]) == [255]
+
+    # 128 different LEDs fit into one literal, the next one starts a new literal.
+    packet = get_packet(129, 1)
+    packet[:, 0] = np.arange(129)
+    packet = np.concatenate((packet, np.zeros((128, 3), dtype=np.uint8)))
+    assert get_control_bytes(frame_encoder.encode_leds(packet)[0]) == [127, 0, 253]
+
+
+def test_truncated_runs_are_not_decoded():
+    frame_decoder = UDPFrameDecoder()
+    encoded_leds, flags = UDPFrameEncoder().encode_leds(np.zeros((10, 3), dtype=np.uint8))
+
+    assert frame_decoder.decode_run_length(encoded_leds[:-1]) is None
+    assert frame_decoder.decode_run_length(bytes([5, 1, 2, 3])) is None
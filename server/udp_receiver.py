@@ -0,0 +1,80 @@
+# UDP Receiver File
+# ----------------
+#
+# Reference client for the UDP output. It receives the frames like an ESP client and prints statistics,
+# so the UDP output can be tested without a LED strip. Point the UDP client IP of a device to this machine.
+#
+# Usage: python3 udp_receiver.py [--port 7777] [--led-count 300] [--channels 3]
+
+from sys import version_info
+import sys
+
+if version_info < (3, 6):
+    sys.exit("\033[91mError: MLSC requires Python 3.6 or greater.")
+
+from libs.outputs.udp_frame_protocol import UDPFrameReceiver  # pylint: disable=E0611, E0401
+
+from time import perf_counter
+import argparse
+import socket
+
+
+class UDPReceiver():
+    """
+    Receives raw, chunked and compressed frames and prints the frames, datagrams and bytes per second.
+    """
+    def __init__(self, port, led_count, channels):
+        self._port = port
+        self._led_count = led_count
+        self._channels = channels
+        self._frame_receiver = UDPFrameReceiver(channels)
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("0.0.0.0", self._port))
+        print(f"Listening on UDP port {self._port}...")
+
+        frames = 0
+        datagrams = 0
+        received_bytes = 0
+        report_time = perf_counter()
+        while True:
+            datagram = sock.recv(65535)
+            datagrams += 1
+            received_bytes += len(datagram)
+
+            if UDPFrameReceiver.is_chunked_datagram(datagram):
+                frame = self._frame_receiver.receive(datagram)
+            else:
+                frame = datagram
+
+            if frame is not None:
+                frames += 1
+                self.check_frame(frame)
+
+            now = perf_counter()
+            if now - report_time >= 1:
+                print(f"{frames / (now - report_time):7.1f} frames/s {datagrams / (now - report_time):7.1f} datagrams/s "
+                      f"{received_bytes / (now - report_time) / 1024:8.1f} KiB/s | {self._frame_receiver.statistics}")
+                frames = 0
+                datagrams = 0
+                received_bytes = 0
+                report_time = now
+
+    def check_frame(self, frame):
+        expected_length = self._led_count * self._channels
+        if self._led_count > 0 and len(frame) != expected_length:
+            print(f"Received a frame with {len(frame)} bytes, expected {expected_length} bytes.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reference UDP client of MLSC.")
+    parser.add_argument("--port", type=int, default=7777, help="UDP port to listen on.")
+    parser.add_argument("--led-count", type=int, default=0, help="Check the length of the frames, if it is set.")
+    parser.add_argument("--channels", type=int, default=3, help="Bytes per LED, 4 for SK6812 strips.")
+    args = parser.parse_args()
+
+    try:
+        UDPReceiver(args.port, args.led_count, args.channels).start()
+    except KeyboardInterrupt:
+        pass